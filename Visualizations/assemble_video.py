@@ -0,0 +1,342 @@
+"""
+Final Video Assembly
+Concatenates rendered scenes without re-encoding them
+
+Usage:
+    python assemble_video.py
+    python assemble_video.py --video-dir media/videos --output DotProduct_Complete.mp4
+
+Scene order comes from the scenes.json written by render_scenes.py. Without
+one (scenes rendered from the notebook with %%manim), the order is the
+--scenes list, or the scene videos in video_dir sorted by name; a scene
+missing from video_dir falls back to its newest render in media/jupyter.
+
+Every segment is probed with ffprobe first; segments whose codec,
+resolution, frame rate, pixel format or audio layout differ from the
+majority are re-encoded to match (and cached), everything else is
+stream-copied. The .assembly.json manifest remembers probes, normalized
+segments and the inputs of the last output, so replacing one scene only
+re-muxes.
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from render_scenes import DEFAULT_OUTPUT_DIR, SCENE_MANIFEST_NAME
+
+ASSEMBLY_MANIFEST_NAME = ".assembly.json"
+COMPLETE_SUFFIX = "_Complete.mp4"
+JUPYTER_DIR_NAME = "jupyter"
+NORMALIZED_DIR_NAME = ".normalized"
+CONCAT_LIST_NAME = "concat_list.txt"
+MANIFEST_VERSION = 1
+
+# ffprobe codec names -> ffmpeg encoders used when a segment must be normalized
+VIDEO_ENCODERS = {"h264": "libx264", "hevc": "libx265", "vp9": "libvpx-vp9", "av1": "libaom-av1"}
+AUDIO_ENCODERS = {"aac": "aac", "mp3": "libmp3lame", "opus": "libopus", "vorbis": "libvorbis"}
+CHANNEL_LAYOUTS = {1: "mono", 2: "stereo"}
+
+
+# ============================================================================
+# PROBING
+# ============================================================================
+
+def probe_segment(path):
+    """
+    Read the stream parameters that must match for a stream-copy concat.
+
+    Returns:
+        dict: {"video": {...}, "audio": {...} or None}
+    """
+    cmd = ["ffprobe", "-v", "error", "-of", "json", "-show_entries",
+           "stream=codec_type,codec_name,width,height,r_frame_rate,pix_fmt,time_base,"
+           "sample_rate,channels", path]
+    streams = json.loads(subprocess.run(cmd, capture_output=True, text=True, check=True).stdout)["streams"]
+
+    video = next(s for s in streams if s["codec_type"] == "video")
+    audio = next((s for s in streams if s["codec_type"] == "audio"), None)
+    return {
+        "video": {key: video.get(key) for key in
+                  ("codec_name", "width", "height", "r_frame_rate", "pix_fmt", "time_base")},
+        "audio": None if audio is None else {key: audio.get(key) for key in
+                                             ("codec_name", "sample_rate", "channels")},
+    }
+
+
+def file_identity(path):
+    """Cheap change detector for a segment: size and modification time"""
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def signature(probe):
+    """Stable string form of a probe, for comparing segments"""
+    return json.dumps(probe, sort_keys=True)
+
+
+# ============================================================================
+# NORMALIZATION
+# ============================================================================
+
+def normalize_segment(src, probe, target, dest):
+    """
+    Re-encode src so its streams match target exactly.
+
+    Args:
+        src: Segment to convert
+        probe: probe_segment() result for src
+        target: probe_segment() result every segment must match
+        dest: Output path (written atomically)
+    """
+    video = target["video"]
+    width, height = video["width"], video["height"]
+    timescale = video["time_base"].split("/")[1]
+
+    cmd = ["ffmpeg", "-y", "-v", "error", "-i", src]
+    audio = target["audio"]
+    if audio and probe["audio"] is None:
+        layout = CHANNEL_LAYOUTS.get(audio["channels"], "stereo")
+        cmd += ["-f", "lavfi", "-i", f"anullsrc=r={audio['sample_rate']}:cl={layout}"]
+
+    cmd += [
+        "-map", "0:v:0",
+        "-vf", (f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+                f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,fps={video['r_frame_rate']}"),
+        "-c:v", VIDEO_ENCODERS.get(video["codec_name"], video["codec_name"]),
+        "-pix_fmt", video["pix_fmt"],
+        "-video_track_timescale", timescale,
+    ]
+    if video["codec_name"] in ("h264", "hevc"):
+        cmd += ["-crf", "18", "-preset", "medium"]
+
+    if audio is None:
+        cmd.append("-an")
+    else:
+        cmd += ["-map", "1:a:0" if probe["audio"] is None else "0:a:0",
+                "-c:a", AUDIO_ENCODERS.get(audio["codec_name"], audio["codec_name"]),
+                "-ar", str(audio["sample_rate"]), "-ac", str(audio["channels"]), "-shortest"]
+
+    tmp_path = dest + ".tmp.mp4"
+    subprocess.run(cmd + [tmp_path], check=True)
+    os.replace(tmp_path, dest)
+
+
+def choose_target(probes):
+    """
+    The stream parameters most segments already have, so the fewest need
+    re-encoding. Ties go to the earliest scene.
+    """
+    counts = Counter(signature(p) for p in probes)
+    best = max(counts.values())
+    return next(p for p in probes if counts[signature(p)] == best)
+
+
+# ============================================================================
+# ASSEMBLY
+# ============================================================================
+
+def load_assembly_manifest(video_dir):
+    path = os.path.join(video_dir, ASSEMBLY_MANIFEST_NAME)
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {"version": MANIFEST_VERSION, "probes": {}, "output": None}
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {"version": MANIFEST_VERSION, "probes": {}, "output": None}
+    return manifest
+
+
+def save_assembly_manifest(video_dir, manifest):
+    path = os.path.join(video_dir, ASSEMBLY_MANIFEST_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def scene_file(video_dir, scene):
+    """A scene's video: <scene>.mp4 in video_dir, else its newest %%manim render"""
+    path = os.path.join(video_dir, f"{scene}.mp4")
+    if os.path.exists(path):
+        return path
+    jupyter_dir = os.path.join(os.path.dirname(os.path.abspath(video_dir)), JUPYTER_DIR_NAME)
+    # Timestamps sort chronologically: Scene01@2026-01-27@17-26-34.mp4
+    renders = sorted(glob.glob(os.path.join(glob.escape(jupyter_dir), glob.escape(scene) + "@*.mp4")))
+    return renders[-1] if renders else None
+
+
+def scene_segments(video_dir, scenes=None):
+    """
+    Scene videos in render order, from render_scenes.py's scenes.json, or
+    from scenes (default: the videos in video_dir by name) without one.
+
+    Returns:
+        tuple: (source stem, [(scene, path)], [missing scene names])
+    """
+    path = os.path.join(video_dir, SCENE_MANIFEST_NAME)
+    if not os.path.exists(path):
+        if scenes is None:
+            scenes = sorted(os.path.splitext(name)[0] for name in os.listdir(video_dir)
+                            if name.endswith(".mp4") and not name.endswith(COMPLETE_SUFFIX)
+                            and not name.endswith(".tmp.mp4"))
+        segments, missing = [], []
+        for scene in scenes:
+            file = scene_file(video_dir, scene)
+            if file:
+                segments.append((scene, file))
+            else:
+                missing.append(scene)
+        return "Video", segments, missing
+
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    segments, missing = [], []
+    for entry in manifest["scenes"]:
+        file = entry.get("file") and os.path.join(video_dir, entry["file"])
+        if file and os.path.exists(file):
+            segments.append((entry["scene"], file))
+        else:
+            missing.append(entry["scene"])
+
+    stem = os.path.splitext(os.path.basename(manifest.get("source", "video")))[0]
+    return re.sub(r"\W+", "_", stem).strip("_"), segments, missing
+
+
+def assemble_video(video_dir=DEFAULT_OUTPUT_DIR, output=None, allow_missing=False, jobs=None,
+                   scenes=None):
+    """
+    Concatenate the rendered scenes of video_dir into one file.
+
+    Args:
+        video_dir: Directory with the scene videos and scenes.json
+        output: Output file (default: <source>_Complete.mp4 in video_dir)
+        allow_missing: Assemble without scenes that failed or were never rendered
+        jobs: Concurrent re-encodes for mismatched segments (default: CPU count)
+        scenes: Scene order to use when video_dir has no scenes.json
+
+    Returns:
+        str or None: The output path, or None if scenes were missing
+    """
+    start = time.time()
+    stem, segments, missing = scene_segments(video_dir, scenes)
+    if missing:
+        print(f"Missing scenes: {', '.join(missing)}")
+        if not allow_missing:
+            print("Nothing assembled (use --allow-missing to assemble the rest).")
+            return None
+    if not segments:
+        print("No scene videos to assemble.")
+        return None
+    output = output or os.path.join(video_dir, stem + COMPLETE_SUFFIX)
+
+    manifest = load_assembly_manifest(video_dir)
+    probes = {}
+    for scene, path in segments:
+        cached = manifest["probes"].get(path)
+        identity = file_identity(path)
+        if cached and cached["identity"] == identity:
+            probes[path] = cached["probe"]
+        else:
+            probes[path] = probe_segment(path)
+        manifest["probes"][path] = {"identity": identity, "probe": probes[path]}
+
+    target = choose_target([probes[path] for _, path in segments])
+    normalized_dir = os.path.join(video_dir, NORMALIZED_DIR_NAME)
+    inputs, to_normalize = [], []
+    for scene, path in segments:
+        if signature(probes[path]) == signature(target):
+            inputs.append(path)
+            continue
+        key = hashlib.sha256(json.dumps([path, file_identity(path), signature(target)]).encode("utf-8"))
+        dest = os.path.join(normalized_dir, f"{scene}-{key.hexdigest()[:16]}.mp4")
+        inputs.append(dest)
+        if not os.path.exists(dest):
+            to_normalize.append((scene, path, dest))
+
+    if to_normalize:
+        os.makedirs(normalized_dir, exist_ok=True)
+        print(f"Normalizing {len(to_normalize)} mismatched segment(s)...")
+        with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as executor:
+            futures = [executor.submit(normalize_segment, path, probes[path], target, dest)
+                       for _, path, dest in to_normalize]
+            for (scene, _, _), future in zip(to_normalize, futures):
+                future.result()
+                print(f"  -> normalized {scene}")
+
+    # Drop normalized segments that no longer correspond to any scene
+    if os.path.isdir(normalized_dir):
+        for name in os.listdir(normalized_dir):
+            if os.path.join(normalized_dir, name) not in inputs:
+                os.remove(os.path.join(normalized_dir, name))
+
+    input_state = [[path, file_identity(path)] for path in inputs]
+    previous = manifest.get("output")
+    if (previous and previous["path"] == os.path.abspath(output) and previous["inputs"] == input_state
+            and os.path.exists(output)):
+        print(f"Up to date: {output}")
+        save_assembly_manifest(video_dir, manifest)
+        return output
+
+    concat_file = os.path.join(video_dir, CONCAT_LIST_NAME)
+    with open(concat_file, "w", encoding="utf-8") as f:
+        for path in inputs:
+            escaped = os.path.abspath(path).replace("\\", "/").replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+
+    tmp_output = output + ".tmp.mp4"
+    subprocess.run(["ffmpeg", "-y", "-v", "error", "-f", "concat", "-safe", "0", "-i", concat_file,
+                    "-c", "copy", "-movflags", "+faststart", tmp_output], check=True)
+    os.replace(tmp_output, output)
+
+    manifest["output"] = {"path": os.path.abspath(output), "inputs": input_state}
+    save_assembly_manifest(video_dir, manifest)
+
+    print("\n" + "=" * 30)
+    print(f"Assembly Complete.")
+    print(f"Scenes:      {len(segments)}")
+    print(f"Normalized:  {len(to_normalize)} re-encoded, "
+          f"{sum(p.startswith(normalized_dir) for p in inputs) - len(to_normalize)} reused")
+    print(f"Wall Time:   {time.time() - start:.1f}s")
+    print(f"Output:      {output}")
+    print("=" * 30)
+    return output
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Concatenate rendered scenes into one video.")
+    parser.add_argument("--video-dir", default=DEFAULT_OUTPUT_DIR,
+                        help="Directory with the scene videos and scenes.json")
+    parser.add_argument("--output", help="Output file (default: <source>_Complete.mp4)")
+    parser.add_argument("--allow-missing", action="store_true",
+                        help="Assemble even if some scenes failed or were never rendered")
+    parser.add_argument("--jobs", "-j", type=int, default=None,
+                        help="Concurrent re-encodes (default: CPU count)")
+    parser.add_argument("--scenes", nargs="+", default=None,
+                        help="Scene order when there is no scenes.json (default: videos by name)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    try:
+        result = assemble_video(args.video_dir, output=args.output,
+                                allow_missing=args.allow_missing, jobs=args.jobs,
+                                scenes=args.scenes)
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    except subprocess.CalledProcessError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    sys.exit(0 if result else 1)
@@ -0,0 +1,403 @@
+"""
+Media Store Index & Garbage Collection
+Keeps Visualizations/media from growing without bound
+
+Usage:
+    python media_store.py stats
+    python media_store.py gc --dry-run
+    python media_store.py gc --budget 200M
+    python media_store.py gc --budget 1G --dedupe
+
+Every file under media/ is indexed by content hash (.media-index.json
+remembers hashes by size and mtime, so re-indexing only reads new files)
+and classified by what references it:
+
+    partial movies  live if listed in their scene's partial_movie_file_list.txt
+                    and the scene still exists in a notebook or module
+    jupyter renders live if they are the newest timestamped render of a scene
+    Tex cache       live if the formula still appears in a scene source
+    Text cache      always kept: its file names are hashes of the Text or
+                    MarkupText settings, so they can't be matched to sources
+
+gc always removes dead partial movies, superseded timestamped renders and
+orphaned Tex halves. If the store is still over --budget it then evicts
+cache entries least recently used first, unreferenced ones before live
+ones. Final scene videos and the Text cache are never evicted.
+
+stats and gc --dry-run only read the store; the index is updated by gc.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+
+from render_scenes import VISUALIZATIONS_DIR, find_scene_classes, read_notebook_source
+
+DEFAULT_MEDIA_DIR = os.path.join(VISUALIZATIONS_DIR, "media")
+INDEX_NAME = ".media-index.json"
+INDEX_VERSION = 1
+
+PARTIAL_LIST_NAME = "partial_movie_file_list.txt"
+PARTIAL_LIST_PATTERN = re.compile(r"^file '(?:file:)?(.*)'\s*$")
+TIMESTAMPED_PATTERN = re.compile(r"^(?P<scene>.+)@(?P<stamp>\d{4}-\d{2}-\d{2}@\d{2}-\d{2}-\d{2})\.[^.]+$")
+TEX_BODY_PATTERN = re.compile(r"\\begin\{document\}(.*)\\end\{document\}", re.DOTALL)
+TEX_ENV_PATTERN = re.compile(r"\\(?:begin|end)\{[^}]*\}")
+
+SIZE_UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+
+# Kinds that are caches Manim can rebuild, and may be evicted under the budget.
+# Text SVGs are rebuildable too, but nothing tells which of them are in use.
+EVICTABLE_KINDS = ("tex", "partial")
+
+
+# ============================================================================
+# INDEX
+# ============================================================================
+
+def load_index(media_dir):
+    """Load the hash index, or start an empty one"""
+    try:
+        with open(os.path.join(media_dir, INDEX_NAME), encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {"version": INDEX_VERSION, "files": {}}
+    if index.get("version") != INDEX_VERSION:
+        return {"version": INDEX_VERSION, "files": {}}
+    return index
+
+
+def save_index(media_dir, index):
+    """Write the index atomically"""
+    path = os.path.join(media_dir, INDEX_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def classify(rel_path):
+    """Kind of artifact at a media-relative path"""
+    parts = rel_path.split("/")
+    name = parts[-1]
+    if parts[0] == "Tex":
+        return "tex"
+    if parts[0] == "texts":
+        return "text"
+    if "partial_movie_files" in parts:
+        return "partial_list" if name == PARTIAL_LIST_NAME else "partial"
+    if TIMESTAMPED_PATTERN.match(name):
+        return "timestamped"
+    if name.endswith((".mp4", ".mov", ".webm", ".gif")):
+        return "video"
+    return "other"
+
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def build_index(media_dir, save=True):
+    """
+    Index every file under media_dir by content hash, reusing hashes of
+    files whose size and mtime haven't changed. With save=False the index
+    file is left as it was.
+
+    Returns:
+        dict: {media-relative path: {size, mtime_ns, last_used, sha256, kind}}
+    """
+    previous = load_index(media_dir)["files"]
+    files = {}
+    for dirpath, _, names in os.walk(media_dir):
+        for name in names:
+            path = os.path.join(dirpath, name)
+            rel_path = os.path.relpath(path, media_dir).replace(os.sep, "/")
+            if rel_path in (INDEX_NAME, INDEX_NAME + ".tmp"):
+                continue
+            st = os.stat(path)
+            entry = previous.get(rel_path)
+            if not entry or entry["size"] != st.st_size or entry["mtime_ns"] != st.st_mtime_ns:
+                entry = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": file_hash(path)}
+            entry["kind"] = classify(rel_path)
+            entry["last_used"] = max(st.st_atime, st.st_mtime)
+            files[rel_path] = entry
+
+    if save:
+        save_index(media_dir, {"version": INDEX_VERSION, "files": files})
+    return files
+
+
+# ============================================================================
+# REFERENCES
+# ============================================================================
+
+def read_scene_sources(source_dir):
+    """Source of every notebook and module in source_dir, as Python code"""
+    sources = []
+    for name in sorted(os.listdir(source_dir)):
+        path = os.path.join(source_dir, name)
+        if name.endswith(".ipynb"):
+            sources.append(read_notebook_source(path))
+        elif name.endswith(".py"):
+            with open(path, encoding="utf-8") as f:
+                sources.append(f.read())
+    return sources
+
+
+def _squash(text):
+    """Whitespace-free form used to look formulas up in scene sources"""
+    return re.sub(r"\s+", "", text)
+
+
+def formula_of(tex_path):
+    """The formula a cached .tex file typesets, without its environment"""
+    try:
+        with open(tex_path, encoding="utf-8") as f:
+            match = TEX_BODY_PATTERN.search(f.read())
+    except OSError:
+        return None
+    return match and _squash(TEX_ENV_PATTERN.sub("", match.group(1)))
+
+
+def find_live(media_dir, files, source_dir):
+    """
+    Work out which indexed files are referenced by current scenes.
+
+    Returns:
+        tuple: (set of live paths, set of dead paths that gc always removes)
+    """
+    sources = read_scene_sources(source_dir)
+    scenes = {scene for source in sources for scene in find_scene_classes(source)}
+    # Python escapes double backslashes in raw and plain strings alike
+    haystack = _squash("\n".join(sources)).replace("\\\\", "\\")
+
+    live, dead = set(), set()
+
+    # Partial movies: only the ones the latest render of an existing scene uses
+    listed = {}
+    for rel_path, entry in files.items():
+        if entry["kind"] != "partial_list":
+            continue
+        scene_dir = rel_path.rsplit("/", 1)[0]
+        with open(os.path.join(media_dir, rel_path), encoding="utf-8") as f:
+            names = {os.path.basename(m.group(1).replace("\\", "/"))
+                     for m in map(PARTIAL_LIST_PATTERN.match, f) if m}
+        listed[scene_dir] = names if scene_dir.rsplit("/", 1)[-1] in scenes else set()
+    for rel_path, entry in files.items():
+        if entry["kind"] in ("partial", "partial_list"):
+            scene_dir, name = rel_path.rsplit("/", 1)
+            used = listed.get(scene_dir, set())
+            keep = name in used if entry["kind"] == "partial" else bool(used)
+            (live if keep else dead).add(rel_path)
+
+    # Timestamped renders: the newest per scene supersedes the rest
+    newest = {}
+    for rel_path, entry in files.items():
+        if entry["kind"] == "timestamped":
+            match = TIMESTAMPED_PATTERN.match(rel_path.rsplit("/", 1)[-1])
+            key = (rel_path.rsplit("/", 1)[0], match.group("scene"))
+            newest[key] = max(newest.get(key, ""), match.group("stamp"))
+    for rel_path, entry in files.items():
+        if entry["kind"] == "timestamped":
+            match = TIMESTAMPED_PATTERN.match(rel_path.rsplit("/", 1)[-1])
+            key = (rel_path.rsplit("/", 1)[0], match.group("scene"))
+            (live if match.group("stamp") == newest[key] else dead).add(rel_path)
+
+    # Tex pairs: live while the formula still appears in a scene source;
+    # a .tex without its .svg is a failed compile, an .svg without its .tex an orphan
+    for rel_path, entry in files.items():
+        if entry["kind"] != "tex":
+            continue
+        stem, ext = os.path.splitext(rel_path)
+        if ext == ".tex":
+            formula = formula_of(os.path.join(media_dir, rel_path))
+            pair_live = stem + ".svg" in files and bool(formula) and formula in haystack
+            if stem + ".svg" not in files:
+                dead.add(rel_path)
+            elif pair_live:
+                live.update([rel_path, stem + ".svg"])
+        elif ext == ".svg" and stem + ".tex" not in files:
+            dead.add(rel_path)
+        elif ext not in (".tex", ".svg"):
+            dead.add(rel_path)  # .log/.aux/.dvi leftovers and batch files
+
+    # Final videos, Text SVGs and anything unrecognised are never collected
+    for rel_path, entry in files.items():
+        if entry["kind"] in ("video", "text", "other"):
+            live.add(rel_path)
+    return live, dead
+
+
+# ============================================================================
+# GARBAGE COLLECTION
+# ============================================================================
+
+def parse_size(text):
+    """'500M' -> bytes"""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*", text.upper())
+    if not match:
+        raise argparse.ArgumentTypeError(f"Not a size: {text!r} (try 500M or 2G)")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2)])
+
+
+def format_size(size):
+    for unit in ("B", "K", "M", "G"):
+        if size < 1024 or unit == "G":
+            return f"{size:.1f}{unit}" if unit != "B" else f"{size}B"
+        size /= 1024
+
+
+def plan_gc(files, live, dead, budget=None):
+    """
+    Choose what to delete: every dead file, then evictable cache entries
+    least recently used first (unreferenced before live) until the store
+    fits in budget.
+
+    Returns:
+        list: Paths to delete, in deletion order
+    """
+    doomed = sorted(dead)
+    remaining = sum(e["size"] for p, e in files.items() if p not in dead)
+    if budget is None or remaining <= budget:
+        return doomed
+
+    candidates = [p for p, e in files.items()
+                  if p not in dead and e["kind"] in EVICTABLE_KINDS]
+    candidates.sort(key=lambda p: (p in live, files[p]["last_used"]))
+    for path in candidates:
+        if remaining <= budget:
+            break
+        doomed.append(path)
+        remaining -= files[path]["size"]
+    return doomed
+
+
+def dedupe(media_dir, files, keep):
+    """
+    Replace identical copies of kept files with hard links to one of them.
+
+    Returns:
+        int: Bytes saved
+    """
+    first_path = {}
+    saved = 0
+    for rel_path in sorted(keep):
+        entry = files[rel_path]
+        original = first_path.setdefault(entry["sha256"], rel_path)
+        if original == rel_path:
+            continue
+        src, dest = os.path.join(media_dir, original), os.path.join(media_dir, rel_path)
+        if os.path.samefile(src, dest):
+            continue
+        tmp_path = dest + ".link.tmp"
+        try:
+            os.link(src, tmp_path)
+        except OSError:
+            continue  # Different filesystem or no hard link support
+        os.replace(tmp_path, dest)
+        saved += entry["size"]
+    return saved
+
+
+def collect_garbage(media_dir=DEFAULT_MEDIA_DIR, source_dir=VISUALIZATIONS_DIR, budget=None,
+                    dry_run=False, link_duplicates=False):
+    """
+    Delete dead media and evict caches down to budget.
+
+    Args:
+        media_dir: Manim media directory
+        source_dir: Directory with the notebooks/modules that define scenes
+        budget: Size limit in bytes for the whole store (default: no limit)
+        dry_run: Only report what would be deleted
+        link_duplicates: Hard-link identical kept files to a single copy
+
+    Returns:
+        dict: deleted paths, bytes freed, bytes saved by dedupe, final size
+    """
+    start = time.time()
+    files = build_index(media_dir, save=not dry_run)
+    live, dead = find_live(media_dir, files, source_dir)
+    doomed = plan_gc(files, live, dead, budget)
+
+    freed = sum(files[p]["size"] for p in doomed)
+    for rel_path in doomed:
+        if dry_run:
+            print(f"  would delete {rel_path}")
+        else:
+            os.remove(os.path.join(media_dir, rel_path))
+
+    saved = 0
+    if link_duplicates and not dry_run:
+        saved = dedupe(media_dir, files, set(files) - set(doomed))
+
+    if not dry_run:
+        for dirpath, dirnames, names in os.walk(media_dir, topdown=False):
+            if dirpath != media_dir and not os.listdir(dirpath):
+                os.rmdir(dirpath)
+        files = build_index(media_dir)
+
+    total = sum(e["size"] for p, e in files.items() if not dry_run or p not in doomed)
+    print("\n" + "=" * 30)
+    print(f"GC {'Dry Run' if dry_run else 'Complete'}.")
+    print(f"Files Deleted:  {len(doomed)}")
+    print(f"Space Freed:    {format_size(freed)}")
+    if link_duplicates:
+        print(f"Deduplicated:   {format_size(saved)}")
+    print(f"Store Size:     {format_size(total)}" + (f" (budget {format_size(budget)})" if budget else ""))
+    print(f"Wall Time:      {time.time() - start:.1f}s")
+    print("=" * 30)
+    return {"deleted": doomed, "freed": freed, "deduplicated": saved, "size": total}
+
+
+def print_stats(media_dir=DEFAULT_MEDIA_DIR, source_dir=VISUALIZATIONS_DIR):
+    """Print size per kind, how much of it is live, and duplicate content"""
+    files = build_index(media_dir, save=False)
+    live, dead = find_live(media_dir, files, source_dir)
+
+    print(f"{'Kind':<14}{'Files':>7}{'Size':>10}{'Live':>10}{'Dead':>10}")
+    for kind in sorted({e["kind"] for e in files.values()}):
+        paths = [p for p, e in files.items() if e["kind"] == kind]
+        size = lambda subset: format_size(sum(files[p]["size"] for p in subset))
+        print(f"{kind:<14}{len(paths):>7}{size(paths):>10}"
+              f"{size([p for p in paths if p in live]):>10}{size([p for p in paths if p in dead]):>10}")
+
+    by_hash = {}
+    for rel_path, entry in files.items():
+        by_hash.setdefault(entry["sha256"], []).append(rel_path)
+    duplicate = sum(files[paths[0]]["size"] * (len(paths) - 1)
+                    for paths in by_hash.values() if len(paths) > 1)
+    print(f"\nTotal: {format_size(sum(e['size'] for e in files.values()))} in {len(files)} files, "
+          f"{format_size(duplicate)} duplicated content")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Index and garbage-collect Manim media.")
+    parser.add_argument("command", choices=["stats", "gc"])
+    parser.add_argument("--media-dir", default=DEFAULT_MEDIA_DIR)
+    parser.add_argument("--source-dir", default=VISUALIZATIONS_DIR,
+                        help="Where the notebooks/modules defining the scenes live")
+    parser.add_argument("--budget", type=parse_size, default=None,
+                        help="Evict least recently used caches until the store fits (e.g. 500M)")
+    parser.add_argument("--dry-run", action="store_true", help="Only list what gc would delete")
+    parser.add_argument("--dedupe", action="store_true",
+                        help="Hard-link identical files to a single copy")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if not os.path.isdir(args.media_dir):
+        print(f"Error: Media directory not found at '{args.media_dir}'")
+        sys.exit(1)
+    if args.command == "stats":
+        print_stats(args.media_dir, args.source_dir)
+    else:
+        collect_garbage(args.media_dir, args.source_dir, budget=args.budget,
+                        dry_run=args.dry_run, link_duplicates=args.dedupe)
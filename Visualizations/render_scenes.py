@@ -0,0 +1,421 @@
+"""
+Headless Render Farm for BaseScene Notebooks
+Renders every scene of a notebook or module in parallel
+
+Usage:
+    python render_scenes.py "dot product.ipynb"
+    python render_scenes.py "dot product.ipynb" -j 4 -q h
+    python render_scenes.py scenes.py --scenes Scene01_Introduction Scene09_Summary
+
+Each scene is rendered by its own `manim render` process with a private
+media directory, so workers never share partial movie files or Tex output.
+Finished videos are collected into the output directory (media/videos by
+default) together with scenes.json, which lists them in source order for
+the concat step.
+
+scenes.json also records a fingerprint per scene (class source, shared
+definitions, style_utils and render settings); scenes whose fingerprint is
+unchanged since the last render reuse their video instead of re-rendering.
+"""
+
+import argparse
+import ast
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+VISUALIZATIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT_DIR = os.path.join(VISUALIZATIONS_DIR, "media", "videos")
+SCENE_MANIFEST_NAME = "scenes.json"
+WORK_DIR_NAME = ".render"
+
+# Bump to invalidate every cached scene (e.g. when the fingerprint inputs change)
+FINGERPRINT_VERSION = 1
+
+# Modules every scene depends on besides its own source
+SHARED_SOURCES = ["style_utils.py", "style_constants.py", "style_helpers.py"]
+MANIM_CONFIG_NAME = "manim.cfg"
+
+# Scenes are recognised as subclasses of this (directly or through each other)
+SCENE_BASE_CLASS = "BaseScene"
+
+# What a notebook's scene cells can rely on from the setup cell
+MODULE_HEADER = (
+    "from manim import *\n"
+    "from style_utils import *\n"
+    "import numpy as np\n"
+)
+
+# IPython cell/line magics and shell escapes, which aren't Python
+MAGIC_LINE_PATTERN = re.compile(r"^\s*[%!].*$", re.MULTILINE)
+DEFINITION_NODES = (ast.ClassDef, ast.FunctionDef)
+
+
+# ============================================================================
+# SCENE EXTRACTION
+# ============================================================================
+
+def read_notebook_source(path):
+    """
+    Collect the cells of a notebook that define classes or functions into
+    one module, with IPython magics stripped.
+
+    Setup and concat cells define neither and are skipped (the setup cell
+    changes directory to a machine-specific path); MODULE_HEADER provides
+    the imports the scene cells rely on.
+
+    Returns:
+        str: Module source with the definitions in notebook order
+    """
+    with open(path, encoding="utf-8") as f:
+        notebook = json.load(f)
+
+    cells = []
+    for cell in notebook.get("cells", []):
+        if cell.get("cell_type") != "code":
+            continue
+        source = MAGIC_LINE_PATTERN.sub("", "".join(cell.get("source", [])))
+        try:
+            tree = ast.parse(source)
+        except SyntaxError:
+            continue
+        if any(isinstance(node, DEFINITION_NODES) for node in tree.body):
+            cells.append(source)
+    return MODULE_HEADER + "\n\n".join(cells)
+
+
+def find_scene_classes(source):
+    """
+    Find BaseScene subclasses in source, in definition order.
+
+    Returns:
+        list: Class names, including subclasses of other scenes in the module
+    """
+    scene_bases = {SCENE_BASE_CLASS}
+    scenes = []
+    for node in ast.parse(source).body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        bases = {base.id for base in node.bases if isinstance(base, ast.Name)}
+        bases |= {base.attr for base in node.bases if isinstance(base, ast.Attribute)}
+        if bases & scene_bases:
+            scene_bases.add(node.name)
+            scenes.append(node.name)
+    return scenes
+
+
+def extract_scenes(source_path, work_dir):
+    """
+    Turn a notebook or module into a renderable module file.
+
+    Args:
+        source_path: .ipynb notebook or .py module
+        work_dir: Where to write the module extracted from a notebook
+
+    Returns:
+        tuple: (module path, module source, list of scene class names in source order)
+    """
+    if source_path.endswith(".ipynb"):
+        source = read_notebook_source(source_path)
+        stem = re.sub(r"\W+", "_", os.path.splitext(os.path.basename(source_path))[0]).strip("_")
+        module_path = os.path.join(work_dir, f"{stem}_scenes.py")
+        os.makedirs(work_dir, exist_ok=True)
+        with open(module_path, "w", encoding="utf-8") as f:
+            f.write(source)
+    else:
+        module_path = os.path.abspath(source_path)
+        with open(module_path, encoding="utf-8") as f:
+            source = f.read()
+
+    return module_path, source, find_scene_classes(source)
+
+
+# ============================================================================
+# SCENE FINGERPRINTS
+# ============================================================================
+
+def render_config(quality):
+    """Everything outside the scene sources that changes the rendered video"""
+    try:
+        from importlib.metadata import version
+        manim_version = version("manim")
+    except Exception:
+        manim_version = "unknown"
+
+    cfg_path = os.path.join(VISUALIZATIONS_DIR, MANIM_CONFIG_NAME)
+    try:
+        with open(cfg_path, encoding="utf-8") as f:
+            manim_cfg = f.read()
+    except OSError:
+        manim_cfg = None
+
+    return {"quality": quality, "manim": manim_version, "manim.cfg": manim_cfg}
+
+
+def scene_fingerprints(source, scenes, quality):
+    """
+    Hash what each scene's video depends on: its class source (and that of
+    any scene classes it inherits from), the module's other definitions,
+    the shared style modules and the render config.
+
+    Editing one scene's construct() only changes that scene's fingerprint;
+    editing a shared helper or style_utils changes all of them.
+
+    Returns:
+        dict: {scene name: hex digest}
+    """
+    own_source = {}
+    scene_parents = {}
+    shared = hashlib.sha256()
+    shared.update(json.dumps([FINGERPRINT_VERSION, render_config(quality)], sort_keys=True).encode("utf-8"))
+
+    for node in ast.parse(source).body:
+        segment = ast.get_source_segment(source, node) or ""
+        if isinstance(node, ast.ClassDef) and node.name in scenes:
+            own_source[node.name] = segment
+            scene_parents[node.name] = [base.id for base in node.bases
+                                        if isinstance(base, ast.Name) and base.id in scenes]
+        else:
+            shared.update(segment.encode("utf-8"))
+
+    for name in SHARED_SOURCES:
+        try:
+            with open(os.path.join(VISUALIZATIONS_DIR, name), "rb") as f:
+                shared.update(f.read())
+        except OSError:
+            shared.update(b"missing")
+
+    fingerprints = {}
+    for scene in scenes:
+        h = shared.copy()
+        pending = [scene]
+        while pending:
+            name = pending.pop()
+            h.update(own_source[name].encode("utf-8"))
+            pending.extend(scene_parents[name])
+        fingerprints[scene] = h.hexdigest()
+    return fingerprints
+
+
+def load_scene_manifest(output_dir, source_path):
+    """
+    Previous scenes.json results for this source, keyed by scene name.
+
+    Returns:
+        dict: {scene name: result}, empty if there is no usable manifest
+    """
+    try:
+        with open(os.path.join(output_dir, SCENE_MANIFEST_NAME), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get("source") != os.path.abspath(source_path):
+        return {}
+    return {r["scene"]: r for r in manifest.get("scenes", [])}
+
+
+def cached_result(previous, fingerprint, output_dir):
+    """
+    The previous result if its video is still on disk and was rendered from
+    the same fingerprint, otherwise None.
+    """
+    if not previous or previous.get("status") not in ("ok", "cached"):
+        return None
+    if previous.get("fingerprint") != fingerprint:
+        return None
+    path = os.path.join(output_dir, previous["file"])
+    if not os.path.exists(path) or os.path.getsize(path) != previous.get("bytes"):
+        return None
+    return dict(previous, status="cached", seconds=0.0, log=None)
+
+
+# ============================================================================
+# RENDERING
+# ============================================================================
+
+def render_scene(scene, module_path, sandbox, quality, output_dir, profile_dir=None):
+    """
+    Render one scene in its own media directory and collect the video.
+
+    Args:
+        scene: Scene class name
+        module_path: Module defining the scene
+        sandbox: Private media directory for this render
+        quality: Manim quality flag (l, m, h, p or k)
+        output_dir: Where the finished <scene>.mp4 is placed
+        profile_dir: Write a render trace for the scene here (default: off)
+
+    Returns:
+        dict: Result with scene, status ('ok' or 'failed'), file, seconds, log
+    """
+    start = time.time()
+    result = {"scene": scene, "status": "failed", "file": None}
+
+    if os.path.exists(sandbox):
+        shutil.rmtree(sandbox)
+    os.makedirs(sandbox)
+    log_path = os.path.join(sandbox, "render.log")
+
+    env = dict(os.environ)
+    env["PYTHONPATH"] = VISUALIZATIONS_DIR + os.pathsep + env.get("PYTHONPATH", "")
+    env.pop("STYLE_DRAFT", None)  # Drafts are for notebooks; never collect or cache one
+    if profile_dir:
+        env["STYLE_PROFILE"] = profile_dir
+    cmd = [sys.executable, "-m", "manim", "render", f"-q{quality}", "--media_dir", sandbox,
+           "--progress_bar", "none", module_path, scene]
+
+    with open(log_path, "w", encoding="utf-8") as log:
+        proc = subprocess.run(cmd, cwd=VISUALIZATIONS_DIR, env=env,
+                              stdout=log, stderr=subprocess.STDOUT)
+
+    videos = [os.path.join(dirpath, name)
+              for dirpath, _, names in os.walk(os.path.join(sandbox, "videos"))
+              if "partial_movie_files" not in dirpath
+              for name in names if name == f"{scene}.mp4"]
+
+    if proc.returncode == 0 and videos:
+        dest = os.path.join(output_dir, f"{scene}.mp4")
+        tmp_path = dest + ".tmp"
+        shutil.copyfile(videos[0], tmp_path)
+        os.replace(tmp_path, dest)
+        result.update(status="ok", file=os.path.basename(dest), bytes=os.path.getsize(dest))
+
+    result["log"] = log_path
+    result["seconds"] = time.time() - start
+    return result
+
+
+def write_scene_manifest(output_dir, source_path, quality, results):
+    """Write scenes.json: the rendered videos in the order the concat step uses"""
+    manifest = {
+        "source": os.path.abspath(source_path),
+        "quality": quality,
+        "scenes": results,
+    }
+    path = os.path.join(output_dir, SCENE_MANIFEST_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp_path, path)
+    return path
+
+
+def render_scenes(source_path, output_dir=DEFAULT_OUTPUT_DIR, jobs=None, quality="m",
+                  scenes=None, keep_sandboxes=False, force=False, profile=False):
+    """
+    Render every scene of a notebook or module in parallel.
+
+    Args:
+        source_path: .ipynb notebook or .py module with BaseScene subclasses
+        output_dir: Where <scene>.mp4 files and scenes.json are written
+        jobs: Number of concurrent renders (default: CPU count)
+        quality: Manim quality flag (l, m, h, p or k)
+        scenes: Only render these scene names (default: all)
+        keep_sandboxes: Keep per-scene media directories after success
+        force: Re-render even scenes whose fingerprint matches the last render
+        profile: Trace each render (see BaseScene) and print the slowest
+            animations across all scenes; implies force
+
+    Returns:
+        list: Result dicts in source order, covering every scene in the
+        source; scenes not selected keep their previous result
+    """
+    work_dir = os.path.join(output_dir, WORK_DIR_NAME)
+    module_path, source, found = extract_scenes(source_path, work_dir)
+    selected = found
+    if scenes:
+        missing = [s for s in scenes if s not in found]
+        if missing:
+            raise ValueError(f"Scenes not found in {source_path}: {', '.join(missing)}")
+        selected = [s for s in found if s in scenes]
+
+    fingerprints = scene_fingerprints(source, found, quality)
+    previous = load_scene_manifest(output_dir, source_path)
+
+    results = {}
+    for scene in found:
+        if scene not in selected:
+            results[scene] = previous.get(scene, {"scene": scene, "status": "missing", "file": None})
+            continue
+        reuse = not (force or profile)
+        cached = reuse and cached_result(previous.get(scene), fingerprints[scene], output_dir)
+        if cached:
+            results[scene] = cached
+    pending = [scene for scene in selected if scene not in results]
+
+    jobs = jobs or os.cpu_count() or 1
+    print(f"Rendering {len(pending)} scene(s) from {source_path} with {jobs} worker(s) "
+          f"({len(selected) - len(pending)} unchanged)...")
+    os.makedirs(output_dir, exist_ok=True)
+
+    profile_dir = os.path.join(work_dir, "profiles") if profile else None
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {
+            executor.submit(render_scene, scene, module_path, os.path.join(work_dir, scene),
+                            quality, output_dir, profile_dir): scene
+            for scene in pending
+        }
+        for future in as_completed(futures):
+            result = future.result()
+            result["fingerprint"] = fingerprints[result["scene"]]
+            results[result["scene"]] = result
+            print(f"  -> {result['status']:<6} {result['seconds']:6.1f}s  {result['scene']}")
+            if result["status"] == "failed":
+                print(f"     See {result['log']}")
+            elif not keep_sandboxes:
+                shutil.rmtree(os.path.join(work_dir, result["scene"]), ignore_errors=True)
+                result["log"] = None
+
+    ordered = [results[scene] for scene in found]
+    manifest_path = write_scene_manifest(output_dir, source_path, quality, ordered)
+
+    rendered = [results[scene] for scene in pending]
+    failed = [r for r in rendered if r["status"] == "failed"]
+    print("\n" + "=" * 30)
+    print(f"Render Complete.")
+    print(f"Scenes Rendered: {len(rendered) - len(failed)}")
+    print(f"Scenes Failed:   {len(failed)}")
+    print(f"Scenes Cached:   {len(selected) - len(pending)}")
+    print(f"Wall Time:       {time.time() - start:.1f}s")
+    print(f"Scene Order:     {manifest_path}")
+    print("=" * 30)
+
+    if profile and os.path.isdir(profile_dir):
+        from style_helpers import summarize_profiles
+        summarize_profiles(profile_dir)
+    return ordered
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Render a notebook's scenes in parallel.")
+    parser.add_argument("source", help="Notebook (.ipynb) or module (.py) defining the scenes")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR,
+                        help="Where rendered videos and scenes.json go")
+    parser.add_argument("--jobs", "-j", type=int, default=None,
+                        help="Concurrent renders (default: CPU count)")
+    parser.add_argument("--quality", "-q", choices=["l", "m", "h", "p", "k"], default="m",
+                        help="Manim render quality (default: m, as in the notebook)")
+    parser.add_argument("--scenes", nargs="+", help="Only render these scenes")
+    parser.add_argument("--keep-sandboxes", action="store_true",
+                        help="Keep each scene's media directory after a successful render")
+    parser.add_argument("--force", action="store_true",
+                        help="Re-render scenes even if their fingerprint is unchanged")
+    parser.add_argument("--profile", action="store_true",
+                        help="Trace each render and report the slowest animations")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = render_scenes(args.source, output_dir=args.output_dir, jobs=args.jobs,
+                            quality=args.quality, scenes=args.scenes,
+                            keep_sandboxes=args.keep_sandboxes, force=args.force,
+                            profile=args.profile)
+    sys.exit(1 if any(r["status"] == "failed" for r in results) else 0)
@@ -0,0 +1,113 @@
+"""
+Manim Styling Constants
+Palette, layout, sizing and timing standards without importing Manim
+
+Colors are the hex values of the Manim colors they were chosen from
+(COLOR_VECTOR_A is BLUE, ...) and can be passed anywhere Manim takes a
+color. POS_* points are numpy arrays created on first access, so importing
+this module costs no more than reading it (import them by name; star
+imports skip them).
+"""
+
+# ============================================================================
+# COLOR PALETTE
+# ============================================================================
+
+# Core Vector Colors
+COLOR_VECTOR_A = "#58C4DD"  # Primary vector (often the "base")
+COLOR_VECTOR_B = "#FC6255"  # Secondary vector
+COLOR_VECTOR_C = "#9A72AC"  # Tertiary vector (if needed)
+
+# Operational Colors
+COLOR_RESULT = "#83C167"  # Final answers, solutions
+COLOR_PROJECTION = "#FFFF00"  # Projected vectors, components
+COLOR_ORTHOGONAL = "#9A72AC"  # Perpendicular/orthogonal elements
+COLOR_ANGLE_ARC = "#FF862F"  # Angle arcs and angle labels
+COLOR_HIGHLIGHT = "#F0AC5F"  # Key insights, important notes
+
+# Structural Colors
+COLOR_GRID = "#888888"  # Coordinate axes, grid lines
+COLOR_BACKGROUND = "#000000"  # Standard Manim background
+COLOR_TEXT_PRIMARY = "#FFFFFF"  # Main text
+COLOR_TEXT_SECONDARY = "#888888"  # Supplementary text, captions
+
+# Extended Palette
+COLOR_QUATERNARY = "#5CD0B3"
+COLOR_QUINARY = "#D147BD"
+COLOR_ERROR = "#CF5044"  # For showing mistakes/corrections
+COLOR_SUCCESS = "#699C52"  # For correct steps
+
+# ============================================================================
+# SCREEN PARTITIONING & LAYOUT ZONES
+# ============================================================================
+
+# Positioning Constants (numpy points, built on first access; see __getattr__)
+_POSITIONS = {
+    "POS_TITLE": (0.0, 3.5, 0.0),  # UP * 3.5
+    "POS_SUBTITLE": (0.0, 2.8, 0.0),  # UP * 2.8
+    "POS_GRID_CENTER": (0.0, -0.5, 0.0),  # DOWN * 0.5: shift grid down to clear title
+}
+
+# Safe ranges
+GRID_Y_RANGE = [-3.5, 3.5]  # NEVER exceed 3.5 to avoid title collision
+GRID_X_RANGE = [-7, 7]
+TITLE_ZONE_Y = 3.0  # Everything but the title stays below this line
+
+# ============================================================================
+# SIZING STANDARDS
+# ============================================================================
+
+# Text Sizes
+TITLE_SIZE = 48  # Scaled for 1080p
+SUBTITLE_SIZE = 36  # Scene subtitles, section headers
+FORMULA_SIZE = 40  # Primary mathematical formulas
+FORMULA_SMALL = 28  # Secondary formulas, steps inside boxes
+LABEL_SIZE = 24  # Vector labels, axis labels
+ANNOTATION_SIZE = 20  # Small notes, dimensions
+
+# Vector Properties
+VECTOR_STROKE_WIDTH = 6  # Main vectors
+VECTOR_TIP_LENGTH = 0.25  # Arrow tip size
+VECTOR_TIP_WIDTH = 0.25  # Arrow tip width
+
+AUXILIARY_STROKE_WIDTH = 3  # Dashed lines, construction lines
+CONSTRUCTION_LINE_WIDTH = 2  # Very light helper lines
+
+# Geometric Elements
+ANGLE_RADIUS = 0.7  # Standard angle arc radius
+ANGLE_RADIUS_SMALL = 0.4  # Tight spaces
+
+# ============================================================================
+# TIMING STANDARDS
+# ============================================================================
+
+# Animation Durations
+WRITE_TIME = 1.0  # Writing text
+DRAW_TIME = 1.5  # Drawing complex shapes
+GROW_ARROW_TIME = 0.8  # Arrow growth
+TRANSFORM_TIME = 1.5  # Morphing between objects
+
+PAUSE_SHORT = 0.5  # Brief pause
+PAUSE_MEDIUM = 1.0  # Standard pause
+PAUSE_LONG = 2.0  # Emphasis pause
+PAUSE_SCENE_END = 3.0  # End of scene
+
+
+# ============================================================================
+# LAZY POSITIONS
+# ============================================================================
+
+# Star imports only pull in the eager constants; POS_* must be named explicitly
+__all__ = [name for name in globals() if name.isupper() and not name.startswith("_")]
+LAZY_NAMES = tuple(_POSITIONS)
+
+
+def __getattr__(name):
+    """Build POS_* points on first access so numpy is only imported when needed"""
+    if name in _POSITIONS:
+        import numpy as np
+
+        value = np.array(_POSITIONS[name])
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
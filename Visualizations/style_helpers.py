@@ -0,0 +1,1216 @@
+"""
+Manim Styling Helpers
+BaseScene, caches and drawing helpers built on the constants in style_constants
+
+Imported on demand by style_utils, so only code that actually uses these
+pays for importing Manim.
+"""
+
+import contextlib
+import functools
+import hashlib
+import json
+import os
+import re
+import subprocess
+import time
+from collections import OrderedDict
+
+from manim import *
+from manim.mobject.text import tex_mobject as _tex_mobject
+from manim.utils import tex_file_writing as _tex_file_writing
+from manim.utils.tex_file_writing import generate_tex_file
+from PIL import Image, ImageDraw
+
+from style_constants import *
+from style_constants import POS_GRID_CENTER
+
+
+# ============================================================================
+# TEX & TEXT CACHE
+# ============================================================================
+
+# Parsed mobjects kept in memory; least recently used entries are dropped first
+TEX_CACHE_SIZE = 256
+
+_tex_cache = OrderedDict()
+_tex_cache_stats = {"hits": 0, "misses": 0}
+
+# LaTeX processes actually started: one per precompile_tex batch, plus one
+# per formula compiled inside count_latex_runs()
+_latex_stats = {"runs": 0, "seconds": 0.0}
+
+
+@contextlib.contextmanager
+def count_latex_runs():
+    """
+    Count the formulas Manim compiles inside the block in _latex_stats.
+
+    Manim only calls compile_tex when a formula's .svg isn't in its on-disk
+    cache, so this counts real LaTeX runs. The hook is removed afterwards.
+    """
+    compile_tex = _tex_file_writing.compile_tex
+
+    @functools.wraps(compile_tex)
+    def counted(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return compile_tex(*args, **kwargs)
+        finally:
+            _latex_stats["runs"] += 1
+            _latex_stats["seconds"] += time.perf_counter() - start
+
+    _tex_file_writing.compile_tex = counted
+    try:
+        yield
+    finally:
+        _tex_file_writing.compile_tex = compile_tex
+
+
+def _color_key(color):
+    """Normalize a color (name, hex string or ManimColor) for use in a cache key"""
+    return None if color is None else ManimColor(color).to_hex()
+
+
+def _cached_mobject(key, build):
+    """
+    Return a copy of the mobject cached under key, building it on a miss.
+
+    Args:
+        key: Hashable description of the mobject
+        build: Zero-argument callable that creates the mobject
+
+    Returns:
+        Mobject: A fresh copy that callers may move, recolor or animate
+    """
+    try:
+        mobject = _tex_cache.get(key)
+    except TypeError:
+        # Unhashable keyword arguments: build without caching
+        return build()
+
+    if mobject is None:
+        _tex_cache_stats["misses"] += 1
+        mobject = build()
+        _tex_cache[key] = mobject
+        if len(_tex_cache) > TEX_CACHE_SIZE:
+            _tex_cache.popitem(last=False)
+    else:
+        _tex_cache_stats["hits"] += 1
+        _tex_cache.move_to_end(key)
+    return mobject.copy()
+
+
+def cached_math_tex(*tex_strings, font_size=FORMULA_SIZE, color=None, tex_template=None, **kwargs):
+    """
+    MathTex that only goes through LaTeX and SVG parsing once per process.
+
+    Repeated formulas (vector labels, the same equation across scenes) cost
+    one deep copy instead of a LaTeX -> DVI -> SVG round-trip and parse.
+
+    Args:
+        *tex_strings: Strings passed to MathTex
+        font_size: Font size
+        color: Text color (None keeps the MathTex default)
+        tex_template: TexTemplate to compile with (None uses the config default)
+        **kwargs: Any other MathTex arguments
+
+    Returns:
+        MathTex: A copy of the cached formula
+    """
+    template = tex_template if tex_template is not None else config.tex_template
+    key = ("MathTex", tex_strings, font_size, _color_key(color), template.body,
+           tuple(sorted(kwargs.items())))
+
+    def build():
+        if color is not None:
+            kwargs["color"] = color
+        return MathTex(*tex_strings, font_size=font_size, tex_template=template, **kwargs)
+
+    return _cached_mobject(key, build)
+
+
+def cached_text(text, font_size=LABEL_SIZE, color=None, **kwargs):
+    """
+    Text that is only laid out and parsed once per process.
+
+    Args:
+        text: The string to render
+        font_size: Font size
+        color: Text color (None keeps the Text default)
+        **kwargs: Any other Text arguments (font, weight, ...)
+
+    Returns:
+        Text: A copy of the cached text
+    """
+    key = ("Text", text, font_size, _color_key(color), tuple(sorted(kwargs.items())))
+
+    def build():
+        if color is not None:
+            kwargs["color"] = color
+        return Text(text, font_size=font_size, **kwargs)
+
+    return _cached_mobject(key, build)
+
+
+def clear_tex_cache():
+    """Drop every cached mobject and reset the hit/miss counters"""
+    _tex_cache.clear()
+    _tex_cache_stats.update(hits=0, misses=0)
+
+
+def tex_cache_info():
+    """
+    Returns:
+        dict: hits, misses, current size and maximum size of the cache,
+        plus latex_runs and latex_seconds counted so far (see count_latex_runs)
+    """
+    return dict(_tex_cache_stats, size=len(_tex_cache), max_size=TEX_CACHE_SIZE,
+                latex_runs=_latex_stats["runs"], latex_seconds=_latex_stats["seconds"])
+
+
+# ============================================================================
+# BATCHED LATEX PRECOMPILE
+# ============================================================================
+
+# Environment that gets its own cropped page in the batched document
+BATCH_PAGE_ENV = "manimbatchpage"
+
+# dvisvgm pads %p to the widest page number unless told a width; fix it
+BATCH_PAGE_DIGITS = 4
+
+STANDALONE_CLASS_PATTERN = re.compile(r"\\documentclass(?:\[([^\]]*)\])?\{standalone\}")
+
+
+class _CapturedTex(Exception):
+    """Raised in place of compiling, carrying what Manim would have compiled"""
+
+
+def _capture_tex(expression, environment=None, tex_template=None):
+    raise _CapturedTex(expression, environment, tex_template)
+
+
+def _capture_tex_source(tex_class, strings, kwargs):
+    """
+    Work out the .tex file Manim would write for tex_class(*strings, **kwargs)
+    without running LaTeX, by stopping construction at the compile step.
+
+    Returns:
+        tuple or None: (Path to the hashed .tex file, TexTemplate), or None
+        if construction never reached the compile step
+    """
+    original = _tex_mobject.tex_to_svg_file
+    _tex_mobject.tex_to_svg_file = _capture_tex
+    try:
+        tex_class(*strings, **kwargs)
+    except _CapturedTex as captured:
+        expression, environment, template = captured.args
+    else:
+        return None
+    finally:
+        _tex_mobject.tex_to_svg_file = original
+
+    template = template if template is not None else config.tex_template
+    return generate_tex_file(expression, environment, template), template
+
+
+def _batch_document(tex_files):
+    """
+    Combine single-formula standalone documents that share a preamble into
+    one document with one cropped page per formula.
+
+    Returns:
+        str or None: The batched source, or None if the class can't be batched
+    """
+    sources = [path.read_text(encoding="utf-8") for path in tex_files]
+    preamble = sources[0].split("\\begin{document}", 1)[0]
+
+    match = STANDALONE_CLASS_PATTERN.search(preamble)
+    if match is None or "multi" in (match.group(1) or ""):
+        return None
+    options = ",".join(filter(None, [match.group(1), f"multi={BATCH_PAGE_ENV}"]))
+    preamble = (preamble[:match.start()] + f"\\documentclass[{options}]{{standalone}}"
+                + preamble[match.end():] + f"\\newenvironment{{{BATCH_PAGE_ENV}}}{{}}{{}}\n")
+
+    pages = []
+    for source in sources:
+        body = source.split("\\begin{document}", 1)[1].rsplit("\\end{document}", 1)[0]
+        pages.append(f"\\begin{{{BATCH_PAGE_ENV}}}{body}\\end{{{BATCH_PAGE_ENV}}}\n")
+    return preamble + "\\begin{document}\n" + "".join(pages) + "\\end{document}\n"
+
+
+def _compile_batch(tex_files, template):
+    """
+    Compile tex_files in one LaTeX run and split the result into the
+    <hash>.svg files next to each .tex, where Manim's Tex cache looks.
+
+    Returns:
+        bool: True if every SVG was produced
+    """
+    source = _batch_document(tex_files)
+    if source is None:
+        return False
+
+    tex_dir = tex_files[0].parent
+    batch_name = "batch-" + hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]
+    batch_tex = tex_dir / (batch_name + ".tex")
+    batch_tex.write_text(source, encoding="utf-8")
+    output = tex_dir / (batch_name + template.output_format)
+
+    latex_cmd = [template.tex_compiler, "-interaction=batchmode", "-halt-on-error",
+                 f"-output-directory={tex_dir}"]
+    if template.output_format == ".xdv":
+        latex_cmd.append("-no-pdf")
+    svg_cmd = ["dvisvgm", str(output), "--page=1-", "-n", "-v", "0",
+               "-o", str(tex_dir / f"{batch_name}-%{BATCH_PAGE_DIGITS}p.svg")]
+    if template.output_format == ".pdf":
+        svg_cmd.append("--pdf")
+
+    start = time.perf_counter()
+    try:
+        subprocess.run(latex_cmd + [str(batch_tex)], cwd=tex_dir, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        subprocess.run(svg_cmd, cwd=tex_dir, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except (OSError, subprocess.CalledProcessError) as e:
+        logger.warning(f"Batched LaTeX compile failed, formulas will compile one by one: {e}")
+        return False
+    finally:
+        _latex_stats["runs"] += 1
+        _latex_stats["seconds"] += time.perf_counter() - start
+
+    pages = [tex_dir / f"{batch_name}-{i:0{BATCH_PAGE_DIGITS}d}.svg" for i in range(1, len(tex_files) + 1)]
+    complete = all(page.exists() for page in pages)
+    if complete:
+        for tex_file, page in zip(tex_files, pages):
+            page.replace(tex_file.with_suffix(".svg"))
+
+    if not config.no_latex_cleanup:
+        for leftover in tex_dir.glob(batch_name + "*"):
+            leftover.unlink()
+    return complete
+
+
+def precompile_tex(formulas, tex_class=None, **kwargs):
+    """
+    Compile many formulas in a single LaTeX run before a scene needs them.
+
+    Each formula is written to the hashed .tex file Manim would use, and
+    the batch output is split into the matching .svg files, so later
+    MathTex/Tex calls find them in Manim's Tex cache instead of starting
+    LaTeX once per formula. Formulas already in the cache are skipped, and
+    templates that aren't standalone documents are left to compile normally.
+
+    Args:
+        formulas: Strings, or sequences of strings for multi-part formulas
+        tex_class: MathTex (default) or Tex
+        **kwargs: Arguments that affect compilation (tex_environment, tex_template, ...)
+
+    Returns:
+        int: Number of formulas compiled by the batch
+    """
+    tex_class = tex_class or MathTex
+
+    batches = {}
+    for formula in formulas:
+        strings = (formula,) if isinstance(formula, str) else tuple(formula)
+        captured = _capture_tex_source(tex_class, strings, kwargs)
+        if captured is None:
+            continue  # Nothing to compile for this one; leave it to MathTex
+        tex_file, template = captured
+        if tex_file.with_suffix(".svg").exists():
+            continue
+        batch = batches.setdefault((template.tex_compiler, template.output_format, template.body),
+                                   (template, {}))
+        batch[1][tex_file] = None  # dict keeps order and drops duplicates
+
+    compiled = 0
+    for template, tex_files in batches.values():
+        if _compile_batch(list(tex_files), template):
+            compiled += len(tex_files)
+    return compiled
+
+
+# ============================================================================
+# GRID CACHE
+# ============================================================================
+
+# Built grids keyed by range, length and style; callers always get copies
+_grid_cache = {}
+_baked_grid_cache = {}
+
+
+def _build_standard_grid(x_range, y_range, x_length, y_length, include_numbers=True):
+    """Build the NumberPlane behind BaseScene.get_standard_grid"""
+    axes = NumberPlane(
+        x_range=x_range,
+        y_range=y_range,
+        x_length=x_length,
+        y_length=y_length,
+        background_line_style={
+            "stroke_color": COLOR_GRID,
+            "stroke_opacity": 0.3,
+            "stroke_width": 1
+        },
+        axis_config={
+            "stroke_color": COLOR_GRID,
+            "stroke_width": 2,
+            "include_numbers": include_numbers,
+            "font_size": ANNOTATION_SIZE,
+        }
+    )
+
+    # Shift grid down to content zone
+    axes.shift(POS_GRID_CENTER)
+
+    # Ensure grid doesn't exceed safe Y range
+    if axes.get_top()[1] > TITLE_ZONE_Y:
+        axes.shift(DOWN * (axes.get_top()[1] - TITLE_ZONE_Y + 0.2))
+
+    return axes
+
+
+def bake_to_image(mobject):
+    """
+    Render a static mobject once into a transparent full-frame image.
+
+    Args:
+        mobject: The mobject to render, positioned in frame coordinates
+
+    Returns:
+        ImageMobject: Covers the whole frame, so it lines up with the original
+    """
+    camera = Camera(background_opacity=0)
+    camera.capture_mobject(mobject)
+    image = ImageMobject(camera.pixel_array)
+    image.height = config.frame_height
+    return image
+
+
+# ============================================================================
+# RENDER PROFILING
+# ============================================================================
+
+# Set to 1 (or to an output directory) to profile every BaseScene render
+PROFILE_ENV = "STYLE_PROFILE"
+PROFILE_DIR_NAME = "profiles"
+PROFILE_TOP_ROWS = 15
+
+
+def profile_dir():
+    """Where trace files go, or None if profiling is off"""
+    setting = os.environ.get(PROFILE_ENV, "")
+    if setting.lower() in ("", "0", "false", "no"):
+        return None
+    if setting.lower() in ("1", "true", "yes"):
+        return os.path.join(config.media_dir, PROFILE_DIR_NAME)
+    return setting
+
+
+class SceneProfiler:
+    """
+    Collects timed spans for one scene render and writes them as a Chrome
+    trace (open in chrome://tracing or ui.perfetto.dev).
+
+    Each span records wall time, frames written (a held frozen frame counts
+    once per video frame), time spent rasterizing and encoding frames,
+    hits/misses of the in-process TeX memo, LaTeX runs and their time, and
+    the mobject and point counts on screen when it ended.
+    """
+
+    def __init__(self, scene):
+        self.scene = scene
+        self.name = type(scene).__name__
+        self.origin = time.perf_counter()
+        self.events = []
+        self.rows = []
+        self.counters = {"raster_seconds": 0.0, "encode_seconds": 0.0, "frames": 0}
+
+    def instrument(self, renderer):
+        """Time the renderer's rasterization and frame encoding"""
+        self._wrap(getattr(renderer, "camera", None), "capture_mobjects", "raster_seconds")
+        self._wrap(getattr(renderer, "file_writer", None), "write_frame", "encode_seconds",
+                   count_frames=True)
+
+    def _wrap(self, owner, name, counter, count_frames=False):
+        original = getattr(owner, name, None)
+        if original is None:
+            return
+
+        @functools.wraps(original)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.counters[counter] += time.perf_counter() - start
+                if count_frames:
+                    # write_frame(frame, num_frames=N) holds one frame N times
+                    frames = kwargs.get("num_frames", args[1] if len(args) > 1 else 1)
+                    self.counters["frames"] += frames
+
+        setattr(owner, name, timed)
+
+    def scene_stats(self):
+        """Mobject and point counts of everything currently in the scene"""
+        family = [m for top in self.scene.mobjects for m in top.get_family()]
+        return {"mobjects": len(family), "points": sum(len(m.points) for m in family)}
+
+    @contextlib.contextmanager
+    def span(self, name, category):
+        """Record everything that happens inside the block as one trace event"""
+        counters = dict(self.counters)
+        tex = dict(_tex_cache_stats)
+        latex = dict(_latex_stats)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            row = {
+                "name": name,
+                "category": category,
+                "seconds": seconds,
+                "frames": self.counters["frames"] - counters["frames"],
+                "raster_seconds": self.counters["raster_seconds"] - counters["raster_seconds"],
+                "encode_seconds": self.counters["encode_seconds"] - counters["encode_seconds"],
+                "memo_hits": _tex_cache_stats["hits"] - tex["hits"],
+                "memo_misses": _tex_cache_stats["misses"] - tex["misses"],
+                "latex_runs": _latex_stats["runs"] - latex["runs"],
+                "latex_seconds": _latex_stats["seconds"] - latex["seconds"],
+                **self.scene_stats(),
+            }
+            self.rows.append(row)
+            self.events.append({
+                "name": name, "cat": category, "ph": "X", "pid": 1, "tid": 1,
+                "ts": (start - self.origin) * 1e6, "dur": seconds * 1e6,
+                "args": {k: v for k, v in row.items() if k not in ("name", "category")},
+            })
+            self.events.append({
+                "name": "scene", "ph": "C", "pid": 1, "tid": 1,
+                "ts": (start + seconds - self.origin) * 1e6,
+                "args": {"mobjects": row["mobjects"], "points": row["points"]},
+            })
+
+    def write(self, directory):
+        """Write <Scene>.trace.json and print the summary table"""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.name}.trace.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms",
+                       "otherData": {"scene": self.name, "spans": self.rows}}, f)
+        print_profile_table(self.rows, title=f"{self.name} ({path})")
+        return path
+
+
+def print_profile_table(rows, title, top=PROFILE_TOP_ROWS):
+    """Print the slowest spans with their frame, raster, encode, TeX memo and LaTeX numbers"""
+    print("\n" + "=" * 124)
+    print(f"Profile: {title}")
+    print(f"{'Span':<44}{'Wall':>8}{'Frames':>8}{'Raster':>9}{'Encode':>9}"
+          f"{'Memo hit':>9}{'miss':>6}{'LaTeX':>6}{'LaTeX t':>9}{'Mobjects':>8}{'Points':>8}")
+    print("=" * 124)
+    for row in sorted(rows, key=lambda r: r["seconds"], reverse=True)[:top]:
+        name = row.get("scene", "") and f"{row['scene']}: "
+        name = (name + row["name"])[:43]
+        print(f"{name:<44}{row['seconds']:7.2f}s{row['frames']:>8}{row['raster_seconds']:8.2f}s"
+              f"{row['encode_seconds']:8.2f}s{row['memo_hits']:>9}{row['memo_misses']:>6}"
+              f"{row['latex_runs']:>6}{row['latex_seconds']:8.2f}s{row['mobjects']:>8}{row['points']:>8}")
+    print("=" * 124)
+
+
+def summarize_profiles(directory, top=PROFILE_TOP_ROWS):
+    """
+    Print the most expensive animations across every scene traced into directory.
+
+    Returns:
+        list: All animation rows, each tagged with its scene name
+    """
+    rows = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".trace.json"):
+            continue
+        with open(os.path.join(directory, name), encoding="utf-8") as f:
+            data = json.load(f)["otherData"]
+        rows += [dict(row, scene=data["scene"]) for row in data["spans"]
+                 if row["category"] == "animation"]
+    if rows:
+        print_profile_table(rows, title=f"slowest animations across scenes ({directory})", top=top)
+    return rows
+
+
+def _is_pause(animations):
+    """Whether a play() is only Waits, as wait() sends"""
+    return bool(animations) and all(isinstance(a, Wait) for a in animations)
+
+
+def _span_name(method, args):
+    """Readable span name: the animation types for play(), the duration for wait()"""
+    if method.__name__ == "play" and _is_pause(args):
+        return f"wait({max(a.run_time for a in args):g})"
+    if method.__name__ == "play":
+        names = [type(a).__name__ for a in args]
+        return "play(" + ", ".join(names[:4]) + (", ..." if len(names) > 4 else "") + ")"
+    return method.__name__
+
+
+def profiled(category):
+    """Record calls of a BaseScene method as spans when the scene is profiled"""
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            profiler = getattr(self, "profiler", None)
+            if profiler is None:
+                return method(self, *args, **kwargs)
+            with profiler.span(_span_name(method, args), category):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# ============================================================================
+# STATIC FRAMES
+# ============================================================================
+
+# Shorter waits aren't worth probing for updaters
+STATIC_WAIT_MIN_SECONDS = 0.5
+
+# Frames of updates simulated on copies before a wait is declared static
+STATIC_PROBE_STEPS = 3
+
+STATE_ARRAYS = ("points", "fill_rgbas", "stroke_rgbas", "background_stroke_rgbas")
+
+
+def _state_digest(mobjects):
+    """Hash of the geometry and colors of every mobject in the families of mobjects"""
+    h = hashlib.sha1()
+    for mobject in mobjects:
+        for sub in mobject.get_family():
+            for name in STATE_ARRAYS:
+                value = getattr(sub, name, None)
+                if value is not None:
+                    h.update(np.ascontiguousarray(value).tobytes())
+    return h.hexdigest()
+
+
+def static_updater(updater):
+    """
+    Mark an updater function as never changing the picture during a wait,
+    e.g. one that keeps a label next to a mobject that only moves in play().
+
+    A wait() whose updaters are all marked can be held as a single frame.
+    Unmarked updaters always render every frame: one that reads the scene
+    time or a ValueTracker may change the picture later in the wait even
+    if it doesn't right away.
+    """
+    updater.is_static_updater = True
+    return updater
+
+
+def updaters_are_static(mobjects, dt):
+    """
+    Whether the mobjects' updaters are all marked with static_updater and
+    running them leaves the picture unchanged.
+
+    The marked updaters are checked by running them on copies for a few
+    frames, so the real mobjects and any time-based updater state are
+    untouched; that catches a mark on an updater that does move things.
+    """
+    updaters = [u for mobject in mobjects for sub in mobject.get_family() for u in sub.get_updaters()]
+    if not all(getattr(u, "is_static_updater", False) for u in updaters):
+        return False
+    probe = [mobject.copy() for mobject in mobjects]
+    before = _state_digest(probe)
+    for _ in range(STATIC_PROBE_STEPS):
+        for mobject in probe:
+            mobject.update(dt)
+    return _state_digest(probe) == before
+
+
+# ============================================================================
+# DRAFT PREVIEW
+# ============================================================================
+
+# Set to 1 for a contact sheet only, or to "video" for a low-res video as well
+DRAFT_ENV = "STYLE_DRAFT"
+DRAFT_DIR_NAME = "drafts"
+DRAFT_PIXEL_HEIGHT = 270
+DRAFT_FRAME_RATE = 6
+DRAFT_SHEET_COLUMNS = 4
+DRAFT_LABEL_HEIGHT = 16
+
+DRAFT_CONFIG_KEYS = ("pixel_width", "pixel_height", "frame_rate", "write_to_movie", "save_last_frame")
+
+
+def draft_mode(setting=None):
+    """
+    Resolve a draft setting: None follows STYLE_DRAFT, False is off, "video"
+    also writes a video, anything else true is a contact sheet only.
+
+    Returns:
+        str or None: "video", "sheet" or None
+    """
+    if setting is None:
+        setting = os.environ.get(DRAFT_ENV, "")
+        if setting.lower() in ("", "0", "false", "no"):
+            return None
+    if not setting:
+        return None
+    return "video" if str(setting).lower() == "video" else "sheet"
+
+
+def apply_draft_config(mode):
+    """
+    Switch the global config to draft quality: DRAFT_PIXEL_HEIGHT lines at
+    no more than DRAFT_FRAME_RATE fps. Without a video, animations are
+    skipped outright and only the keyframes are rasterized.
+
+    Returns:
+        dict: The previous values, for restore_config
+    """
+    saved = {key: config[key] for key in DRAFT_CONFIG_KEYS}
+    width = round(config.pixel_width * DRAFT_PIXEL_HEIGHT / config.pixel_height / 2) * 2
+    config.pixel_width = width
+    config.pixel_height = DRAFT_PIXEL_HEIGHT
+    config.frame_rate = min(config.frame_rate, DRAFT_FRAME_RATE)
+    if mode != "video":
+        config.write_to_movie = False
+        config.save_last_frame = True
+    return saved
+
+
+def restore_config(saved):
+    """Put back the config values apply_draft_config replaced"""
+    for key, value in saved.items():
+        config[key] = value
+
+
+class ContactSheet:
+    """The final frame of every play() in a draft render, tiled into one PNG"""
+
+    def __init__(self, scene):
+        self.scene = scene
+        self.name = type(scene).__name__
+        self.frames = []
+
+    def capture(self, label):
+        """Rasterize the scene as it is now and keep it as a keyframe"""
+        renderer = self.scene.renderer
+        # The static image is from before the animation; draw everything afresh
+        renderer.static_image = None
+        renderer.update_frame(self.scene)
+        self.frames.append((label, Image.fromarray(renderer.get_frame()).convert("RGB")))
+
+    def write(self, directory):
+        """Write <Scene>.contact.png, or nothing if the scene never played"""
+        if not self.frames:
+            return None
+        width, height = self.frames[0][1].size
+        columns = min(DRAFT_SHEET_COLUMNS, len(self.frames))
+        rows = -(-len(self.frames) // columns)
+        tile_height = height + DRAFT_LABEL_HEIGHT
+
+        sheet = Image.new("RGB", (columns * width, rows * tile_height), COLOR_BACKGROUND)
+        draw = ImageDraw.Draw(sheet)
+        for i, (label, frame) in enumerate(self.frames):
+            x, y = (i % columns) * width, (i // columns) * tile_height
+            sheet.paste(frame, (x, y + DRAFT_LABEL_HEIGHT))
+            draw.text((x + 4, y + 2), f"{i + 1}. {label}", fill=COLOR_TEXT_SECONDARY)
+
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.name}.contact.png")
+        sheet.save(path)
+        print(f"Draft contact sheet: {path} ({len(self.frames)} keyframes)")
+        return path
+
+
+# ============================================================================
+# BASE SCENE CLASS
+# ============================================================================
+
+class BaseScene(Scene):
+    """
+    Base class for all mathematical visualization scenes.
+    Handles title and grid setup automatically.
+
+    Set STYLE_PROFILE=1 to profile renders: play/wait and the helpers below
+    are recorded as spans and written to media/profiles/<Scene>.trace.json.
+
+    Set STYLE_DRAFT=1 (or draft = True on a scene) for a quick layout
+    preview: a low-resolution contact sheet of the last frame of every
+    play(), written to media/drafts/<Scene>.contact.png. Waits shrink to a
+    single frame and grids skip their number labels. STYLE_DRAFT=video also
+    writes a low-resolution, low frame rate video.
+    """
+
+    # Hold pauses without (unmarked) updaters as a single rasterized frame
+    hold_static_frames = True
+
+    # None follows STYLE_DRAFT; True/"sheet", "video" or False override it
+    draft = None
+
+    def __init__(self, title="Mathematical Visualization", **kwargs):
+        self.draft = draft_mode(type(self).draft)
+        self.saved_config = apply_draft_config(self.draft) if self.draft else None
+        super().__init__(**kwargs)
+        self.scene_title = title
+        self.profiler = SceneProfiler(self) if profile_dir() else None
+        self.contact_sheet = ContactSheet(self) if self.draft else None
+
+    def setup(self):
+        """Setup the scene with title"""
+        super().setup()
+
+    def construct(self):
+        """Override this method in child classes"""
+        pass
+
+    def render(self, preview=False):
+        """
+        Render the scene, writing a trace file afterwards when profiling and
+        the contact sheet when drafting.
+        """
+        try:
+            if self.profiler is None:
+                result = super().render(preview)
+            else:
+                self.profiler.instrument(self.renderer)
+                with self.profiler.span(type(self).__name__, "scene"), count_latex_runs():
+                    result = super().render(preview)
+                self.profiler.write(profile_dir())
+        finally:
+            if self.saved_config is not None:
+                restore_config(self.saved_config)
+
+        if self.contact_sheet is not None:
+            path = self.contact_sheet.write(os.path.join(config.media_dir, DRAFT_DIR_NAME))
+            if path and self.draft == "sheet":
+                config.output_file = path  # What the %%manim magic displays
+        return result
+
+    @profiled("animation")
+    def play(self, *args, **kwargs):
+        result = super().play(*args, **kwargs)
+        # wait() ends up here too; a pause adds nothing to the contact sheet
+        if self.contact_sheet is not None and not _is_pause(args):
+            self.contact_sheet.capture(_span_name(self.play, args))
+        return result
+
+    def wait(self, duration=DEFAULT_WAIT_TIME, stop_condition=None, frozen_frame=None):
+        """
+        Pause the scene, holding a single rendered frame when nothing moves.
+
+        Manim only freezes the frame for waits without updaters; this also
+        freezes waits whose updaters are all marked with static_updater.
+        A frozen frame is rasterized once instead of once per video frame;
+        the encoder still receives every frame. In draft mode every wait
+        without a stop condition is a single frozen frame.
+
+        Only wait() is checked: play(Wait(...)) and animations that happen
+        not to move anything render every frame as usual.
+        """
+        if self.draft and stop_condition is None:
+            return super().wait(1 / config.frame_rate, frozen_frame=True)
+        if frozen_frame is None and stop_condition is None and self.is_static_interval(duration):
+            frozen_frame = True
+        return super().wait(duration, stop_condition=stop_condition, frozen_frame=frozen_frame)
+
+    def is_static_interval(self, duration):
+        """
+        Whether the next duration seconds would render identical frames.
+
+        Returns:
+            bool: True if the interval can be held as a single frame
+        """
+        if not self.hold_static_frames or duration < STATIC_WAIT_MIN_SECONDS or self.updaters:
+            return False
+        has_updaters = any(sub.get_updaters() for m in self.mobjects for sub in m.get_family())
+        return not has_updaters or updaters_are_static(self.mobjects, 1 / config.frame_rate)
+
+    @profiled("helper")
+    def prefetch_tex(self, *formulas, **kwargs):
+        """
+        Compile every formula the scene will use in one LaTeX run.
+
+        Call at the top of construct() with the scene's formula strings;
+        the MathTex objects created afterwards are then cache hits.
+
+        Args:
+            *formulas: Strings, or sequences of strings for multi-part formulas
+            **kwargs: Passed to precompile_tex (tex_class, tex_template, ...)
+
+        Returns:
+            int: Number of formulas compiled by the batch
+        """
+        return precompile_tex(formulas, **kwargs)
+
+    @profiled("helper")
+    def add_title(self, title_text=None):
+        """Add title to the scene in the safe title zone"""
+        if title_text is None:
+            title_text = self.scene_title
+
+        title = cached_text(title_text, font_size=TITLE_SIZE, color=COLOR_TEXT_PRIMARY)
+        title.to_edge(UP, buff=0.3)
+
+        # Ensure title stays in safe zone (Y > TITLE_ZONE_Y)
+        if title.get_y() < TITLE_ZONE_Y:
+            title.shift(UP * (TITLE_ZONE_Y - title.get_y() + 0.2))
+
+        self.play(Write(title), run_time=WRITE_TIME)
+        self.wait(PAUSE_SHORT)
+        return title
+
+    @profiled("helper")
+    def get_standard_grid(self, x_range=None, y_range=None, baked=False):
+        """
+        Create a standard grid that respects safe zones.
+
+        Each distinct grid is built once per process and copied on later
+        calls, so the number labels and background lines aren't rebuilt
+        for every scene.
+
+        Args:
+            x_range: [min, max, step] (default: GRID_X_RANGE with step 1)
+            y_range: [min, max, step] (default: GRID_Y_RANGE with step 1)
+            baked: Return the grid pre-rendered as a full-frame ImageMobject,
+                which costs one image blit per frame instead of vector
+                rendering. Only for grids that never animate; the underlying
+                NumberPlane is available as .plane for coordinate conversion.
+
+        Returns:
+            NumberPlane: A properly configured grid (ImageMobject if baked)
+        """
+        if x_range is None:
+            x_range = GRID_X_RANGE + [1]  # Add step size
+        if y_range is None:
+            y_range = GRID_Y_RANGE + [1]  # Add step size
+
+        # Calculate dimensions to fit within safe zones
+        x_length = min(12, config.frame_width - 2)
+        y_length = min(6, abs(y_range[1] - y_range[0]) * 1.0)
+
+        # Drafts skip the number labels, which are most of a grid's build time
+        include_numbers = not self.draft
+        key = (tuple(x_range), tuple(y_range), x_length, y_length,
+               _color_key(COLOR_GRID), ANNOTATION_SIZE, include_numbers)
+        if key not in _grid_cache:
+            _grid_cache[key] = _build_standard_grid(x_range, y_range, x_length, y_length,
+                                                    include_numbers)
+        axes = _grid_cache[key].copy()
+
+        if not baked:
+            return axes
+
+        bake_key = key + (config.pixel_width, config.pixel_height, config.frame_width)
+        if bake_key not in _baked_grid_cache:
+            _baked_grid_cache[bake_key] = bake_to_image(axes)
+        image = _baked_grid_cache[bake_key].copy()
+        image.plane = axes
+        return image
+
+    @profiled("helper")
+    def create_formula_box(self, *formulas, color=COLOR_HIGHLIGHT, position=DOWN * 2.5):
+        """
+        Create a dynamically-sized box for formulas.
+
+        Args:
+            *formulas: MathTex objects or strings
+            color: Border color
+            position: Where to place the box
+
+        Returns:
+            VGroup: Container with box and content
+        """
+        # Convert strings to MathTex if needed
+        formula_objects = []
+        for f in formulas:
+            if isinstance(f, str):
+                formula_objects.append(cached_math_tex(f, font_size=FORMULA_SIZE))
+            else:
+                formula_objects.append(f)
+
+        # Arrange formulas
+        content = VGroup(*formula_objects).arrange(DOWN, buff=0.3)
+
+        # Create dynamic box
+        box = SurroundingRectangle(
+            content,
+            color=color,
+            buff=MED_LARGE_BUFF,
+            fill_color=BLACK,
+            fill_opacity=0.9,
+            corner_radius=0.1
+        )
+
+        # Group and position
+        container = VGroup(box, content)
+        container.move_to(position)
+
+        return container
+
+    @profiled("helper")
+    def add_vector_with_label(self, start, end, color, label_text, label_position=None):
+        """
+        Create a vector arrow with a label.
+
+        Args:
+            start: Starting point
+            end: Ending point
+            color: Vector color
+            label_text: Label text
+            label_position: Where to place label (default: above vector)
+
+        Returns:
+            VGroup: Vector and label together
+        """
+        vector = Arrow(
+            start=start,
+            end=end,
+            buff=0,
+            color=color,
+            stroke_width=VECTOR_STROKE_WIDTH,
+            tip_length=VECTOR_TIP_LENGTH,
+            max_tip_length_to_length_ratio=0.15
+        )
+
+        label = cached_math_tex(label_text, font_size=LABEL_SIZE, color=color)
+        label.add_background_rectangle(buff=0.1, opacity=0.8)
+
+        if label_position is None:
+            # Default: place at midpoint, offset perpendicular to vector
+            mid = (np.array(start) + np.array(end)) / 2
+            direction = np.array(end) - np.array(start)
+            perp = np.array([-direction[1], direction[0], 0])
+            perp = perp / np.linalg.norm(perp) if np.linalg.norm(perp) > 0 else UP
+            label.move_to(mid + perp * 0.5)
+        else:
+            label.move_to(label_position)
+
+        return VGroup(vector, label)
+
+    @profiled("helper")
+    def add_vectors_with_labels(self, starts, ends, color, label_texts=None, label_positions=None):
+        """
+        Batch version of add_vector_with_label for many vectors of one color.
+
+        Positions, perpendicular offsets and tips for all vectors are computed
+        in one NumPy pass, and the vectors are drawn as a single shaft mobject
+        and a single tip mobject (see create_vector_batch).
+
+        Args:
+            starts: N x 2 or N x 3 start points
+            ends: N x 2 or N x 3 end points
+            color: Shared vector and label color
+            label_texts: N TeX labels, or None for unlabelled vectors
+            label_positions: N label centers (default: beside each midpoint)
+
+        Returns:
+            VGroup: (vectors, labels), where vectors is (shafts, tips)
+        """
+        vectors = create_vector_batch(starts, ends, color=color)
+        if label_texts is None:
+            return VGroup(vectors, VGroup())
+
+        if label_positions is None:
+            label_positions = vector_batch_geometry(starts, ends)["label_positions"]
+        labels = create_label_batch(label_texts, label_positions, color=color)
+        return VGroup(vectors, labels)
+
+
+# ============================================================================
+# UTILITY FUNCTIONS
+# ============================================================================
+
+def add_background_to_text(text_obj, buff=0.1, opacity=0.8):
+    """Add a background rectangle to text for readability"""
+    return text_obj.add_background_rectangle(buff=buff, opacity=opacity)
+
+
+def create_angle_arc(vertex, start_point, end_point, radius=ANGLE_RADIUS, color=COLOR_ANGLE_ARC):
+    """
+    Create an angle arc between two lines meeting at a vertex.
+
+    Args:
+        vertex: The point where lines meet
+        start_point: Point on first line
+        end_point: Point on second line
+        radius: Arc radius
+        color: Arc color
+
+    Returns:
+        Angle: The angle arc object
+    """
+    angle = Angle(
+        Line(vertex, start_point),
+        Line(vertex, end_point),
+        radius=radius,
+        color=color,
+        stroke_width=AUXILIARY_STROKE_WIDTH
+    )
+    return angle
+
+# ============================================================================
+# BATCH HELPERS
+# ============================================================================
+
+# Cubic segments per angle arc (matches Manim's Arc default resolution)
+ARC_SEGMENTS = 8
+
+# Same tip scaling as add_vector_with_label's Arrow
+MAX_TIP_LENGTH_RATIO = 0.15
+
+
+def _as_points(points):
+    """N x 2 or N x 3 array-like -> float N x 3 array"""
+    points = np.atleast_2d(np.asarray(points, dtype=float))
+    if points.shape[1] == 2:
+        points = np.hstack([points, np.zeros((len(points), 1))])
+    return points
+
+
+def _line_bezier_points(starts, ends):
+    """Cubic Bezier control points for straight segments, shape (N, 4, 3)"""
+    t = np.array([0, 1 / 3, 2 / 3, 1])[None, :, None]
+    return starts[:, None, :] + t * (ends - starts)[:, None, :]
+
+
+def vector_batch_geometry(starts, ends, label_offset=0.5,
+                          tip_length=VECTOR_TIP_LENGTH, tip_width=VECTOR_TIP_WIDTH):
+    """
+    Compute everything needed to draw N labelled vectors in one NumPy pass.
+
+    Args:
+        starts: N x 2 or N x 3 start points
+        ends: N x 2 or N x 3 end points
+        label_offset: Distance of each label from its vector's midpoint
+        tip_length: Tip length, shrunk for short vectors like Arrow does
+        tip_width: Tip width at its base
+
+    Returns:
+        dict: Arrays keyed by shaft_ends (N x 3), tips (N x 3 x 3 triangle
+        corners), midpoints, normals (unit perpendiculars, UP for zero-length
+        vectors), lengths and label_positions
+    """
+    starts, ends = _as_points(starts), _as_points(ends)
+    direction = ends - starts
+    lengths = np.linalg.norm(direction, axis=1)
+    safe = np.where(lengths > 0, lengths, 1.0)[:, None]
+    unit = direction / safe
+
+    normals = np.stack([-unit[:, 1], unit[:, 0], np.zeros(len(unit))], axis=1)
+    normals[lengths == 0] = UP
+
+    scale = np.minimum(1.0, MAX_TIP_LENGTH_RATIO * lengths / tip_length)[:, None]
+    tip_base = ends - unit * tip_length * scale
+    half_width = normals * (tip_width / 2) * scale
+    tips = np.stack([ends, tip_base + half_width, tip_base - half_width], axis=1)
+
+    midpoints = (starts + ends) / 2
+    return {
+        "shaft_ends": tip_base,
+        "tips": tips,
+        "midpoints": midpoints,
+        "normals": normals,
+        "lengths": lengths,
+        "label_positions": midpoints + normals * label_offset,
+    }
+
+
+def create_vector_batch(starts, ends, color=COLOR_VECTOR_A, stroke_width=VECTOR_STROKE_WIDTH,
+                        tip_length=VECTOR_TIP_LENGTH, tip_width=VECTOR_TIP_WIDTH):
+    """
+    Draw N vectors as two mobjects (all shafts, all tips) instead of N Arrows.
+
+    Building and animating the batch costs about the same for 5 vectors as
+    for 500, since every shaft is a subpath of one VMobject.
+
+    Args:
+        starts: N x 2 or N x 3 start points
+        ends: N x 2 or N x 3 end points
+        color: Shared color
+        stroke_width: Shaft width
+        tip_length: Tip length, shrunk for short vectors like Arrow does
+        tip_width: Tip width at its base
+
+    Returns:
+        VGroup: (shafts, tips)
+    """
+    starts = _as_points(starts)
+    geometry = vector_batch_geometry(starts, ends, tip_length=tip_length, tip_width=tip_width)
+
+    shafts = VMobject(color=color, stroke_width=stroke_width)
+    shafts.set_points(_line_bezier_points(starts, geometry["shaft_ends"]).reshape(-1, 3))
+
+    corners = geometry["tips"]
+    edges = _line_bezier_points(corners.reshape(-1, 3), np.roll(corners, -1, axis=1).reshape(-1, 3))
+    tips = VMobject(stroke_width=0, fill_color=color, fill_opacity=1)
+    tips.set_points(edges.reshape(-1, 3))
+
+    return VGroup(shafts, tips)
+
+
+def create_label_batch(label_texts, positions, color=COLOR_TEXT_PRIMARY, font_size=LABEL_SIZE,
+                       background=True):
+    """
+    Place N MathTex labels; repeated strings are copies from the Tex cache.
+
+    Args:
+        label_texts: N TeX strings
+        positions: N x 2 or N x 3 label centers
+        color: Shared color
+        font_size: Shared font size
+        background: Add the usual translucent background rectangle
+
+    Returns:
+        VGroup: The labels, in input order
+    """
+    labels = VGroup()
+    for text, position in zip(label_texts, _as_points(positions)):
+        label = cached_math_tex(text, font_size=font_size, color=color)
+        if background:
+            label.add_background_rectangle(buff=0.1, opacity=0.8)
+        labels.add(label.move_to(position))
+    return labels
+
+
+def create_angle_arcs(vertices, start_points, end_points, radius=ANGLE_RADIUS, color=COLOR_ANGLE_ARC):
+    """
+    Draw N angle arcs as one mobject, sweeping counterclockwise from the
+    first line to the second like create_angle_arc (Manim's Angle) does.
+
+    Args:
+        vertices: N x 2 or N x 3 points where the lines meet
+        start_points: Points on the first lines
+        end_points: Points on the second lines
+        radius: Shared arc radius
+        color: Shared color
+
+    Returns:
+        VMobject: Every arc as a subpath of one mobject
+    """
+    vertices = _as_points(vertices)
+    first = _as_points(start_points) - vertices
+    second = _as_points(end_points) - vertices
+
+    start_angles = np.arctan2(first[:, 1], first[:, 0])
+    sweeps = np.mod(np.arctan2(second[:, 1], second[:, 0]) - start_angles, TAU)
+
+    # Anchors at ARC_SEGMENTS + 1 angles per arc; handles along the tangents
+    steps = np.linspace(0, 1, ARC_SEGMENTS + 1)[None, :]
+    angles = start_angles[:, None] + sweeps[:, None] * steps
+    unit = np.stack([np.cos(angles), np.sin(angles), np.zeros_like(angles)], axis=2)
+    tangent = np.stack([-np.sin(angles), np.cos(angles), np.zeros_like(angles)], axis=2)
+    anchors = vertices[:, None, :] + radius * unit
+    handle = (4 / 3 * np.tan(sweeps / ARC_SEGMENTS / 4) * radius)[:, None, None]
+
+    points = np.stack([
+        anchors[:, :-1],
+        anchors[:, :-1] + handle * tangent[:, :-1],
+        anchors[:, 1:] - handle * tangent[:, 1:],
+        anchors[:, 1:],
+    ], axis=2)
+
+    arcs = VMobject(color=color, stroke_width=AUXILIARY_STROKE_WIDTH)
+    arcs.set_points(points.reshape(-1, 3))
+    return arcs
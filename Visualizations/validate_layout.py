@@ -0,0 +1,338 @@
+"""
+Render-Free Layout Validator
+Checks every scene against the safe zones without rendering a frame
+
+Usage:
+    python validate_layout.py "dot product.ipynb"
+    python validate_layout.py "dot product.ipynb" "multivariable functions.ipynb"
+    python validate_layout.py "dot product.ipynb" --scenes Scene04_Geometric --json layout.json
+
+Each scene's construct() runs against a null renderer: animations jump
+straight to their end state, nothing is rasterized or encoded, and waits
+take no time. After every play() and wait() the bounding boxes of what is
+on screen are checked for:
+
+    title-zone   anything but the add_title() title reaching above TITLE_ZONE_Y
+    off-frame    anything extending past the edge of the frame
+    overlap      two text or formula labels whose boxes intersect
+
+Axis numbers belong to their grid and are not checked as labels. Each
+problem is reported once, at the first play/wait where it appears. The exit
+status is 1 if any scene has problems or fails to construct.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import traceback
+
+from manim import (Animation, CoordinateSystem, DecimalNumber, MarkupText, NumberLine,
+                   SingleStringMathTex, Text, config, tempconfig)
+from manim.renderer.cairo_renderer import CairoRenderer
+
+from render_scenes import VISUALIZATIONS_DIR, extract_scenes
+from style_constants import TITLE_ZONE_Y
+
+# Boxes may poke out of the frame (or into each other) by this much
+TOLERANCE = 0.02
+
+# Label overlaps smaller than this (in square units) are ignored
+MIN_OVERLAP_AREA = 0.01
+
+LABEL_TYPES = (Text, MarkupText, SingleStringMathTex, DecimalNumber)
+COORDINATE_TYPES = (CoordinateSystem, NumberLine)
+
+# Render-time switches of BaseScene that would change what gets built
+SCENE_ENV_VARS = ("STYLE_DRAFT", "STYLE_PROFILE")
+
+VALIDATION_CONFIG = {
+    "dry_run": True,
+    "disable_caching": True,
+    "pixel_width": 160,
+    "pixel_height": 90,
+    "progress_bar": "none",
+    "verbosity": "WARNING",
+    "media_dir": os.path.join(VISUALIZATIONS_DIR, "media"),  # Reuse the Tex cache
+}
+
+
+# ============================================================================
+# NULL RENDERER
+# ============================================================================
+
+class LayoutRenderer(CairoRenderer):
+    """
+    Renderer that skips every animation to its end, never draws a frame,
+    and hands the scene to a callback after each play() or wait().
+    """
+
+    def __init__(self, on_step):
+        super().__init__(skip_animations=True)
+        self.on_step = on_step
+
+    def update_skipping_status(self):
+        self.skip_animations = True
+
+    def save_static_frame_data(self, scene, static_mobjects):
+        self.static_image = None
+
+    def update_frame(self, *args, **kwargs):
+        pass
+
+    def render(self, scene, time, moving_mobjects):
+        pass
+
+    def play(self, scene, *args, **kwargs):
+        super().play(scene, *args, **kwargs)
+        self.on_step(scene, args)
+
+
+# ============================================================================
+# CHECKS
+# ============================================================================
+
+def describe(mobject):
+    """Short readable name for a mobject, with its text if it has any"""
+    content = getattr(mobject, "text", None) or getattr(mobject, "tex_string", None)
+    if content is None and isinstance(mobject, DecimalNumber):
+        content = mobject.get_value()
+    if content is None:
+        return type(mobject).__name__
+    content = " ".join(str(content).split())
+    return f"{type(mobject).__name__}({content[:40]!r})"
+
+
+def is_visible(mobject):
+    """Whether any part of the mobject has points and is drawn with some opacity"""
+    for sub in mobject.get_family():
+        if not sub.has_points():
+            continue
+        if not hasattr(sub, "get_fill_opacity"):
+            return True  # Images and other non-vector mobjects
+        if sub.get_fill_opacity() > 0 or (sub.get_stroke_opacity() > 0 and sub.get_stroke_width() > 0):
+            return True
+    return False
+
+
+def box(mobject):
+    """(left, bottom, right, top) of the mobject's bounding box"""
+    left, bottom, _ = mobject.get_corner([-1, -1, 0])
+    right, top, _ = mobject.get_corner([1, 1, 0])
+    return left, bottom, right, top
+
+
+def elements(mobject, titles):
+    """
+    The parts of mobject that are checked as a whole: the mobject itself,
+    unless it contains a title, in which case its submobjects are split up.
+    """
+    if id(mobject) in titles:
+        return
+    if any(id(sub) in titles for sub in mobject.get_family()):
+        for sub in mobject.submobjects:
+            yield from elements(sub, titles)
+    elif mobject.has_points() or mobject.submobjects:
+        yield mobject
+
+
+def labels(mobject):
+    """Text and formula labels in mobject's family, outermost only, skipping axis numbers"""
+    if isinstance(mobject, COORDINATE_TYPES):
+        return
+    if isinstance(mobject, LABEL_TYPES):
+        yield mobject
+        return
+    for sub in mobject.submobjects:
+        yield from labels(sub)
+
+
+def check_layout(mobjects, titles):
+    """
+    Check what is on screen against the safe zones.
+
+    Args:
+        mobjects: Top-level mobjects in the scene
+        titles: ids of the mobjects that are allowed in the title zone
+
+    Returns:
+        list: (kind, object description, detail) tuples
+    """
+    problems = []
+    half_width, half_height = config.frame_width / 2, config.frame_height / 2
+    visible = [m for m in mobjects if is_visible(m)]
+
+    for top_level in visible:
+        for mobject in [top_level] if id(top_level) in titles else elements(top_level, titles):
+            if not is_visible(mobject):
+                continue
+            left, bottom, right, top = box(mobject)
+            if id(mobject) not in titles and top > TITLE_ZONE_Y + TOLERANCE:
+                problems.append(("title-zone", describe(mobject),
+                                 f"top at y={top:.2f}, above {TITLE_ZONE_Y:g}"))
+            overflow = max(-half_width - left, right - half_width, -half_height - bottom, top - half_height)
+            if overflow > TOLERANCE:
+                problems.append(("off-frame", describe(mobject),
+                                 f"box ({left:.2f}, {bottom:.2f})-({right:.2f}, {top:.2f}) "
+                                 f"exceeds the frame by {overflow:.2f}"))
+
+    found = [m for top_level in visible for m in labels(top_level) if is_visible(m)]
+    boxes = [box(m) for m in found]
+    for i in range(len(found)):
+        for j in range(i + 1, len(found)):
+            a, b = boxes[i], boxes[j]
+            width = min(a[2], b[2]) - max(a[0], b[0]) - TOLERANCE
+            height = min(a[3], b[3]) - max(a[1], b[1]) - TOLERANCE
+            if width > 0 and height > 0 and width * height > MIN_OVERLAP_AREA:
+                problems.append(("overlap", f"{describe(found[i])} / {describe(found[j])}",
+                                 f"boxes overlap by {width:.2f} x {height:.2f}"))
+    return problems
+
+
+# ============================================================================
+# VALIDATION
+# ============================================================================
+
+def load_module(module_path):
+    """Import a scene module (extracted notebook or .py file) by path"""
+    if VISUALIZATIONS_DIR not in sys.path:
+        sys.path.insert(0, VISUALIZATIONS_DIR)
+    name = os.path.splitext(os.path.basename(module_path))[0]
+    spec = importlib.util.spec_from_file_location(name, module_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def validate_scene(scene_class):
+    """
+    Run one scene's construct() against the null renderer and check the
+    layout after every play() and wait().
+
+    Returns:
+        dict: scene, status ('ok', 'problems' or 'error'), steps, seconds,
+        problems (each with kind, object, detail, step, time and count)
+    """
+    start = time.time()
+    result = {"scene": scene_class.__name__, "status": "ok", "steps": 0, "problems": []}
+    seen = {}
+    titles = set()
+    clock = {"time": 0.0}
+
+    def on_step(scene, animations):
+        result["steps"] += 1
+        clock["time"] += getattr(scene, "duration", 0.0) or 0.0
+        names = ", ".join(type(a).__name__ for a in animations[:3])
+        step = f"#{result['steps']} {names}"
+        for kind, name, detail in check_layout(scene.mobjects + scene.foreground_mobjects, titles):
+            key = (kind, name)
+            if key in seen:
+                seen[key]["count"] += 1
+                continue
+            seen[key] = {"kind": kind, "object": name, "detail": detail, "step": step,
+                         "time": round(clock["time"], 2), "count": 1}
+            result["problems"].append(seen[key])
+
+    try:
+        scene = scene_class(renderer=LayoutRenderer(on_step))
+        scene.hold_static_frames = False  # Nothing is drawn, so there is nothing to hold
+
+        add_title = getattr(scene, "add_title", None)
+        if add_title is not None:
+            play = scene.play
+
+            def play_title(*animations, **kwargs):
+                titles.update(id(a.mobject) for a in animations if isinstance(a, Animation))
+                return play(*animations, **kwargs)
+
+            def tracked_add_title(*args, **kwargs):
+                # add_title() plays and waits before it returns the title, so
+                # whatever it animates is registered as title before each check
+                scene.play = play_title
+                try:
+                    title = add_title(*args, **kwargs)
+                finally:
+                    del scene.play
+                titles.add(id(title))
+                return title
+            scene.add_title = tracked_add_title
+
+        scene.render()
+        if result["problems"]:
+            result["status"] = "problems"
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = f"{type(e).__name__}: {e}"
+        result["traceback"] = traceback.format_exc()
+
+    result["seconds"] = time.time() - start
+    return result
+
+
+def validate_layout(source_paths, scenes=None):
+    """
+    Validate the layout of every scene in the given notebooks or modules.
+
+    Args:
+        source_paths: .ipynb notebooks or .py modules with BaseScene subclasses
+        scenes: Only check these scene names (default: all)
+
+    Returns:
+        list: validate_scene results, in source order
+    """
+    start = time.time()
+    saved_env = {name: os.environ.pop(name) for name in SCENE_ENV_VARS if name in os.environ}
+    work_dir = tempfile.mkdtemp(prefix="validate-layout-")
+    results = []
+    try:
+        with tempconfig(VALIDATION_CONFIG):
+            for source_path in source_paths:
+                module_path, _, found = extract_scenes(source_path, work_dir)
+                module = load_module(module_path)
+                for name in found:
+                    if scenes and name not in scenes:
+                        continue
+                    result = validate_scene(getattr(module, name))
+                    result["source"] = os.path.basename(source_path)
+                    results.append(result)
+                    print(f"  -> {result['status']:<8} {result['seconds']:5.1f}s  "
+                          f"{result['steps']:3d} step(s)  {name}")
+                    for problem in result["problems"]:
+                        count = f" (x{problem['count']})" if problem["count"] > 1 else ""
+                        print(f"     {problem['kind']:<10} at {problem['step']} "
+                              f"(t={problem['time']:g}s): {problem['object']}: {problem['detail']}{count}")
+                    if result["status"] == "error":
+                        print(f"     {result['error']}")
+    finally:
+        os.environ.update(saved_env)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print("\n" + "=" * 30)
+    print(f"Layout Check Complete.")
+    print(f"Scenes Clean:    {sum(r['status'] == 'ok' for r in results)}")
+    print(f"Scenes Flagged:  {sum(r['status'] == 'problems' for r in results)}")
+    print(f"Scenes Failed:   {sum(r['status'] == 'error' for r in results)}")
+    print(f"Wall Time:       {time.time() - start:.1f}s")
+    print("=" * 30)
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Check scene layouts without rendering.")
+    parser.add_argument("sources", nargs="+", help="Notebooks (.ipynb) or modules (.py) to check")
+    parser.add_argument("--scenes", nargs="+", help="Only check these scenes")
+    parser.add_argument("--json", dest="json_path", help="Also write the results to this file")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = validate_layout(args.sources, scenes=args.scenes)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1)
+    sys.exit(0 if all(r["status"] == "ok" for r in results) else 1)
@@ -0,0 +1,327 @@
+"""
+Benchmark harness for convert_tex_to_pdf.py.
+
+Builds a copy of the .tex tree under a fixed set of scenarios and records
+wall time, per-phase time, peak RSS and pdflatex invocation counts for
+each, then compares the run against a stored baseline.
+
+Scenarios:
+    cold          Full build into an empty PDF tree
+    noop          Rebuild with nothing changed
+    single-edit   One root document edited
+    shared-edit   The most widely shared dependency edited
+    scaled-cold   Full build of a generated tree (--scale documents)
+    scaled-noop   No-op rebuild of the generated tree
+
+Usage:
+    python benchmarks/benchmark_tex_to_pdf.py --stub
+    python benchmarks/benchmark_tex_to_pdf.py --stub --save-baseline
+    python benchmarks/benchmark_tex_to_pdf.py --tex-root .tex --jobs 8
+
+With --stub, pdflatex is replaced by stub_pdflatex.py (POSIX only), so the
+numbers measure scanning, scheduling and bookkeeping without TeX itself.
+Every scenario runs in a fresh interpreter so peak RSS is per scenario.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+STUB_PDFLATEX = os.path.join(BENCH_DIR, "stub_pdflatex.py")
+
+# Slower than baseline by more than this fraction counts as a regression
+REGRESSION_THRESHOLD = 0.10
+
+
+# ============================================================================
+# TREES
+# ============================================================================
+
+def generate_tree(root, count, docs_per_dir=50):
+    """
+    Write a synthetic tree of count homework-style documents. Each directory
+    shares one macros.tex that all of its documents \\input, so edits to it
+    exercise dependency tracking at scale.
+    """
+    for i in range(count):
+        directory = os.path.join(root, f"Chapter {i // docs_per_dir:03d}")
+        if i % docs_per_dir == 0:
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, "macros.tex"), "w", encoding="utf-8") as f:
+                f.write("\\newcommand{\\R}{\\mathbb{R}}\n")
+        with open(os.path.join(directory, f"Homework {i:05d}.tex"), "w", encoding="utf-8") as f:
+            f.write(
+                "\\documentclass{article}\n"
+                "\\usepackage{amsmath}\n"
+                "\\usepackage{amssymb}\n"
+                "\\usepackage[margin=1in]{geometry}\n"
+                "\\input{macros}\n"
+                f"\\title{{Homework {i}}}\n"
+                "\\begin{document}\n"
+                "\\maketitle\n"
+                + ("\\section{Problem}\\label{sec:problem}\nSee Section~\\ref{sec:problem}.\n" if i % 5 == 0
+                   else "Let $x \\in \\R$.\n")
+                + "\\end{document}\n"
+            )
+
+
+def append_comment(path):
+    """Change a file's content (not just its mtime) the way an edit would"""
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(f"\n% benchmark edit {time.time_ns()}\n")
+
+
+def most_shared_dependency(tex_root):
+    """The dependency used by the most root documents, or None if nothing is shared"""
+    import convert_tex_to_pdf
+
+    graph, _ = convert_tex_to_pdf.build_dependency_graph(tex_root)
+    users = {}
+    for deps in graph.values():
+        for dep in deps:
+            users[dep] = users.get(dep, 0) + 1
+    shared = [dep for dep, n in users.items() if n > 1]
+    if not shared:
+        return None
+    return os.path.join(tex_root, max(shared, key=lambda dep: (users[dep], dep)))
+
+
+# ============================================================================
+# MEASUREMENT
+# ============================================================================
+
+def measure_in_process(tex_root, pdf_root, build_kwargs):
+    """Run one build in this process and return its measurements"""
+    import contextlib
+    import io
+
+    import convert_tex_to_pdf
+
+    timings = {}
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = convert_tex_to_pdf.convert_tex_to_pdf_smart(tex_root, pdf_root, timings=timings,
+                                                              **build_kwargs)
+    wall = time.perf_counter() - start
+
+    try:
+        import resource
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak_rss_kb = peak_rss // 1024 if sys.platform == "darwin" else peak_rss
+    except ImportError:  # Windows
+        peak_rss_kb = None
+
+    return {
+        "wall": wall,
+        "phases": timings,
+        "peak_rss_kb": peak_rss_kb,
+        "compiled": sum(r["status"] == "ok" for r in results),
+        "failed": sum(r["status"] == "failed" for r in results),
+        "skipped": sum(r["status"] == "skipped" for r in results),
+        "passes": sum(r.get("passes", 0) for r in results),
+    }
+
+
+def measure(tex_root, pdf_root, build_kwargs, env, counter_file):
+    """Run one build in a fresh interpreter and return its measurements"""
+    calls_before = _count_lines(counter_file)
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--measure", tex_root, pdf_root,
+         json.dumps(build_kwargs)],
+        env=env, capture_output=True, text=True, check=False
+    )
+    if proc.returncode:
+        raise RuntimeError(f"Benchmark build failed:\n{proc.stderr}")
+
+    measurement = json.loads(proc.stdout.strip().splitlines()[-1])
+    # The stub counts every invocation exactly (format dumps included);
+    # with real pdflatex fall back to the number of passes run.
+    if counter_file:
+        measurement["pdflatex_calls"] = _count_lines(counter_file) - calls_before
+    else:
+        measurement["pdflatex_calls"] = measurement["passes"]
+    return measurement
+
+
+def _count_lines(path):
+    if not path or not os.path.exists(path):
+        return 0
+    with open(path, encoding="utf-8") as f:
+        return sum(1 for _ in f)
+
+
+def stub_environment(work_dir, delay):
+    """Environment with a `pdflatex` shim for the stub first on PATH"""
+    if os.name == "nt":
+        raise SystemExit("--stub needs a POSIX shell to shim pdflatex")
+
+    bin_dir = os.path.join(work_dir, "bin")
+    os.makedirs(bin_dir)
+    shim = os.path.join(bin_dir, "pdflatex")
+    with open(shim, "w", encoding="utf-8") as f:
+        f.write(f'#!/bin/sh\nexec "{sys.executable}" "{STUB_PDFLATEX}" "$@"\n')
+    os.chmod(shim, 0o755)
+
+    counter_file = os.path.join(work_dir, "pdflatex-calls.txt")
+    env = dict(os.environ)
+    env["PATH"] = bin_dir + os.pathsep + env.get("PATH", "")
+    env["STUB_PDFLATEX_COUNTER"] = counter_file
+    env["STUB_PDFLATEX_DELAY"] = str(delay)
+    return env, counter_file
+
+
+# ============================================================================
+# SCENARIOS
+# ============================================================================
+
+def run_scenarios(args):
+    """Run every scenario and return {name: measurement}"""
+    work_dir = tempfile.mkdtemp(prefix="tex-bench-")
+    build_kwargs = {"jobs": args.jobs, "format_cache": None,
+                    "scratch_dir": args.scratch_dir, "aux_cache": None}
+    env, counter_file = (stub_environment(work_dir, args.stub_delay) if args.stub
+                         else (dict(os.environ), None))
+    env["PYTHONPATH"] = REPO_ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    sys.path.insert(0, REPO_ROOT)
+
+    scenarios = {}
+    try:
+        tex_root = os.path.join(work_dir, "tex")
+        pdf_root = os.path.join(work_dir, "pdf")
+        shutil.copytree(args.tex_root, tex_root)
+        if args.aux_cache:
+            build_kwargs["aux_cache"] = os.path.join(work_dir, "aux-cache")
+        if args.format_cache:
+            build_kwargs["format_cache"] = os.path.join(work_dir, "format-cache")
+
+        def run(name, tree, out):
+            print(f"  {name}...", flush=True)
+            scenarios[name] = measure(tree, out, build_kwargs, env, counter_file)
+
+        print(f"Benchmarking {args.tex_root} (work dir: {work_dir})")
+        run("cold", tex_root, pdf_root)
+        run("noop", tex_root, pdf_root)
+
+        import convert_tex_to_pdf
+
+        # Edit a root document, not a fragment that might feed no build at all
+        graph, _ = convert_tex_to_pdf.build_dependency_graph(tex_root)
+        if graph:
+            append_comment(os.path.join(tex_root, sorted(graph)[0]))
+            run("single-edit", tex_root, pdf_root)
+            rebuilt = scenarios["single-edit"]["compiled"] + scenarios["single-edit"]["failed"]
+            if rebuilt != 1:
+                raise RuntimeError(f"single-edit rebuilt {rebuilt} documents, expected exactly 1")
+
+        shared = most_shared_dependency(tex_root)
+        if shared:
+            append_comment(shared)
+            run("shared-edit", tex_root, pdf_root)
+        else:
+            print("  shared-edit skipped: no dependency is shared between documents")
+
+        if args.scale:
+            scaled_tex = os.path.join(work_dir, "scaled-tex")
+            scaled_pdf = os.path.join(work_dir, "scaled-pdf")
+            generate_tree(scaled_tex, args.scale)
+            run("scaled-cold", scaled_tex, scaled_pdf)
+            run("scaled-noop", scaled_tex, scaled_pdf)
+            append_comment(os.path.join(scaled_tex, "Chapter 000", "macros.tex"))
+            run("scaled-shared-edit", scaled_tex, scaled_pdf)
+    finally:
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    return scenarios
+
+
+# ============================================================================
+# REPORTING
+# ============================================================================
+
+def print_results(scenarios, baseline):
+    """Print one row per scenario, with the change in wall time against baseline"""
+    base = (baseline or {}).get("scenarios", {})
+    regressions = []
+
+    print("\n" + "=" * 96)
+    print(f"{'Scenario':<20}{'Wall':>9}{'Scan':>8}{'Stale':>8}{'Compile':>9}{'Cleanup':>9}"
+          f"{'RSS MB':>8}{'Calls':>7}{'Built':>7}{'vs base':>11}")
+    print("=" * 96)
+    for name, m in scenarios.items():
+        phases = m["phases"]
+        rss = f"{m['peak_rss_kb'] / 1024:.0f}" if m["peak_rss_kb"] else "-"
+        delta = ""
+        if name in base and base[name]["wall"] > 0:
+            change = (m["wall"] - base[name]["wall"]) / base[name]["wall"]
+            delta = f"{change:+.0%}"
+            if change > REGRESSION_THRESHOLD:
+                delta += " !"
+                regressions.append(name)
+        print(f"{name:<20}{m['wall']:8.2f}s{phases.get('scan', 0):7.2f}s{phases.get('staleness', 0):7.2f}s"
+              f"{phases.get('compile', 0):8.2f}s{phases.get('cleanup', 0):8.2f}s{rss:>8}"
+              f"{m['pdflatex_calls']:>7}{m['compiled']:>7}{delta:>11}")
+    print("=" * 96)
+
+    if regressions:
+        print(f"Regressions (> {REGRESSION_THRESHOLD:.0%} slower than baseline): {', '.join(regressions)}")
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark convert_tex_to_pdf.py.")
+    parser.add_argument("--tex-root", default=os.path.join(REPO_ROOT, ".tex"),
+                        help="Tree to benchmark (copied to a temp dir first)")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count())
+    parser.add_argument("--scale", type=int, default=2000,
+                        help="Documents in the generated tree (0 to skip the scaled scenarios)")
+    parser.add_argument("--stub", action="store_true", help="Use the stub pdflatex")
+    parser.add_argument("--stub-delay", type=float, default=0.0,
+                        help="Seconds the stub sleeps per invocation")
+    parser.add_argument("--format-cache", action="store_true")
+    parser.add_argument("--scratch-dir", nargs="?", const="auto", default=None)
+    parser.add_argument("--aux-cache", action="store_true")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--output", help="Also write this run's results to a JSON file")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="Exit with status 1 if any scenario regressed")
+    parser.add_argument("--keep", action="store_true", help="Keep the temporary work dir")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--measure":
+        print(json.dumps(measure_in_process(sys.argv[2], sys.argv[3], json.loads(sys.argv[4]))))
+        sys.exit(0)
+
+    args = parse_args()
+    results = {
+        "stub": args.stub,
+        "jobs": args.jobs,
+        "scale": args.scale,
+        "scenarios": run_scenarios(args),
+    }
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("stub") != args.stub:
+            print("Note: baseline was recorded with a different pdflatex (stub vs real).")
+    regressions = print_results(results["scenarios"], baseline)
+
+    for path in filter(None, [args.output, args.baseline if args.save_baseline else None]):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1)
+        print(f"Saved results to {path}")
+
+    sys.exit(1 if regressions and args.fail_on_regression else 0)
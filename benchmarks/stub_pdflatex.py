@@ -0,0 +1,93 @@
+"""
+Stand-in for pdflatex, used by benchmark_tex_to_pdf.py.
+
+Understands the command lines convert_tex_to_pdf.py produces and writes the
+files the converter reads back (.pdf, .log, .aux, .fls, .fmt) without
+typesetting anything, so benchmarks measure the converter's own overhead.
+
+A source containing \\stubfail fails with an error in the log; one
+containing \\stubrerun always asks for another pass.
+
+Environment:
+    STUB_PDFLATEX_DELAY    Seconds to sleep per invocation (default 0)
+    STUB_PDFLATEX_COUNTER  File that gets one line appended per invocation
+"""
+
+import os
+import re
+import sys
+import time
+
+INPUT_PATTERN = re.compile(r"\\(?:input|include)\s*\{([^}]+)\}")
+LABEL_PATTERN = re.compile(r"\\label\s*\{([^}]+)\}")
+
+
+def main(args):
+    if "--version" in args:
+        print("pdfTeX 3.141592653-2.6-1.40.25 (stub)")
+        return 0
+
+    counter = os.environ.get("STUB_PDFLATEX_COUNTER")
+    if counter:
+        with open(counter, "a", encoding="utf-8") as f:
+            f.write(" ".join(args) + "\n")
+    time.sleep(float(os.environ.get("STUB_PDFLATEX_DELAY", "0")))
+
+    out_dir = "."
+    job_name = None
+    positional = []
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == "-output-directory":
+            out_dir = args[i + 1]
+            i += 1
+        elif arg.startswith("-jobname="):
+            job_name = arg.split("=", 1)[1]
+        elif not arg.startswith("-") and not arg.startswith("&"):
+            positional.append(arg)
+        i += 1
+
+    source = positional[-1]
+    job_name = job_name or os.path.splitext(os.path.basename(source))[0]
+
+    if "-ini" in args:
+        with open(os.path.join(out_dir, job_name + ".fmt"), "wb") as f:
+            f.write(b"stub format\n")
+        return 0
+
+    with open(source, encoding="utf-8", errors="ignore") as f:
+        text = f.read()
+
+    inputs = [source]
+    for name in INPUT_PATTERN.findall(text):
+        inputs.append(name if name.endswith(".tex") else name + ".tex")
+    with open(os.path.join(out_dir, job_name + ".fls"), "w", encoding="utf-8") as f:
+        f.write(f"PWD {os.getcwd()}\n")
+        for path in inputs:
+            f.write(f"INPUT {path}\n")
+
+    failed = "\\stubfail" in text
+    with open(os.path.join(out_dir, job_name + ".log"), "w", encoding="utf-8") as f:
+        f.write(f"This is pdfTeX (stub)\n({source}\n")
+        if failed:
+            f.write("! Undefined control sequence.\nl.1 \\stubfail\n")
+        if "\\stubrerun" in text:
+            f.write("LaTeX Warning: Label(s) may have changed. Rerun to get cross-references right.\n")
+        f.write(")\n")
+        if not failed:
+            f.write(f"Output written on {job_name}.pdf (1 page, 1024 bytes).\n")
+    if failed:
+        return 1
+
+    with open(os.path.join(out_dir, job_name + ".aux"), "w", encoding="utf-8") as f:
+        f.write("\\relax\n")
+        for label in LABEL_PATTERN.findall(text):
+            f.write(f"\\newlabel{{{label}}}{{{{1}}{{1}}}}\n")
+    with open(os.path.join(out_dir, job_name + ".pdf"), "wb") as f:
+        f.write(b"%PDF-1.4\n% stub output\n%%EOF\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
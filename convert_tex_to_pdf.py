@@ -1,87 +1,1744 @@
+import argparse
+import datetime
+import hashlib
+import heapq
+import json
 import os
+import queue
+import re
+import shutil
 import subprocess
+import sys
+import tempfile
+import threading
 import time
+import xml.etree.ElementTree as ET
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # Watch mode falls back to polling
+    FileSystemEventHandler = object
+    Observer = None
 
-def convert_tex_to_pdf_smart(tex_root, pdf_root):
-    aux_extensions_to_delete = [
-        '.aux', '.log', '.out', '.toc', '.synctex.gz',
-        '.fls', '.fdb_latexmk', '.bbl', '.blg'
+
+DEFAULT_TEX_ROOT = r"C:\Users\Computer\Documents\GitHub\MathTex\.tex"
+DEFAULT_PDF_ROOT = r"C:\Users\Computer\Documents\GitHub\MathTex\.pdf"
+
+PDFLATEX_OPTIONS = ['-interaction=nonstopmode', '-recorder']
+MANIFEST_NAME = ".build-manifest.json"
+REPORT_NAME = "build-report"
+
+
+DEFAULT_MAX_PASSES = 4
+WATCH_DEBOUNCE_SECONDS = 0.5
+WATCH_POLL_SECONDS = 1.0
+MANIFEST_VERSION = 1
+
+
+# ============================================================================
+# BUILD MANIFEST
+# ============================================================================
+
+def load_manifest(pdf_root):
+    """Load the build manifest from the PDF root, or start an empty one"""
+    path = os.path.join(pdf_root, MANIFEST_NAME)
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {"version": MANIFEST_VERSION, "documents": {}}
+
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {"version": MANIFEST_VERSION, "documents": {}}
+    return manifest
+
+
+def save_manifest(pdf_root, manifest):
+    """Write the manifest atomically so an interrupted run never corrupts it"""
+    os.makedirs(pdf_root, exist_ok=True)
+    path = os.path.join(pdf_root, MANIFEST_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def file_digest(path, cache):
+    """SHA-256 of a file's contents, memoized per run in cache"""
+    if path not in cache:
+        h = hashlib.sha256()
+        try:
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 16), b""):
+                    h.update(chunk)
+            cache[path] = h.hexdigest()
+        except OSError:
+            cache[path] = "missing"
+    return cache[path]
+
+
+def input_digests(tex_root, tex_path, dependencies, known, since):
+    """
+    Digests of a document's inputs as a build that started at since (a
+    time.time() value) read them. Digests in known were taken before the
+    build and are reused; other files are hashed now, unless they changed
+    after since, in which case they get a placeholder that matches no real
+    digest, so the next run builds the document again.
+    """
+    digests = {}
+    for path in [tex_path] + [os.path.join(tex_root, dep) for dep in dependencies]:
+        if path in known:
+            digests[path] = known[path]
+            continue
+        try:
+            changed = os.path.getmtime(path) >= since
+        except OSError:
+            changed = False
+        digests[path] = "changed during build" if changed else file_digest(path, {})
+    return digests
+
+
+def get_engine_version():
+    """First line of `pdflatex --version`, or None if pdflatex is missing"""
+    try:
+        out = subprocess.run(['pdflatex', '--version'], capture_output=True, check=False).stdout
+    except FileNotFoundError:
+        return None
+    return out.decode(errors='ignore').splitlines()[0] if out else ""
+
+
+def build_key(tex_root, tex_path, dependencies, engine_version, digests):
+    """
+    Hash everything that determines a document's PDF: its source, the
+    recorded dependencies (relative to tex_root), the pdflatex command
+    line and the engine version. File mtimes are deliberately not used.
+    """
+    payload = [
+        file_digest(tex_path, digests),
+        [(dep, file_digest(os.path.join(tex_root, dep), digests)) for dep in sorted(dependencies)],
+        ['pdflatex'] + PDFLATEX_OPTIONS,
+        engine_version,
     ]
+    return hashlib.sha256(json.dumps(payload).encode("utf-8")).hexdigest()
+
+
+def read_recorded_inputs(fls_path, tex_root, tex_path):
+    """
+    Collect the files pdflatex actually read (INPUT lines of the -recorder
+    .fls file) that live inside tex_root, as paths relative to tex_root.
+    Files from the TeX distribution are covered by the engine version.
+    """
+    root = os.path.realpath(tex_root)
+    main = os.path.realpath(tex_path)
+    cwd = os.path.dirname(tex_path)
+    inputs = set()
+
+    try:
+        with open(fls_path, encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                if line.startswith("PWD "):
+                    cwd = line[4:].strip()
+                elif line.startswith("INPUT "):
+                    path = os.path.realpath(os.path.join(cwd, line[6:].strip()))
+                    if path != main and os.path.commonpath([root, path]) == root and os.path.isfile(path):
+                        inputs.add(os.path.relpath(path, root).replace(os.sep, "/"))
+    except OSError:
+        pass
+
+    return sorted(inputs)
+
+
+# ============================================================================
+# DEPENDENCY GRAPH
+# ============================================================================
+
+COMMENT_PATTERN = re.compile(r"(?<!\\)%.*")
+INPUT_PATTERN = re.compile(r"\\(?:input|include|subfile)\s*\{([^}]+)\}")
+GRAPHICS_PATTERN = re.compile(r"\\(?:includegraphics|includepdf)\s*\*?\s*(?:\[[^\]]*\])?\s*\{([^}]+)\}")
+PACKAGE_PATTERN = re.compile(r"\\(usepackage|RequirePackage|documentclass)\s*(?:\[[^\]]*\])?\s*\{([^}]+)\}")
+BIBLIOGRAPHY_PATTERN = re.compile(r"\\(?:bibliography|addbibresource)\s*(?:\[[^\]]*\])?\s*\{([^}]+)\}")
+GRAPHICSPATH_PATTERN = re.compile(r"\\graphicspath\s*\{((?:\s*\{[^}]*\})+)\s*\}")
+
+GRAPHICS_EXTENSIONS = ["", ".pdf", ".png", ".jpg", ".jpeg", ".eps"]
+
+
+def strip_tex_comments(text):
+    """Remove % comments (but not escaped \\%) so commented-out inputs are ignored"""
+    return COMMENT_PATTERN.sub("", text)
+
+
+def scan_tex_file(path):
+    """
+    Extract the references a single .tex file makes, without resolving them.
+
+    Returns:
+        dict: is_root flag plus lists of inputs, graphics, packages,
+        classes, bibliographies and graphicspath entries
+    """
+    try:
+        with open(path, encoding="utf-8", errors="ignore") as f:
+            text = strip_tex_comments(f.read())
+    except OSError:
+        text = ""
+
+    packages = []
+    classes = []
+    for command, names in PACKAGE_PATTERN.findall(text):
+        target = classes if command == "documentclass" else packages
+        target.extend(name.strip() for name in names.split(",") if name.strip())
+
+    graphicspath = []
+    for group in GRAPHICSPATH_PATTERN.findall(text):
+        graphicspath.extend(re.findall(r"\{([^}]*)\}", group))
+
+    return {
+        "is_root": bool(classes) and "\\begin{document}" in text,
+        "inputs": [name.strip() for name in INPUT_PATTERN.findall(text)],
+        "graphics": [name.strip() for name in GRAPHICS_PATTERN.findall(text)],
+        "packages": packages,
+        "classes": classes,
+        "bibliographies": [name.strip() for names in BIBLIOGRAPHY_PATTERN.findall(text)
+                           for name in names.split(",") if name.strip()],
+        "graphicspath": graphicspath,
+    }
 
-    print(f"Scanning directories...\nFrom: {tex_root}\nTo:   {pdf_root}\n")
 
-    files_processed = 0
-    files_skipped = 0
+def _resolve(base_dir, name, extensions):
+    """Return the first existing file for name + one of extensions, or None"""
+    for ext in extensions:
+        candidate = os.path.normpath(os.path.join(base_dir, name + ext))
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def dependency_closure(tex_path, tex_root, scans):
+    """
+    Follow \\input/\\include chains from a root document and collect every
+    in-tree file it depends on: fragments, images, local .sty/.cls files
+    and bibliographies. Names are resolved against the root's directory,
+    as pdflatex does when run from there.
+
+    Args:
+        tex_path: Root document
+        tex_root: Tree the returned paths are relative to
+        scans: Cache of scan_tex_file results, shared across roots
+
+    Returns:
+        list: Sorted dependency paths relative to tex_root
+    """
+    base_dir = os.path.dirname(tex_path)
+    root = os.path.realpath(tex_root)
+    found = set()
+    graphics = []
+    graphicspath = [""]
+    stack = [tex_path]
+    visited = set()
+
+    while stack:
+        path = stack.pop()
+        if path in visited:
+            continue
+        visited.add(path)
+
+        if path not in scans:
+            scans[path] = scan_tex_file(path)
+        scan = scans[path]
+
+        for name in scan["inputs"]:
+            dep = _resolve(base_dir, name, ["", ".tex"] if name.endswith(".tex") else [".tex", ""])
+            if dep:
+                found.add(dep)
+                stack.append(dep)
+        for name in scan["packages"]:
+            found.add(_resolve(base_dir, name, [".sty"]))
+        for name in scan["classes"]:
+            found.add(_resolve(base_dir, name, [".cls"]))
+        for name in scan["bibliographies"]:
+            found.add(_resolve(base_dir, name, ["", ".bib"] if name.endswith(".bib") else [".bib"]))
+        graphics.extend(scan["graphics"])
+        graphicspath.extend(scan["graphicspath"])
+
+    for name in graphics:
+        for prefix in graphicspath:
+            dep = _resolve(base_dir, os.path.join(prefix, name), GRAPHICS_EXTENSIONS)
+            if dep:
+                found.add(dep)
+                break
+
+    deps = set()
+    for dep in found:
+        if dep is None:
+            continue
+        real = os.path.realpath(dep)
+        if os.path.commonpath([root, real]) == root:
+            deps.add(os.path.relpath(real, root).replace(os.sep, "/"))
+    return sorted(deps)
+
+
+def build_dependency_graph(tex_root, scans=None):
+    """
+    Scan the whole .tex tree and map each root document to its dependencies.
+
+    A root is a file with both \\documentclass and \\begin{document};
+    everything else (\\input fragments, shared snippets) is only ever
+    compiled as part of the roots that pull it in.
+
+    Args:
+        tex_root: Source tree of .tex files
+        scans: Optional dict to fill with the per-file scan results, so
+            callers can update the graph incrementally later
+
+    Returns:
+        tuple: (graph, fragments) where graph maps root paths (relative to
+        tex_root) to their sorted dependency lists
+    """
+    scans = {} if scans is None else scans
+    graph = {}
+    fragments = []
 
     for dirpath, _, filenames in os.walk(tex_root):
-        relative_dir = os.path.relpath(dirpath, tex_root)
-        pdf_dir = os.path.join(pdf_root, relative_dir)
+        for filename in sorted(filenames):
+            if not filename.endswith(".tex"):
+                continue
+            tex_filepath = os.path.join(dirpath, filename)
+            rel_path = os.path.relpath(tex_filepath, tex_root).replace(os.sep, "/")
 
-        os.makedirs(pdf_dir, exist_ok=True)
+            scans[tex_filepath] = scan_tex_file(tex_filepath)
+            if scans[tex_filepath]["is_root"]:
+                graph[rel_path] = None
+            else:
+                fragments.append(rel_path)
 
-        for filename in filenames:
-            if filename.endswith(".tex"):
-                tex_filepath = os.path.join(dirpath, filename)
-                base_name = os.path.splitext(filename)[0]
-                pdf_filepath = os.path.join(pdf_dir, base_name + ".pdf")
+    for rel_path in graph:
+        graph[rel_path] = dependency_closure(os.path.join(tex_root, rel_path), tex_root, scans)
 
-                if os.path.exists(pdf_filepath):
-                    tex_mtime = os.path.getmtime(tex_filepath)
-                    pdf_mtime = os.path.getmtime(pdf_filepath)
+    return graph, fragments
 
-                    if tex_mtime < pdf_mtime:
-                        # The PDF is newer than the source code. No need to compile.
-                        # Uncomment the print below if you want to see skipped files
-                        print(f"Skipping (Up-to-date): {filename}")
-                        files_skipped += 1
-                        continue
 
-                print(f"Processing: {filename}")
-                files_processed += 1
+# ============================================================================
+# PASS CONVERGENCE
+# ============================================================================
 
-                try:
-                    for i in range(1, 3):
-                        print(f"  -> Pass {i}/2...")
-                        subprocess.run(
-                            ['pdflatex', '-interaction=nonstopmode', '-output-directory', pdf_dir, tex_filepath],
-                            check=True,
-                            capture_output=True
-                        )
-                    print(f"  -> Created: {base_name}.pdf")
-
-                except subprocess.CalledProcessError as e:
-                    print(f"  -> ERROR: Failed to compile {filename}.")
-                    print("=" * 20 + " LaTeX Error Log " + "=" * 20)
-                    print(e.stdout.decode(errors='ignore')[-1000:])
-                    print("=" * 57)
-
-                except FileNotFoundError:
-                    print("CRITICAL ERROR: 'pdflatex' command not found. Install LaTeX.")
-                    return
-
-                finally:
-                    print("  -> Cleaning temp files...")
-                    for ext in aux_extensions_to_delete:
-                        aux_file_path = os.path.join(pdf_dir, base_name + ext)
-                        if os.path.exists(aux_file_path):
-                            try:
-                                os.remove(aux_file_path)
-                            except OSError:
-                                pass
+# Files whose contents feed the next pass; if none of them change, another
+# pass would produce the same PDF
+AUX_STATE_EXTENSIONS = [".aux", ".toc", ".out", ".lof", ".lot", ".nav", ".snm"]
+
+RERUN_PATTERN = re.compile(
+    r"Rerun to get|Please rerun|Label\(s\) may have changed|rerun LaTeX|Temporary extra page added"
+)
+CROSS_REFERENCE_PATTERN = re.compile(r"\\(?:newlabel|bibcite|@writefile|contentsline|newpage@label)")
+
+
+def aux_cache_dir(cache_root, tex_path):
+    """Per-document directory in the aux cache, keyed on the source path"""
+    digest = hashlib.sha256(os.path.abspath(tex_path).encode("utf-8")).hexdigest()[:16]
+    base_name = os.path.splitext(os.path.basename(tex_path))[0]
+    return os.path.join(cache_root, f"{base_name}-{digest}")
+
+
+def restore_aux_state(cache_root, tex_path, build_dir, base_name):
+    """Copy a document's cached aux files into its build dir; True if any were found"""
+    cache_dir = aux_cache_dir(cache_root, tex_path)
+    restored = False
+    for ext in AUX_STATE_EXTENSIONS:
+        cached = os.path.join(cache_dir, base_name + ext)
+        if os.path.exists(cached):
+            shutil.copyfile(cached, os.path.join(build_dir, base_name + ext))
+            restored = True
+    return restored
+
+
+def save_aux_state(cache_root, tex_path, build_dir, base_name):
+    """Replace a document's cached aux files with those of a successful build"""
+    cache_dir = aux_cache_dir(cache_root, tex_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    for ext in AUX_STATE_EXTENSIONS:
+        built = os.path.join(build_dir, base_name + ext)
+        cached = os.path.join(cache_dir, base_name + ext)
+        if os.path.exists(built):
+            publish_file(built, cached)
+        elif os.path.exists(cached):
+            os.remove(cached)
+
+
+def read_aux_state(build_dir, base_name):
+    """Digest of every file that is read back by the next pdflatex pass"""
+    state = {}
+    for ext in AUX_STATE_EXTENSIONS:
+        path = os.path.join(build_dir, base_name + ext)
+        if os.path.exists(path):
+            state[ext] = file_digest(path, {})
+    return state
+
+
+def log_requests_rerun(log_path):
+    """Check the pdflatex log for a 'Rerun to get cross-references right'-style hint"""
+    try:
+        with open(log_path, encoding="latin-1") as f:
+            return any(RERUN_PATTERN.search(line) for line in f)
+    except OSError:
+        return False
+
+
+def has_cross_references(build_dir, base_name):
+    """True if the aux/toc/out files carry anything a second pass would read"""
+    for ext in AUX_STATE_EXTENSIONS:
+        path = os.path.join(build_dir, base_name + ext)
+        try:
+            with open(path, encoding="latin-1") as f:
+                if ext != ".aux" and f.read(1):
+                    return True
+                if ext == ".aux" and any(CROSS_REFERENCE_PATTERN.search(line) for line in f):
+                    return True
+        except OSError:
+            continue
+    return False
+
+
+def needs_another_pass(build_dir, base_name, before, after):
+    """
+    Decide whether pdflatex has converged.
+
+    Another pass is needed when the log asks for one or when the files the
+    next pass reads have changed. After a first pass that started without
+    any aux state, "changed" is always true, so there we only rerun if the
+    document actually produced labels, TOC entries or bookmarks.
+    """
+    if log_requests_rerun(os.path.join(build_dir, base_name + ".log")):
+        return True
+    if after == before:
+        return False
+    if not before:
+        return has_cross_references(build_dir, base_name)
+    return True
+
+
+# ============================================================================
+# LOG PARSING
+# ============================================================================
+
+LOG_FILE_TOKEN = re.compile(r"\(([^\s()]*)|\)")
+LOG_ERROR = re.compile(r"^! (.*)")
+LOG_ERROR_LINE = re.compile(r"^l\.(\d+) ?(.*)")
+LOG_WARNING = re.compile(r"^(LaTeX|Package \S+|Class \S+)( Font)? Warning: (.*)")
+# Warning continuations are indented or prefixed "(package)"; "(./file.tex" opens a file
+LOG_CONTINUATION = re.compile(r"^(?: |\([^\s()]+\)\s)")
+LOG_BOX = re.compile(r"^(Overfull|Underfull) \\[hv]box \(([^)]*)\)(?:.*?lines? (\d+))?")
+LOG_INPUT_LINE = re.compile(r"on input line (\d+)")
+LOG_OUTPUT = re.compile(r"Output written on .*?\((\d+) pages?, (\d+) bytes\)")
+UNDEFINED_REFERENCE = re.compile(r"(Reference|Citation) .* undefined")
+
+# Per-category cap on stored details; counts are always complete
+MAX_LOG_ITEMS = 50
+
+
+def _warning_kind(source, font, message):
+    if UNDEFINED_REFERENCE.search(message):
+        return "undefined-reference"
+    if font:
+        return "font"
+    return source.split()[0].lower()
+
+
+def parse_latex_log(log_path):
+    """
+    Stream a pdflatex .log file and pull out what matters for a build report.
+
+    The log is read line by line and only a bounded amount is kept: up to
+    MAX_LOG_ITEMS errors and warnings, per-kind warning counts and the last
+    few lines. Source locations come from the "l.<n>" line after an error
+    or "on input line <n>" in a warning, and the file from the stack of
+    "(file" / ")" markers TeX prints as it opens and closes inputs.
+
+    Returns:
+        dict: errors, warnings, warning_counts, rerun, pages, bytes and tail
+    """
+    report = {"errors": [], "warnings": [], "warning_counts": {}, "rerun": False,
+              "pages": None, "bytes": None, "tail": []}
+    tail = deque(maxlen=20)
+    files = []
+    error = None
+    warning = None
+    previous = ""
+
+    def current_file():
+        return next((f for f in reversed(files) if f), None)
+
+    def add(kind_list, item):
+        if len(report[kind_list]) < MAX_LOG_ITEMS:
+            report[kind_list].append(item)
+
+    def finish_warning():
+        match = LOG_INPUT_LINE.search(warning["message"])
+        warning["line"] = int(match.group(1)) if match else None
+        add("warnings", warning)
+
+    try:
+        f = open(log_path, encoding="latin-1")
+    except OSError:
+        return report
+
+    with f:
+        for raw in f:
+            line = raw.rstrip("\n")
+            tail.append(line)
+            if RERUN_PATTERN.search(line):
+                report["rerun"] = True
+
+            if warning is not None:
+                if LOG_CONTINUATION.match(line) and line.strip():
+                    warning["message"] += " " + re.sub(r"^\(\S+\)\s*", "", line.strip())
+                    continue
+                finish_warning()
+                warning = None
+
+            if error is not None:
+                match = LOG_ERROR_LINE.match(line)
+                if match:
+                    error["line"] = int(match.group(1))
+                    error["context"] = match.group(2).strip()
+                    add("errors", error)
+                    error = None
+                    continue
+
+            match = LOG_ERROR.match(line)
+            if match:
+                if error is not None:
+                    add("errors", error)
+                error = {"message": match.group(1), "file": current_file(), "line": None, "context": ""}
+                continue
+
+            match = LOG_WARNING.match(line)
+            if match:
+                kind = _warning_kind(match.group(1), match.group(2), match.group(3))
+                report["warning_counts"][kind] = report["warning_counts"].get(kind, 0) + 1
+                warning = {"kind": kind, "source": match.group(1), "message": match.group(3),
+                           "file": current_file()}
+                continue
+
+            match = LOG_BOX.match(line)
+            if match:
+                kind = match.group(1).lower()
+                report["warning_counts"][kind] = report["warning_counts"].get(kind, 0) + 1
+                add("warnings", {"kind": kind, "source": "TeX", "message": line.strip(),
+                                 "file": current_file(),
+                                 "line": int(match.group(3)) if match.group(3) else None})
+
+            # "Output written on ..." may be wrapped onto the next line
+            match = LOG_OUTPUT.search(previous + line)
+            if match:
+                report["pages"] = int(match.group(1))
+                report["bytes"] = int(match.group(2))
+            previous = line
+
+            for token in LOG_FILE_TOKEN.finditer(line):
+                if token.group(0) == ")":
+                    if files:
+                        files.pop()
+                else:
+                    name = token.group(1)
+                    files.append(name if ("." in name or "/" in name) else None)
+
+    if warning is not None:
+        finish_warning()
+    if error is not None:
+        add("errors", error)
+    report["tail"] = list(tail)
+    return report
+
+
+def write_build_report(report_dir, results, elapsed, engine_version, shard=None):
+    """
+    Write the batch results as build-report.json and a JUnit-style
+    build-report.xml (one testcase per document), so CI can chart build
+    times and surface failures. A shard build also records its shard plan,
+    which merge_shards uses to check the shards fit together.
+    """
+    documents = []
+    for r in results:
+        log = r.get("log") or {}
+        documents.append({
+            "rel_path": r["rel_path"],
+            "status": r["status"],
+            "seconds": round(r["seconds"], 3),
+            "passes": r.get("passes", 0),
+            "format": bool(r.get("format")),
+            "pages": log.get("pages"),
+            "bytes": log.get("bytes"),
+            "errors": log.get("errors", []),
+            "warnings": log.get("warnings", []),
+            "warning_counts": log.get("warning_counts", {}),
+            "optimize": r.get("optimize"),
+        })
+
+    report = {
+        "generated": datetime.datetime.now().isoformat(timespec="seconds"),
+        "engine": engine_version,
+        "seconds": round(elapsed, 3),
+        "documents": documents,
+        "slowest": [d["rel_path"] for d in sorted(documents, key=lambda d: d["seconds"], reverse=True)[:10]
+                    if d["status"] != "skipped"],
+    }
+    if shard is not None:
+        report["shard"] = shard
+    write_report_files(report_dir, report)
+
+
+def write_report_files(report_dir, report):
+    """Write a report dict as build-report.json and build-report.xml"""
+    os.makedirs(report_dir, exist_ok=True)
+    documents = report["documents"]
+    elapsed = report["seconds"]
+    tmp_path = os.path.join(report_dir, REPORT_NAME + ".json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1)
+    os.replace(tmp_path, os.path.join(report_dir, REPORT_NAME + ".json"))
+
+    suite = ET.Element("testsuite", {
+        "name": "pdflatex",
+        "tests": str(len(documents)),
+        "failures": str(sum(d["status"] == "failed" for d in documents)),
+        "skipped": str(sum(d["status"] == "skipped" for d in documents)),
+        "time": f"{elapsed:.3f}",
+    })
+    for d in documents:
+        classname, name = os.path.split(d["rel_path"])
+        case = ET.SubElement(suite, "testcase", {
+            "classname": classname.replace("/", ".") or "root",
+            "name": name,
+            "time": f"{d['seconds']:.3f}",
+        })
+        if d["status"] == "skipped":
+            ET.SubElement(case, "skipped", {"message": "up to date"})
+        elif d["status"] != "ok":
+            message = d["errors"][0]["message"] if d["errors"] else d["status"]
+            failure = ET.SubElement(case, "failure", {"message": message})
+            failure.text = "\n".join(
+                f"{e['file'] or name}:{e['line'] or '?'}: {e['message']} {e['context']}".rstrip()
+                for e in d["errors"]
+            )
+        if d["warnings"]:
+            out = ET.SubElement(case, "system-out")
+            out.text = "\n".join(f"[{w['kind']}] {w['message']}" for w in d["warnings"])
+    ET.ElementTree(suite).write(os.path.join(report_dir, REPORT_NAME + ".xml"),
+                                encoding="utf-8", xml_declaration=True)
+
+
+# ============================================================================
+# PREAMBLE FORMAT CACHE
+# ============================================================================
+
+def read_preamble_prefix(tex_path):
+    """
+    Return the leading \\documentclass/\\usepackage block of a document as a
+    list of whitespace-normalized commands, or None if the file does not
+    start with \\documentclass.
+
+    Only this block goes into a shared format; anything after it (\\title,
+    \\geometry{...}, \\newcommand) differs per document and is still
+    processed normally on every run.
+    """
+    try:
+        with open(tex_path, encoding="utf-8", errors="ignore") as f:
+            text = strip_tex_comments(f.read())
+    except OSError:
+        return None
+
+    text = text.split("\\begin{document}", 1)[0]
+    prefix = []
+    pos = 0
+    while True:
+        while pos < len(text) and text[pos].isspace():
+            pos += 1
+        match = PACKAGE_PATTERN.match(text, pos)
+        if not match:
+            break
+        prefix.append(" ".join(match.group(0).split()))
+        pos = match.end()
+
+    if not prefix or not prefix[0].startswith("\\documentclass"):
+        return None
+    return prefix
+
+
+def format_key(prefix, tex_dir, engine_version):
+    """
+    Key a format on its preamble and the TeX distribution. If the preamble
+    loads a local .sty/.cls, the directory and that file's contents are
+    part of the key too, since the same text means different code there.
+    """
+    local = []
+    for line in prefix:
+        match = PACKAGE_PATTERN.match(line)
+        ext = ".cls" if match.group(1) == "documentclass" else ".sty"
+        for name in match.group(2).split(","):
+            path = _resolve(tex_dir, name.strip(), [ext])
+            if path:
+                local.append((os.path.abspath(path), file_digest(path, {})))
+
+    payload = [prefix, engine_version, local]
+    return hashlib.sha256(json.dumps(payload).encode("utf-8")).hexdigest()[:16]
+
+
+def dump_format(prefix, tex_dir, cache_dir, key):
+    """
+    Build <cache_dir>/<key>.fmt from a preamble with `pdflatex -ini`.
+
+    The format is dumped right after the packages load, with \\documentclass
+    redefined to a no-op. Documents compiled against it re-run their own
+    \\documentclass and \\usepackage lines harmlessly (LaTeX skips packages
+    that are already loaded with the same options) and pay nothing for
+    package loading.
+
+    Returns:
+        str: Path of the format file, or None if it could not be dumped
+    """
+    fmt_path = os.path.join(cache_dir, key + ".fmt")
+    failed_marker = os.path.join(cache_dir, key + ".failed")
+    if os.path.exists(fmt_path):
+        return fmt_path
+    if os.path.exists(failed_marker):
+        return None
+
+    build_dir = tempfile.mkdtemp(prefix=f".{key}-", dir=cache_dir)
+    source = os.path.join(build_dir, key + ".tex")
+    with open(source, "w", encoding="utf-8") as f:
+        f.write("\n".join(prefix))
+        f.write("\n\\makeatletter\\renewcommand\\documentclass[2][]{}\\makeatother\n\\dump\n")
+
+    try:
+        subprocess.run(
+            ['pdflatex', '-ini', '-interaction=nonstopmode', '-halt-on-error',
+             f'-jobname={key}', '-output-directory', build_dir, '&pdflatex', source],
+            cwd=tex_dir,
+            check=True,
+            capture_output=True
+        )
+        os.replace(os.path.join(build_dir, key + ".fmt"), fmt_path)
+        return fmt_path
+    except (subprocess.CalledProcessError, OSError):
+        # Some preambles cannot be dumped; remember that so we don't retry
+        # until the preamble or the engine changes.
+        open(failed_marker, "w").close()
+        return None
+    finally:
+        shutil.rmtree(build_dir, ignore_errors=True)
+
+
+def prepare_formats(pending, cache_root, engine_version, executor):
+    """
+    Group pending documents by preamble and dump one format per group.
+
+    Sets job["format"] to the format path (or None) for every job. Formats
+    live in a subdirectory of cache_root per engine version, since they are
+    unusable by any other; directories of other engine versions are dropped.
+    """
+    engine_dir = hashlib.sha256(engine_version.encode("utf-8")).hexdigest()[:16]
+    cache_dir = os.path.join(cache_root, engine_dir)
+    if os.path.isdir(cache_root):
+        for name in os.listdir(cache_root):
+            if name != engine_dir:
+                shutil.rmtree(os.path.join(cache_root, name), ignore_errors=True)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    groups = {}
+    for job in pending:
+        job["format"] = None
+        tex_dir = os.path.dirname(job["tex_path"])
+        prefix = read_preamble_prefix(job["tex_path"])
+        if prefix is None:
+            continue
+        key = format_key(prefix, tex_dir, engine_version)
+        groups.setdefault(key, (prefix, tex_dir, []))[2].append(job)
+
+    print(f"Preparing {len(groups)} preamble format(s) for {len(pending)} document(s)...")
+    futures = {
+        executor.submit(dump_format, prefix, tex_dir, cache_dir, key): members
+        for key, (prefix, tex_dir, members) in groups.items()
+    }
+    for future in as_completed(futures):
+        fmt_path = future.result()
+        for job in futures[future]:
+            job["format"] = fmt_path
+
+
+# ============================================================================
+# PDF OPTIMIZATION
+# ============================================================================
+
+# Recompress every stream at the highest level, pack objects into object
+# streams and linearize for fast first-page display
+QPDF_OPTIONS = ["--recompress-flate", "--compression-level=9", "--object-streams=generate", "--linearize"]
+
+# qpdf exits with 3 when it succeeded with warnings
+QPDF_WARNING_EXIT = 3
+
+
+def optimize_pdf(pdf_path):
+    """
+    Rewrite a freshly built PDF in place with qpdf.
+
+    Font subsets are embedded per document, so only the streams inside each
+    PDF get smaller; identical fonts across documents stay duplicated.
+
+    Returns:
+        dict: before/after sizes and seconds, or an "error" if qpdf failed
+        (the original PDF is then left as it was)
+    """
+    start = time.perf_counter()
+    before = os.path.getsize(pdf_path)
+    tmp_path = pdf_path + ".qpdf.tmp"
+    proc = subprocess.run(["qpdf"] + QPDF_OPTIONS + [pdf_path, tmp_path],
+                          stdin=subprocess.DEVNULL, capture_output=True, text=True)
+    if proc.returncode not in (0, QPDF_WARNING_EXIT) or not os.path.exists(tmp_path):
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        message = (proc.stderr.strip().splitlines() or [f"exit status {proc.returncode}"])[-1]
+        return {"error": message, "seconds": round(time.perf_counter() - start, 3)}
+
+    os.replace(tmp_path, pdf_path)
+    return {"before": before, "after": os.path.getsize(pdf_path),
+            "seconds": round(time.perf_counter() - start, 3)}
+
+
+def format_bytes(size):
+    """1536 -> '1.5 KB'"""
+    for unit in ("B", "KB", "MB"):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+# ============================================================================
+# BUILD
+# ============================================================================
+
+class BuildCancelled(Exception):
+    """Raised inside a compile job when its cancel event is set"""
+
+
+def default_aux_cache_root():
+    """User cache directory for persisted aux files, outside any output tree"""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "convert_tex_to_pdf", "aux")
+
+
+def default_format_cache_root():
+    """User cache directory for preamble formats, outside any output tree"""
+    return os.path.join(os.path.dirname(default_aux_cache_root()), "formats")
+
+
+def default_scratch_root():
+    """RAM-backed /dev/shm when it is usable, otherwise the system temp dir"""
+    if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+        return "/dev/shm"
+    return tempfile.gettempdir()
+
+
+def publish_file(src, dest):
+    """
+    Move a finished file into place atomically.
+
+    Readers of dest see either the old file or the complete new one, never
+    a partial write. A plain rename does this on one filesystem; from a
+    tmpfs scratch dir the file is first copied next to dest and then
+    renamed over it.
+    """
+    try:
+        os.replace(src, dest)
+        return
+    except OSError:
+        pass
+
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(dest)}.", dir=os.path.dirname(dest))
+    try:
+        with os.fdopen(fd, "wb") as out, open(src, "rb") as f:
+            shutil.copyfileobj(f, out)
+            out.flush()
+            os.fsync(out.fileno())
+        shutil.copymode(src, tmp_path)
+        os.replace(tmp_path, dest)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def make_job(tex_root, pdf_root, rel_path, scanned_deps, digests=None):
+    """
+    Describe one root document to compile. digests holds the input digests
+    taken when the document was found stale, which its result is keyed on.
+    """
+    relative_dir, filename = os.path.split(rel_path)
+    return {
+        "tex_path": os.path.join(tex_root, rel_path),
+        "tex_root": tex_root,
+        "pdf_dir": os.path.join(pdf_root, relative_dir),
+        "base_name": os.path.splitext(filename)[0],
+        "rel_path": rel_path,
+        "scanned_dependencies": scanned_deps,
+        "digests": {} if digests is None else digests,
+    }
+
+
+def find_stale_documents(tex_root, pdf_root, manifest, engine_version, timings=None, shard=None):
+    """
+    Split the root documents of the .tex tree into documents that need
+    compiling and documents whose PDF is already up to date.
+
+    A document is up to date when its PDF exists and its build key matches
+    the one stored in the manifest by the last successful build. The key
+    covers the scanned dependency closure plus whatever pdflatex recorded
+    reading last time, so a change anywhere in the closure forces a build.
+
+    With shard set (a dict from make_shard), only the documents assigned to
+    that shard are considered, and the full plan is stored in shard["plan"].
+
+    Returns:
+        tuple: (jobs, skipped) where jobs is a list of job dicts and skipped
+        is a list of result dicts with status "skipped"
+    """
+    timings = {} if timings is None else timings
+    jobs = []
+    skipped = []
+    digests = {}
+    documents = manifest["documents"]
+
+    start = time.perf_counter()
+    graph, fragments = build_dependency_graph(tex_root)
+    print(f"Found {len(graph)} root document(s) and {len(fragments)} fragment(s).\n")
+    timings["scan"] = time.perf_counter() - start
+
+    if shard is not None:
+        graph = select_shard(graph, shard)
+
+    start = time.perf_counter()
+
+    for rel_path, scanned_deps in graph.items():
+        job = make_job(tex_root, pdf_root, rel_path, scanned_deps, digests)
+        pdf_filepath = os.path.join(job["pdf_dir"], job["base_name"] + ".pdf")
+
+        entry = documents.get(rel_path, {})
+        dependencies = sorted(set(scanned_deps) | set(entry.get("dependencies", [])))
+        key = build_key(tex_root, job["tex_path"], dependencies, engine_version, digests)
+
+        if os.path.exists(pdf_filepath) and entry.get("key") == key:
+            # Nothing in the dependency closure has changed. No need to compile.
+            print(f"Skipping (Up-to-date): {os.path.basename(rel_path)}")
+            skipped.append({"rel_path": rel_path, "status": "skipped", "seconds": 0.0})
+            continue
+
+        jobs.append(job)
+
+    timings["staleness"] = time.perf_counter() - start
+    return jobs, skipped
+
+
+def run_pdflatex(cmd, cwd, cancel=None):
+    """
+    Run one pdflatex command, killing it early if cancel gets set.
+
+    The terminal output is discarded; everything in it is also in the .log
+    file, which parse_latex_log reads from disk.
+
+    Raises:
+        subprocess.CalledProcessError: On a non-zero exit
+        BuildCancelled: If cancel was set while pdflatex was running
+    """
+    proc = subprocess.Popen(cmd, cwd=cwd, stdin=subprocess.DEVNULL,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    while True:
+        try:
+            returncode = proc.wait(timeout=0.2)
+            break
+        except subprocess.TimeoutExpired:
+            if cancel is not None and cancel.is_set():
+                proc.kill()
+                proc.wait()
+                raise BuildCancelled()
+
+    if returncode:
+        raise subprocess.CalledProcessError(returncode, cmd)
+
+
+def run_passes(job, build_dir, fmt_path, options, result):
+    """
+    Run pdflatex on a job until its cross-references converge (or exactly
+    options["fixed_passes"] times), counting passes in result["passes"].
+
+    Raises:
+        subprocess.CalledProcessError: If a pass fails
+        BuildCancelled: If job["cancel"] was set mid-pass
+    """
+    fixed_passes = options.get("fixed_passes")
+    max_passes = fixed_passes or options.get("max_passes", DEFAULT_MAX_PASSES)
+    format_option = [f'-fmt={fmt_path}'] if fmt_path else []
+
+    before = read_aux_state(build_dir, job["base_name"])
+    while result["passes"] < max_passes:
+        result["passes"] += 1
+        run_pdflatex(
+            ['pdflatex'] + format_option + PDFLATEX_OPTIONS
+            + ['-output-directory', build_dir, os.path.basename(job["tex_path"])],
+            cwd=os.path.dirname(job["tex_path"]),
+            cancel=job.get("cancel")
+        )
+        after = read_aux_state(build_dir, job["base_name"])
+        if not fixed_passes and not needs_another_pass(build_dir, job["base_name"], before, after):
+            break
+        before = after
+
+
+def compile_document(job, options):
+    """
+    Compile one document, running pdflatex until its cross-references
+    converge (or exactly options["fixed_passes"] times, if set).
+
+    Each job writes its .aux/.log/... files into its own private build
+    directory, so concurrent jobs never touch each other's intermediate
+    files. The directory lives under options["scratch_root"] (e.g. a tmpfs)
+    if set, otherwise next to the output PDF; either way it is removed in
+    one step afterwards. Only a finished PDF is published into the output
+    tree, atomically, so an interrupted or failed build leaves the previous
+    PDF untouched.
+
+    With options["optimize"] set, the finished PDF is rewritten by qpdf
+    (see optimize_pdf) in the build dir before it is published.
+
+    With options["aux_cache"] set, the previous successful build's
+    .aux/.toc/.out files are restored into the build dir first, so a small
+    edit usually converges in a single pass; the new state is saved back
+    to the cache afterwards and never left in the output tree. The in-tree
+    files pdflatex read (its -recorder output) are merged with the scanned
+    dependency closure and returned with their digests as of the start of
+    the build (see input_digests), so the manifest can key the next build
+    on them.
+
+    If job["format"] names a cached preamble format, the passes run against
+    it; should that fail, the document is rebuilt once without it. If
+    job["cancel"] (a threading.Event) is set, the running pass is killed and
+    the result has status "cancelled".
+
+    Args:
+        job: Job dict from make_job
+        options: Build options (max_passes, fixed_passes, scratch_root, aux_cache, optimize)
+
+    Raises:
+        FileNotFoundError: If pdflatex is not installed (convert_tex_to_pdf_smart
+            checks for it before starting any job)
+    """
+    start = time.perf_counter()
+    started = time.time()
+    os.makedirs(job["pdf_dir"], exist_ok=True)
+    build_dir = tempfile.mkdtemp(prefix=f".{job['base_name']}-",
+                                 dir=options.get("scratch_root") or job["pdf_dir"])
+    result = {"rel_path": job["rel_path"], "status": "ok", "passes": 0,
+              "format": job.get("format"), "log": None, "aux_restored": False}
+    aux_cache = options.get("aux_cache")
+
+    try:
+        try:
+            if aux_cache:
+                result["aux_restored"] = restore_aux_state(aux_cache, job["tex_path"], build_dir,
+                                                           job["base_name"])
+            run_passes(job, build_dir, result["format"], options, result)
+        except subprocess.CalledProcessError:
+            if not result["format"] and not result["aux_restored"]:
+                raise
+            # The shared format or the stale aux state may not suit this
+            # document any more; build it once more from scratch
+            shutil.rmtree(build_dir, ignore_errors=True)
+            os.makedirs(build_dir)
+            result["passes"] = 0
+            result["format"] = None
+            result["aux_restored"] = False
+            run_passes(job, build_dir, None, options, result)
+
+        built_pdf = os.path.join(build_dir, job["base_name"] + ".pdf")
+        if not os.path.exists(built_pdf):
+            # pdflatex can exit cleanly without writing any pages
+            result["status"] = "failed"
+            return result
+        if options.get("optimize"):
+            result["optimize"] = optimize_pdf(built_pdf)
+        publish_file(built_pdf, os.path.join(job["pdf_dir"], job["base_name"] + ".pdf"))
+        recorded = read_recorded_inputs(
+            os.path.join(build_dir, job["base_name"] + ".fls"), job["tex_root"], job["tex_path"]
+        )
+        result["dependencies"] = sorted(set(recorded) | set(job["scanned_dependencies"]))
+        result["digests"] = input_digests(job["tex_root"], job["tex_path"], result["dependencies"],
+                                          job["digests"], started)
+        if aux_cache:
+            save_aux_state(aux_cache, job["tex_path"], build_dir, job["base_name"])
+
+    except subprocess.CalledProcessError:
+        result["status"] = "failed"
+
+    except BuildCancelled:
+        result["status"] = "cancelled"
+
+    finally:
+        if result["status"] != "cancelled":
+            result["log"] = parse_latex_log(os.path.join(build_dir, job["base_name"] + ".log"))
+        cleanup_start = time.perf_counter()
+        shutil.rmtree(build_dir, ignore_errors=True)
+        result["cleanup_seconds"] = time.perf_counter() - cleanup_start
+        result["seconds"] = time.perf_counter() - start
+
+    return result
+
+
+def record_result(job, result, manifest, tex_root, engine_version):
+    """Store a finished job in the manifest and print its outcome"""
+    if result["status"] == "ok":
+        # Key on the inputs pdflatex really read, as they were before it
+        # read them, so the next run notices edits to shared files as well
+        # as to the document, including edits made during this build.
+        manifest["documents"][job["rel_path"]] = {
+            "key": build_key(tex_root, job["tex_path"], result["dependencies"],
+                             engine_version, result["digests"]),
+            "dependencies": result["dependencies"],
+            "seconds": round(result["seconds"], 3),
+            "passes": result["passes"],
+        }
+        optimized = result.get("optimize") or {}
+        if "after" in optimized:
+            note = (f", optimized {format_bytes(optimized['before'])} -> "
+                    f"{format_bytes(optimized['after'])}")
+        elif "error" in optimized:
+            note = f", not optimized: {optimized['error']}"
+        else:
+            note = ""
+        print(f"  -> Created: {job['base_name']}.pdf "
+              f"({result['passes']} pass(es), {result['seconds']:.1f}s{note})")
+    elif result["status"] == "cancelled":
+        print(f"  -> Cancelled: {job['rel_path']}")
+    else:
+        log = result["log"] or {"errors": [], "tail": []}
+        print(f"  -> ERROR: Failed to compile {job['rel_path']}.")
+        print("=" * 20 + " LaTeX Error Log " + "=" * 20)
+        for error in log["errors"]:
+            print(f"{error['file'] or job['rel_path']}:{error['line'] or '?'}: {error['message']}")
+            if error["context"]:
+                print(f"    {error['context']}")
+        if not log["errors"]:
+            print("\n".join(log["tail"]))
+        print("=" * 57)
+
+
+def build_options(max_passes, fixed_passes, scratch_dir, aux_cache, optimize=False, format_cache=None):
+    """Resolve the compile options shared by batch and watch mode"""
+    if optimize and shutil.which("qpdf") is None:
+        print("Warning: 'qpdf' not found; PDFs will be published unoptimized.")
+        optimize = False
+    return {
+        "max_passes": max_passes,
+        "fixed_passes": fixed_passes,
+        "scratch_root": default_scratch_root() if scratch_dir == "auto" else scratch_dir,
+        "aux_cache": default_aux_cache_root() if aux_cache == "auto" else aux_cache,
+        "format_cache": default_format_cache_root() if format_cache in (True, "auto") else format_cache,
+        "optimize": optimize,
+    }
+
+
+def print_summary(results, elapsed):
+    """Print the final batch report with one line per compiled document"""
+    compiled = [r for r in results if r["status"] != "skipped"]
+    failed = [r for r in compiled if r["status"] == "failed"]
 
     print("\n" + "=" * 30)
     print(f"Batch Complete.")
-    print(f"Files Compiled: {files_processed}")
-    print(f"Files Skipped:  {files_skipped}")
+    print(f"Files Compiled: {len(compiled) - len(failed)}")
+    print(f"Files Failed:   {len(failed)}")
+    print(f"Files Skipped:  {len(results) - len(compiled)}")
+    optimized = [r["optimize"] for r in compiled if "after" in (r.get("optimize") or {})]
+    if optimized:
+        saved = sum(o["before"] - o["after"] for o in optimized)
+        print(f"Bytes Saved:    {format_bytes(saved)} over {len(optimized)} optimized PDF(s)")
+    print(f"Wall Time:      {elapsed:.1f}s")
+    print("=" * 30)
+
+    for r in sorted(compiled, key=lambda r: r["seconds"], reverse=True):
+        warnings = sum((r.get("log") or {}).get("warning_counts", {}).values())
+        print(f"  {r['status']:<7} {r['seconds']:6.1f}s  {r.get('passes', 0)} pass(es)  "
+              f"{warnings:3d} warning(s)  {r['rel_path']}")
+
+
+def convert_tex_to_pdf_smart(tex_root, pdf_root, jobs=None, max_passes=DEFAULT_MAX_PASSES,
+                             fixed_passes=None, format_cache=None, report_dir=None,
+                             scratch_dir=None, aux_cache=None, timings=None, shard=None,
+                             shard_costs=None, optimize=False, options=None):
+    """
+    Compile every stale .tex file under tex_root into the mirrored pdf_root.
+
+    Args:
+        tex_root: Source tree of .tex files
+        pdf_root: Output tree for the PDFs
+        jobs: Number of documents compiled concurrently (default: CPU count)
+        max_passes: Upper bound on pdflatex passes while waiting for convergence
+        fixed_passes: Run exactly this many passes instead of checking convergence
+        format_cache: Directory of precompiled per-preamble .fmt files to
+            compile against; "auto" (or True) uses the user cache dir (default: off)
+        report_dir: Where to write build-report.json/.xml (default: pdf_root)
+        scratch_dir: Root for per-job build directories; "auto" picks a tmpfs
+            when available (default: build next to each output PDF)
+        aux_cache: Directory to persist aux files between builds; "auto" uses
+            the user cache dir (default: off)
+        timings: Optional dict filled with per-phase wall times in seconds
+            (scan, staleness, formats, compile, cleanup, finalize); cleanup
+            is summed over jobs
+        shard: (K, N) to build only the K-th of N cost-balanced shards
+        shard_costs: Manifest or build report whose per-document seconds
+            balance the shards; every shard must be given the same file
+            (default: every document counts the same, since each shard's
+            own manifest would give each shard a different plan)
+        optimize: Recompress and linearize each newly built PDF with qpdf
+            before publishing it; bytes saved are reported per document
+        options: Options already resolved by build_options, used instead of
+            max_passes, fixed_passes, scratch_dir, aux_cache, optimize and
+            format_cache (watch mode resolves them once for all its builds)
+
+    Returns:
+        list: One result dict per document built or skipped
+    """
+    jobs = jobs or os.cpu_count() or 1
+    if options is None:
+        options = build_options(max_passes, fixed_passes, scratch_dir, aux_cache, optimize, format_cache)
+    timings = {} if timings is None else timings
+    start = time.perf_counter()
+
+    print(f"Scanning directories...\nFrom: {tex_root}\nTo:   {pdf_root}\n")
+
+    manifest = load_manifest(pdf_root)
+    engine_version = get_engine_version()
+    if shard is not None:
+        shard = make_shard(*shard, shard_costs)
+    pending, results = find_stale_documents(tex_root, pdf_root, manifest, engine_version, timings,
+                                            shard=shard)
+
+    if pending and engine_version is None:
+        print("CRITICAL ERROR: 'pdflatex' command not found. Install LaTeX.")
+        return results
+
+    print(f"\nCompiling {len(pending)} document(s) with {jobs} worker(s)...")
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        try:
+            phase_start = time.perf_counter()
+            if options["format_cache"] and pending and engine_version is not None:
+                prepare_formats(pending, options["format_cache"], engine_version, executor)
+            timings["formats"] = time.perf_counter() - phase_start
+
+            phase_start = time.perf_counter()
+            futures = {executor.submit(compile_document, job, options): job for job in pending}
+
+            for future in as_completed(futures):
+                job = futures[future]
+                result = future.result()
+                results.append(result)
+                record_result(job, result, manifest, tex_root, engine_version)
+
+            timings["compile"] = time.perf_counter() - phase_start
+            timings["cleanup"] = sum(r.get("cleanup_seconds", 0.0) for r in results)
+        except BaseException:
+            # Ctrl+C or a crash: let running jobs finish, but start no more
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        finally:
+            # Whatever finished is recorded, even if the batch did not
+            save_manifest(pdf_root, manifest)
+
+    phase_start = time.perf_counter()
+    elapsed = time.perf_counter() - start
+    write_build_report(report_dir or pdf_root, results, elapsed, engine_version,
+                       shard=shard and shard_report(shard))
+    timings["finalize"] = time.perf_counter() - phase_start
+    print_summary(results, elapsed)
+    return results
+
+
+# ============================================================================
+# SHARDING
+# ============================================================================
+
+SHARD_PATTERN = re.compile(r"^\s*(\d+)\s*/\s*(\d+)\s*$")
+
+# Assumed cost of a document no previous build has timed, when none has been
+DEFAULT_DOCUMENT_SECONDS = 1.0
+
+
+def parse_shard(text):
+    """'K/N' -> (K, N), with shards numbered from 1"""
+    match = SHARD_PATTERN.match(text)
+    if not match or not 1 <= int(match.group(1)) <= int(match.group(2)):
+        raise argparse.ArgumentTypeError(f"Expected K/N with 1 <= K <= N, got {text!r}")
+    return int(match.group(1)), int(match.group(2))
+
+
+def load_shard_costs(path):
+    """
+    Per-document compile seconds from a build manifest or a build report.
+
+    Returns:
+        dict: {rel_path: seconds}; empty if the file is missing
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    documents = data.get("documents", {})
+    if isinstance(documents, dict):  # Build manifest
+        return {rel_path: entry["seconds"] for rel_path, entry in documents.items() if "seconds" in entry}
+    return {d["rel_path"]: d["seconds"] for d in documents if d["status"] != "skipped"}
+
+
+def plan_shards(rel_paths, costs, count):
+    """
+    Assign documents to count shards with roughly equal total compile time.
+
+    Longest-processing-time-first: documents are taken most expensive first
+    and each goes to the shard with the least work so far. Costs, ties and
+    the order of rel_paths are all resolved deterministically, so every
+    shard computes the same plan from the same tree and costs. Documents
+    without a recorded cost are assumed to take the median known time.
+
+    Returns:
+        dict: {rel_path: shard number, from 1}
+    """
+    known = sorted(costs[p] for p in rel_paths if p in costs)
+    default = known[len(known) // 2] if known else DEFAULT_DOCUMENT_SECONDS
+
+    loads = [(0.0, index) for index in range(1, count + 1)]
+    plan = {}
+    for rel_path in sorted(rel_paths, key=lambda p: (-costs.get(p, default), p)):
+        load, index = heapq.heappop(loads)
+        plan[rel_path] = index
+        heapq.heappush(loads, (load + costs.get(rel_path, default), index))
+    return plan
+
+
+def make_shard(index, count, costs_path=None):
+    """
+    Describe shard index of count, balanced with the costs in costs_path.
+    Without a costs file every document is assumed to cost the same.
+    """
+    return {"index": index, "count": count, "costs_path": costs_path,
+            "costs": load_shard_costs(costs_path) if costs_path else {}, "plan": None}
+
+
+def select_shard(graph, shard):
+    """
+    Plan the shards for every root in graph and keep this shard's roots.
+
+    Returns:
+        dict: The subset of graph assigned to shard["index"]
+    """
+    plan = plan_shards(list(graph), shard["costs"], shard["count"])
+    shard["plan"] = plan
+    selected = {rel_path: deps for rel_path, deps in graph.items() if plan[rel_path] == shard["index"]}
+
+    estimates = shard_estimates(shard)
+    if shard["costs_path"]:
+        source = f"{len(shard['costs'])} timed by {os.path.basename(shard['costs_path'])}"
+    else:
+        source = "no --shard-costs, so every document counts the same"
+    print(f"Shard {shard['index']}/{shard['count']}: {len(selected)} of {len(graph)} document(s), "
+          f"~{estimates[shard['index'] - 1]:.1f}s of ~{sum(estimates):.1f}s ({source}).\n")
+    return selected
+
+
+def shard_estimates(shard):
+    """Estimated compile seconds of each shard under its plan"""
+    plan, costs = shard["plan"], shard["costs"]
+    known = sorted(costs[p] for p in plan if p in costs)
+    default = known[len(known) // 2] if known else DEFAULT_DOCUMENT_SECONDS
+    estimates = [0.0] * shard["count"]
+    for rel_path, index in plan.items():
+        estimates[index - 1] += costs.get(rel_path, default)
+    return estimates
+
+
+def shard_report(shard):
+    """The part of a shard that goes into its build report"""
+    return {"index": shard["index"], "count": shard["count"], "plan": shard["plan"],
+            "estimated_seconds": [round(s, 3) for s in shard_estimates(shard)]}
+
+
+def copy_published(src, dest):
+    """Copy a PDF into a merged tree atomically, skipping unchanged copies"""
+    src_stat = os.stat(src)
+    try:
+        dest_stat = os.stat(dest)
+        if (dest_stat.st_size, dest_stat.st_mtime_ns) == (src_stat.st_size, src_stat.st_mtime_ns):
+            return
+    except OSError:
+        pass
+
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(dest)}.", dir=os.path.dirname(dest))
+    os.close(fd)
+    try:
+        shutil.copy2(src, tmp_path)
+        os.replace(tmp_path, dest)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def merge_shards(shard_roots, pdf_root, report_dir=None):
+    """
+    Combine the PDF trees and build reports of a sharded build.
+
+    Each shard root must hold the build-report.json of a --shard run. The
+    shards must agree on the plan and cover shards 1..N exactly once; any
+    document built by more than one shard (overlap) or by none (missing,
+    including a planned PDF that isn't in its shard's tree) is reported.
+    Every other document's PDF and manifest entry are copied into pdf_root,
+    and a combined report is written to report_dir (default: pdf_root).
+
+    Returns:
+        dict: {"documents": merged count, "overlaps": [...], "missing": [...],
+        "problems": [messages]}
+    """
+    start = time.perf_counter()
+    problems = []
+    reports = []
+    for root in shard_roots:
+        try:
+            with open(os.path.join(root, REPORT_NAME + ".json"), encoding="utf-8") as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            problems.append(f"{root}: no readable {REPORT_NAME}.json")
+            continue
+        if "shard" not in report:
+            problems.append(f"{root}: report is not from a --shard build")
+            continue
+        reports.append((root, report))
+
+    plans = {json.dumps(r["shard"]["plan"], sort_keys=True) for _, r in reports}
+    counts = {r["shard"]["count"] for _, r in reports}
+    if len(plans) > 1 or len(counts) > 1:
+        problems.append("shards disagree on the plan (different trees, shard counts or cost files)")
+
+    indices = [r["shard"]["index"] for _, r in reports]
+    for index in sorted(set(indices)):
+        if indices.count(index) > 1:
+            problems.append(f"shard {index} given {indices.count(index)} times")
+    for count in counts:
+        for index in sorted(set(range(1, count + 1)) - set(indices)):
+            problems.append(f"shard {index}/{count} missing")
+
+    plan = {}
+    for _, report in reports:
+        plan.update(report["shard"]["plan"])
+    owners = {}
+    for root, report in reports:
+        for d in report["documents"]:
+            owners.setdefault(d["rel_path"], []).append(root)
+    overlaps = sorted(rel_path for rel_path, roots in owners.items() if len(roots) > 1)
+    missing = set(plan) - set(owners)
+
+    manifest = load_manifest(pdf_root)
+    documents = []
+    for root, report in reports:
+        shard_manifest = load_manifest(root)
+        for d in report["documents"]:
+            documents.append(d)
+            if d["rel_path"] in overlaps or d["status"] not in ("ok", "skipped"):
+                continue
+            pdf_rel = os.path.splitext(d["rel_path"])[0] + ".pdf"
+            src = os.path.join(root, pdf_rel)
+            if not os.path.exists(src):
+                missing.add(d["rel_path"])
+                continue
+            copy_published(src, os.path.join(pdf_root, pdf_rel))
+            if d["rel_path"] in shard_manifest["documents"]:
+                manifest["documents"][d["rel_path"]] = shard_manifest["documents"][d["rel_path"]]
+
+    for rel_path in overlaps:
+        problems.append(f"overlap: {rel_path} built by {', '.join(owners[rel_path])}")
+    for rel_path in sorted(missing):
+        problems.append(f"missing: {rel_path}")
+
+    documents.sort(key=lambda d: d["rel_path"])
+    elapsed = max((r["seconds"] for _, r in reports), default=0.0)
+    save_manifest(pdf_root, manifest)
+    write_report_files(report_dir or pdf_root, {
+        "generated": datetime.datetime.now().isoformat(timespec="seconds"),
+        "engine": next((r["engine"] for _, r in reports), None),
+        "seconds": elapsed,
+        "documents": documents,
+        "slowest": [d["rel_path"] for d in sorted(documents, key=lambda d: d["seconds"], reverse=True)[:10]
+                    if d["status"] != "skipped"],
+        "shards": [{"index": r["shard"]["index"], "root": root, "seconds": r["seconds"],
+                    "documents": len(r["documents"])} for root, r in reports],
+        "problems": problems,
+    })
+
+    print("\n" + "=" * 30)
+    print(f"Merge {'Complete' if not problems else 'Incomplete'}.")
+    print(f"Shards Merged:  {len(reports)}")
+    print(f"Documents:      {len(owners) - len(overlaps)}")
+    print(f"Overlaps:       {len(overlaps)}")
+    print(f"Missing:        {len(missing)}")
+    print(f"Merge Time:     {time.perf_counter() - start:.1f}s")
     print("=" * 30)
+    for root, r in sorted(reports, key=lambda item: item[1]["shard"]["index"]):
+        print(f"  shard {r['shard']['index']}/{r['shard']['count']}  {r['seconds']:6.1f}s  "
+              f"{len(r['documents']):4d} document(s)  {root}")
+    for problem in problems:
+        print(f"  -> {problem}")
+
+    return {"documents": len(owners) - len(overlaps), "overlaps": overlaps,
+            "missing": sorted(missing), "problems": problems}
+
+
+# ============================================================================
+# WATCH MODE
+# ============================================================================
+
+def snapshot_tree(tex_root):
+    """Map every file under tex_root to its (mtime_ns, size), for polling"""
+    index = {}
+    for dirpath, _, filenames in os.walk(tex_root):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            index[path] = (st.st_mtime_ns, st.st_size)
+    return index
+
+
+class ChangeForwarder(FileSystemEventHandler):
+    """Push the paths touched by watchdog file events onto a queue"""
+
+    # pdflatex opening and reading sources also raises events; only
+    # content changes matter
+    CHANGE_EVENTS = {"created", "modified", "moved", "deleted"}
+
+    def __init__(self, changes):
+        super().__init__()
+        self.changes = changes
+
+    def on_any_event(self, event):
+        if event.is_directory or event.event_type not in self.CHANGE_EVENTS:
+            return
+        self.changes.put(os.path.abspath(event.src_path))
+        if getattr(event, "dest_path", None):
+            self.changes.put(os.path.abspath(event.dest_path))
+
+
+def update_graph(changed, tex_root, graph, scans, manifest):
+    """
+    Apply a set of changed paths to the in-memory dependency graph.
+
+    Changed .tex files are rescanned (and may become or stop being roots),
+    then every root whose own file, scanned closure or recorded inputs
+    include a changed path gets its closure recomputed.
+
+    Returns:
+        set: Root documents (relative to tex_root) that need rebuilding
+    """
+    changed_rel = set()
+    affected = set()
+
+    for path in changed:
+        rel_path = os.path.relpath(path, tex_root).replace(os.sep, "/")
+        if rel_path.startswith(".."):
+            continue
+        changed_rel.add(rel_path)
+
+        if path.endswith(".tex"):
+            scans.pop(path, None)
+            if os.path.isfile(path):
+                scans[path] = scan_tex_file(path)
+            if path in scans and scans[path]["is_root"]:
+                graph.setdefault(rel_path, [])
+                affected.add(rel_path)
+            else:
+                graph.pop(rel_path, None)
+
+    for rel_path, deps in graph.items():
+        recorded = manifest["documents"].get(rel_path, {}).get("dependencies", [])
+        if rel_path in changed_rel or changed_rel.intersection(deps) or changed_rel.intersection(recorded):
+            affected.add(rel_path)
+
+    for rel_path in affected:
+        graph[rel_path] = dependency_closure(os.path.join(tex_root, rel_path), tex_root, scans)
+    return affected
+
+
+def watch_tree(tex_root, pdf_root, jobs=None, max_passes=DEFAULT_MAX_PASSES,
+               fixed_passes=None, format_cache=None, scratch_dir=None, aux_cache=None,
+               optimize=False):
+    """
+    Bring the PDF tree up to date, then keep rebuilding documents as their
+    sources change until interrupted with Ctrl+C.
+
+    The tree is scanned once; after that an in-memory dependency graph is
+    updated from file events (watchdog if installed, otherwise polling
+    mtimes every WATCH_POLL_SECONDS). Bursts of saves are debounced, and a
+    document that changes again while it is compiling has its running job
+    cancelled and restarted.
+    """
+    tex_root = os.path.abspath(tex_root)
+    jobs = jobs or os.cpu_count() or 1
+    options = build_options(max_passes, fixed_passes, scratch_dir, aux_cache, optimize, format_cache)
+
+    convert_tex_to_pdf_smart(tex_root, pdf_root, jobs=jobs, options=options)
+    engine_version = get_engine_version()
+    if engine_version is None:
+        return
+
+    manifest = load_manifest(pdf_root)
+    scans = {}
+    graph, _ = build_dependency_graph(tex_root, scans)
+    changes = queue.Queue()
+
+    observer = None
+    index = None
+    if Observer is not None:
+        observer = Observer()
+        observer.schedule(ChangeForwarder(changes), tex_root, recursive=True)
+        observer.start()
+        print("\nWatching for changes (file events). Press Ctrl+C to stop.")
+    else:
+        index = snapshot_tree(tex_root)
+        print(f"\nWatching for changes (polling every {WATCH_POLL_SECONDS:g}s; "
+              f"install watchdog for file events). Press Ctrl+C to stop.")
+
+    running = {}
+    dirty = set()
+    last_change = 0.0
+    next_poll = time.monotonic() + WATCH_POLL_SECONDS
+    executor = ThreadPoolExecutor(max_workers=jobs)
+
+    try:
+        while True:
+            if index is not None and time.monotonic() >= next_poll:
+                new_index = snapshot_tree(tex_root)
+                for path in index.keys() | new_index.keys():
+                    if index.get(path) != new_index.get(path):
+                        changes.put(path)
+                index = new_index
+                next_poll = time.monotonic() + WATCH_POLL_SECONDS
+
+            # Drain pending events; every new event restarts the debounce window
+            try:
+                path = changes.get(timeout=0.1)
+            except queue.Empty:
+                path = None
+            while path is not None:
+                dirty.add(path)
+                last_change = time.monotonic()
+                try:
+                    path = changes.get_nowait()
+                except queue.Empty:
+                    path = None
+
+            if dirty and time.monotonic() - last_change >= WATCH_DEBOUNCE_SECONDS:
+                affected = update_graph(dirty, tex_root, graph, scans, manifest)
+                dirty = set()
+
+                batch = []
+                for rel_path in sorted(affected):
+                    if rel_path in running:
+                        print(f"  -> Restarting: {rel_path}")
+                        running[rel_path][1]["cancel"].set()
+                    job = make_job(tex_root, pdf_root, rel_path, graph[rel_path])
+                    job["cancel"] = threading.Event()
+                    batch.append(job)
+
+                if options["format_cache"] and batch:
+                    prepare_formats(batch, options["format_cache"], engine_version, executor)
+                for job in batch:
+                    print(f"Processing: {job['rel_path']}")
+                    running[job["rel_path"]] = (executor.submit(compile_document, job, options), job)
+
+            for rel_path, (future, job) in list(running.items()):
+                if not future.done():
+                    continue
+                del running[rel_path]
+                result = future.result()
+                record_result(job, result, manifest, tex_root, engine_version)
+                if result["status"] == "ok":
+                    save_manifest(pdf_root, manifest)
+
+    except KeyboardInterrupt:
+        print("\nStopping watch mode...")
+
+    finally:
+        for _, job in running.values():
+            job["cancel"].set()
+        executor.shutdown(wait=True, cancel_futures=True)
+        if observer is not None:
+            observer.stop()
+            observer.join()
+        save_manifest(pdf_root, manifest)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compile the .tex tree into a mirrored .pdf tree.")
+    parser.add_argument("--tex-root", default=DEFAULT_TEX_ROOT, help="Source directory of .tex files")
+    parser.add_argument("--pdf-root", default=DEFAULT_PDF_ROOT, help="Output directory for PDFs")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count(),
+                        help="Documents compiled in parallel (default: CPU count)")
+    parser.add_argument("--max-passes", type=int, default=DEFAULT_MAX_PASSES,
+                        help="Most pdflatex passes to run while references converge")
+    parser.add_argument("--fixed-passes", type=int, default=None,
+                        help="Always run exactly this many passes (disables convergence checks)")
+    parser.add_argument("--format-cache", nargs="?", const="auto", default=None,
+                        help="Dump one .fmt per distinct preamble into this directory "
+                             "(no value: the user cache dir) and compile documents against it")
+    parser.add_argument("--report-dir", default=None,
+                        help="Directory for build-report.json/.xml (default: the PDF root)")
+    parser.add_argument("--scratch-dir", nargs="?", const="auto", default=None,
+                        help="Build in per-job scratch dirs under this path "
+                             "(no value: tmpfs if available) and publish PDFs atomically")
+    parser.add_argument("--aux-cache", nargs="?", const="auto", default=None,
+                        help="Persist .aux/.toc/.out between builds in this directory "
+                             "(no value: the user cache dir) so rebuilds start warm")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and rebuild documents whenever their sources change")
+    parser.add_argument("--optimize", action="store_true",
+                        help="Recompress, object-stream and linearize newly built PDFs with qpdf")
+    parser.add_argument("--shard", type=parse_shard, default=None, metavar="K/N",
+                        help="Build only the K-th of N shards, balanced by past compile times")
+    parser.add_argument("--shard-costs", default=None, metavar="PATH",
+                        help="Manifest or build-report.json to balance shards with; every shard "
+                             "must use the same one (default: count every document the same)")
+    parser.add_argument("--merge-shards", nargs="+", default=None, metavar="SHARD_ROOT",
+                        help="Merge the PDF trees and reports of shard builds into --pdf-root")
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    tex_directory = r"C:\Users\Computer\Documents\GitHub\MathTex\.tex"
-    pdf_directory = r"C:\Users\Computer\Documents\GitHub\MathTex\.pdf"
+    args = parse_args()
 
-    if not os.path.isdir(tex_directory):
-        print(f"Error: Source directory not found at '{tex_directory}'")
+    if args.merge_shards:
+        merged = merge_shards(args.merge_shards, args.pdf_root, report_dir=args.report_dir)
+        sys.exit(1 if merged["problems"] else 0)
+    elif not os.path.isdir(args.tex_root):
+        print(f"Error: Source directory not found at '{args.tex_root}'")
+    elif args.watch and args.shard:
+        print("Error: --shard is for batch builds and cannot be combined with --watch")
+    elif args.watch:
+        watch_tree(args.tex_root, args.pdf_root, jobs=args.jobs,
+                   max_passes=args.max_passes, fixed_passes=args.fixed_passes,
+                   format_cache=args.format_cache, scratch_dir=args.scratch_dir,
+                   aux_cache=args.aux_cache, optimize=args.optimize)
     else:
-        convert_tex_to_pdf_smart(tex_directory, pdf_directory)
\ No newline at end of file
+        convert_tex_to_pdf_smart(args.tex_root, args.pdf_root, jobs=args.jobs,
+                                 max_passes=args.max_passes, fixed_passes=args.fixed_passes,
+                                 format_cache=args.format_cache, report_dir=args.report_dir,
+                                 scratch_dir=args.scratch_dir, aux_cache=args.aux_cache,
+                                 shard=args.shard, shard_costs=args.shard_costs,
+                                 optimize=args.optimize)
@@ -0,0 +1,42 @@
+"""
+Tests for Visualizations/assemble_video.py: picking scene videos with and
+without render_scenes.py's scenes.json. Nothing here calls ffmpeg.
+"""
+
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "Visualizations"))
+
+import assemble_video as av
+
+
+def touch(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"")
+
+
+def test_without_manifest_videos_are_ordered_by_name(tmp_path):
+    video_dir = tmp_path / "videos"
+    for name in ("Scene02.mp4", "Scene01.mp4", "Video_Complete.mp4", "Scene03.tmp.mp4"):
+        touch(video_dir / name)
+
+    stem, segments, missing = av.scene_segments(str(video_dir))
+    assert [scene for scene, _ in segments] == ["Scene01", "Scene02"]
+    assert missing == []
+    assert stem + av.COMPLETE_SUFFIX == "Video_Complete.mp4"
+
+
+def test_without_manifest_scenes_fall_back_to_newest_notebook_render(tmp_path):
+    video_dir = tmp_path / "videos"
+    touch(video_dir / "Scene02.mp4")
+    touch(tmp_path / "jupyter" / "Scene01@2026-01-26@09-00-00.mp4")
+    touch(tmp_path / "jupyter" / "Scene01@2026-01-27@17-26-34.mp4")
+
+    _, segments, missing = av.scene_segments(str(video_dir), ["Scene01", "Scene02", "Scene03"])
+    assert segments == [
+        ("Scene01", str(tmp_path / "jupyter" / "Scene01@2026-01-27@17-26-34.mp4")),
+        ("Scene02", str(video_dir / "Scene02.mp4")),
+    ]
+    assert missing == ["Scene03"]
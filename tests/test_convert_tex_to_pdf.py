@@ -0,0 +1,440 @@
+"""
+Tests for convert_tex_to_pdf.py: build keys, staleness and batch result
+handling. pdflatex is replaced by benchmarks/stub_pdflatex.py, so these
+run without a TeX installation (POSIX only, for the shell shim).
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import convert_tex_to_pdf as ctp
+
+STUB_PDFLATEX = os.path.join(REPO_ROOT, "benchmarks", "stub_pdflatex.py")
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="pdflatex shim needs a POSIX shell")
+
+DOCUMENT = "\\documentclass{article}\n\\input{macros}\n\\begin{document}\n%s\n\\end{document}\n"
+
+
+@pytest.fixture
+def stub_pdflatex(tmp_path, monkeypatch):
+    """Put a pdflatex on PATH that runs the stub, except for sources marked \\nooutput,
+    which 'succeed' without writing a PDF"""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    shim = bin_dir / "pdflatex"
+    shim.write_text(
+        "#!/bin/sh\n"
+        'for arg; do last="$arg"; done\n'
+        'grep -qs "nooutput" "$last" && exit 0\n'
+        f'exec "{sys.executable}" "{STUB_PDFLATEX}" "$@"\n'
+    )
+    shim.chmod(0o755)
+    monkeypatch.setenv("PATH", str(bin_dir) + os.pathsep + os.environ.get("PATH", ""))
+
+
+def write_tree(root, documents):
+    """Write macros.tex plus one root document per {name: body}"""
+    root.mkdir()
+    (root / "macros.tex").write_text("\\newcommand{\\R}{\\mathbb{R}}\n")
+    for name, body in documents.items():
+        (root / name).write_text(DOCUMENT % body)
+
+
+def build(tex_root, pdf_root, **kwargs):
+    return ctp.convert_tex_to_pdf_smart(str(tex_root), str(pdf_root), jobs=2, **kwargs)
+
+
+def passes(results):
+    return {r["rel_path"]: r["passes"] for r in results}
+
+
+# ============================================================================
+# BUILD KEY
+# ============================================================================
+
+def test_build_key_tracks_dependency_contents(tmp_path):
+    tex_root = tmp_path / "tex"
+    write_tree(tex_root, {"a.tex": "A"})
+    tex_path = str(tex_root / "a.tex")
+
+    key = ctp.build_key(str(tex_root), tex_path, ["macros.tex"], "engine", {})
+    assert ctp.build_key(str(tex_root), tex_path, ["macros.tex"], "engine", {}) == key
+
+    os.utime(tex_root / "macros.tex", (0, 0))  # mtime alone doesn't matter
+    assert ctp.build_key(str(tex_root), tex_path, ["macros.tex"], "engine", {}) == key
+
+    (tex_root / "macros.tex").write_text("\\newcommand{\\R}{\\mathbf{R}}\n")
+    assert ctp.build_key(str(tex_root), tex_path, ["macros.tex"], "engine", {}) != key
+    assert ctp.build_key(str(tex_root), tex_path, ["macros.tex"], "other engine", {}) != key
+
+
+def test_build_key_ignores_dependency_order(tmp_path):
+    tex_root = tmp_path / "tex"
+    write_tree(tex_root, {"a.tex": "A"})
+    (tex_root / "other.tex").write_text("x")
+    tex_path = str(tex_root / "a.tex")
+    assert (ctp.build_key(str(tex_root), tex_path, ["macros.tex", "other.tex"], "e", {})
+            == ctp.build_key(str(tex_root), tex_path, ["other.tex", "macros.tex"], "e", {}))
+
+
+# ============================================================================
+# DEPENDENCY GRAPH
+# ============================================================================
+
+def test_graph_maps_roots_to_their_fragments(tmp_path):
+    tex_root = tmp_path / "tex"
+    write_tree(tex_root, {"a.tex": "\\input{parts/intro}", "b.tex": "% \\input{parts/intro}"})
+    (tex_root / "parts").mkdir()
+    (tex_root / "parts" / "intro.tex").write_text("\\includegraphics{plot}\n")
+    (tex_root / "parts" / "plot.png").write_bytes(b"")
+    (tex_root / "plot.png").write_bytes(b"")
+
+    graph, fragments = ctp.build_dependency_graph(str(tex_root))
+    assert fragments == ["macros.tex", "parts/intro.tex"]
+    # Paths resolve against the root's directory, as pdflatex does
+    assert graph == {"a.tex": ["macros.tex", "parts/intro.tex", "plot.png"],
+                     "b.tex": ["macros.tex"]}
+
+
+def test_fragment_edit_rebuilds_only_its_roots(tmp_path, stub_pdflatex):
+    tex_root, pdf_root = tmp_path / "tex", tmp_path / "pdf"
+    write_tree(tex_root, {"a.tex": "\\input{intro}", "b.tex": "B"})
+    (tex_root / "intro.tex").write_text("Intro\n")
+    build(tex_root, pdf_root)
+
+    (tex_root / "intro.tex").write_text("Intro, edited\n")
+    statuses = {r["rel_path"]: r["status"] for r in build(tex_root, pdf_root)}
+    assert statuses == {"a.tex": "ok", "b.tex": "skipped"}
+    assert not (pdf_root / "intro.pdf").exists()
+
+
+# ============================================================================
+# PASS CONVERGENCE
+# ============================================================================
+
+def test_passes_stop_once_the_aux_is_stable(tmp_path, stub_pdflatex):
+    tex_root, pdf_root = tmp_path / "tex", tmp_path / "pdf"
+    write_tree(tex_root, {"plain.tex": "No references", "labels.tex": "\\label{eq:one}"})
+    # A second pass only for the document whose first pass wrote labels;
+    # it leaves the .aux unchanged, so there is no third
+    assert passes(build(tex_root, pdf_root)) == {"plain.tex": 1, "labels.tex": 2}
+
+
+def test_passes_stop_at_max_passes(tmp_path, stub_pdflatex):
+    tex_root, pdf_root = tmp_path / "tex", tmp_path / "pdf"
+    write_tree(tex_root, {"rerun.tex": "\\stubrerun"})
+    assert passes(build(tex_root, pdf_root, max_passes=3)) == {"rerun.tex": 3}
+
+
+def test_fixed_passes_ignore_convergence(tmp_path, stub_pdflatex):
+    tex_root, pdf_root = tmp_path / "tex", tmp_path / "pdf"
+    write_tree(tex_root, {"plain.tex": "No references", "rerun.tex": "\\stubrerun"})
+    assert passes(build(tex_root, pdf_root, fixed_passes=2)) == {"plain.tex": 2, "rerun.tex": 2}
+
+
+# ============================================================================
+# LOG PARSING AND REPORTS
+# ============================================================================
+
+LOG = r"""This is pdfTeX, Version 3.141592653-2.6-1.40.25 (TeX Live 2023) (preloaded format=pdflatex)
+ restricted \write18 enabled.
+**main.tex
+(./main.tex
+LaTeX2e <2022-11-01> patch level 1
+(/usr/share/texlive/texmf-dist/tex/latex/base/article.cls
+Document Class: article 2022/07/02 v1.4n Standard LaTeX document class
+(/usr/share/texlive/texmf-dist/tex/latex/base/size10.clo
+File: size10.clo 2022/07/02 v1.4n Standard LaTeX file (size option)
+)
+\c@part=\count185
+)
+
+Package hyperref Warning: Token not allowed in a PDF string (Unicode):
+(hyperref)                removing `math shift' on input line 12.
+
+
+LaTeX Font Warning: Font shape `OT1/cmr/bx/sc' undefined
+(Font)              using `OT1/cmr/bx/n' instead on input line 14.
+(./chapter.tex
+
+LaTeX Warning: Reference `fig:missing' on page 1 undefined on input line 3.
+
+! Undefined control sequence.
+l.5 \badmacro
+
+)
+Overfull \hbox (12.3pt too wide) in paragraph at lines 20--22
+[]\OT1/cmr/m/n/10 text
+ []
+
+
+LaTeX Warning: Label(s) may have changed. Rerun to get cross-references right.
+
+ )
+Output written on main.pdf (2 pages, 34567 byt
+es).
+"""
+
+
+def test_log_parser_reads_errors_warnings_and_locations(tmp_path):
+    log_path = tmp_path / "main.log"
+    log_path.write_text(LOG, encoding="latin-1")
+    log = ctp.parse_latex_log(str(log_path))
+
+    assert log["errors"] == [{"message": "Undefined control sequence.", "file": "./chapter.tex",
+                              "line": 5, "context": "\\badmacro"}]
+    assert [(w["kind"], w["file"], w["line"]) for w in log["warnings"]] == [
+        ("package", "./main.tex", 12),
+        ("font", "./main.tex", 14),
+        ("undefined-reference", "./chapter.tex", 3),  # Opened right after the font warning
+        ("overfull", "./main.tex", 20),
+        ("latex", "./main.tex", None),
+    ]
+    assert log["warnings"][0]["message"] == ("Token not allowed in a PDF string (Unicode): "
+                                             "removing `math shift' on input line 12.")
+    assert log["warning_counts"] == {"package": 1, "font": 1, "undefined-reference": 1,
+                                     "overfull": 1, "latex": 1}
+    assert (log["rerun"], log["pages"], log["bytes"]) == (True, 2, 34567)
+
+
+def test_build_report_shapes(tmp_path):
+    log = {"errors": [{"message": "Undefined control sequence.", "file": "./b.tex", "line": 5,
+                       "context": "\\badmacro"}],
+           "warnings": [{"kind": "overfull", "message": "Overfull \\hbox", "file": None, "line": 2}],
+           "warning_counts": {"overfull": 1}, "pages": None, "bytes": None}
+    results = [
+        {"rel_path": "ch/a.tex", "status": "ok", "seconds": 1.25, "passes": 2,
+         "log": dict(log, errors=[], pages=3, bytes=100)},
+        {"rel_path": "ch/b.tex", "status": "failed", "seconds": 0.5, "passes": 1, "log": log},
+        {"rel_path": "c.tex", "status": "skipped", "seconds": 0.0},
+    ]
+    ctp.write_build_report(str(tmp_path), results, 2.0, "pdfTeX 3.14")
+
+    report = json.loads((tmp_path / "build-report.json").read_text())
+    assert report["engine"] == "pdfTeX 3.14" and report["seconds"] == 2.0
+    assert report["slowest"] == ["ch/a.tex", "ch/b.tex"]
+    a, b, c = report["documents"]
+    assert (a["status"], a["passes"], a["pages"], a["warning_counts"]) == ("ok", 2, 3, {"overfull": 1})
+    assert b["errors"][0]["line"] == 5
+    assert (c["status"], c["errors"], c["warnings"]) == ("skipped", [], [])
+
+    suite = ctp.ET.parse(tmp_path / "build-report.xml").getroot()
+    assert (suite.tag, suite.get("tests"), suite.get("failures"), suite.get("skipped")) == \
+        ("testsuite", "3", "1", "1")
+    cases = {case.get("name"): case for case in suite}
+    assert [cases[n].get("classname") for n in ("a.tex", "b.tex", "c.tex")] == ["ch", "ch", "root"]
+    failure = cases["b.tex"].find("failure")
+    assert failure.get("message") == "Undefined control sequence."
+    assert failure.text == "./b.tex:5: Undefined control sequence. \\badmacro"
+    assert cases["c.tex"].find("skipped") is not None
+    assert cases["a.tex"].find("system-out").text == "[overfull] Overfull \\hbox"
+
+
+def test_aux_cache_lets_an_edit_converge_in_one_pass(tmp_path, stub_pdflatex):
+    tex_root, pdf_root, aux_cache = tmp_path / "tex", tmp_path / "pdf", tmp_path / "aux"
+    write_tree(tex_root, {"labels.tex": "\\label{eq:one}"})
+    assert passes(build(tex_root, pdf_root, aux_cache=str(aux_cache))) == {"labels.tex": 2}
+
+    (tex_root / "labels.tex").write_text(DOCUMENT % "Edited \\label{eq:one}")
+    (result,) = build(tex_root, pdf_root, aux_cache=str(aux_cache))
+    assert (result["passes"], result["aux_restored"]) == (1, True)
+    assert not list(pdf_root.glob("*.aux"))  # The cache lives outside the output tree
+
+
+# ============================================================================
+# PREAMBLE FORMAT CACHE
+# ============================================================================
+
+def test_formats_are_cached_per_engine_outside_the_pdf_tree(tmp_path, stub_pdflatex):
+    tex_root, pdf_root, cache_root = tmp_path / "tex", tmp_path / "pdf", tmp_path / "formats"
+    write_tree(tex_root, {"a.tex": "A", "b.tex": "B"})
+    results = build(tex_root, pdf_root, format_cache=str(cache_root))
+
+    assert {r["status"] for r in results} == {"ok"}
+    assert {r["format"] for r in results} != {None}
+    assert not list(pdf_root.rglob("*.fmt"))
+    (engine_dir,) = cache_root.iterdir()
+    assert len(list(engine_dir.glob("*.fmt"))) == 1  # One shared preamble
+
+    with ctp.ThreadPoolExecutor(max_workers=1) as executor:
+        ctp.prepare_formats([], str(cache_root), "another engine", executor)
+    assert not engine_dir.exists()
+
+
+# ============================================================================
+# BATCH RESULTS
+# ============================================================================
+
+def test_rebuild_only_after_dependency_edit(tmp_path, stub_pdflatex):
+    tex_root, pdf_root = tmp_path / "tex", tmp_path / "pdf"
+    write_tree(tex_root, {"a.tex": "A", "b.tex": "B"})
+
+    assert {r["status"] for r in build(tex_root, pdf_root)} == {"ok"}
+    assert {r["status"] for r in build(tex_root, pdf_root)} == {"skipped"}
+
+    (tex_root / "a.tex").write_text(DOCUMENT % "A, edited")
+    statuses = {r["rel_path"]: r["status"] for r in build(tex_root, pdf_root)}
+    assert statuses == {"a.tex": "ok", "b.tex": "skipped"}
+
+    (tex_root / "macros.tex").write_text("% edited\n")
+    assert {r["status"] for r in build(tex_root, pdf_root)} == {"ok"}
+
+
+def test_failed_documents_do_not_abort_the_batch(tmp_path, stub_pdflatex):
+    tex_root, pdf_root = tmp_path / "tex", tmp_path / "pdf"
+    write_tree(tex_root, {"good.tex": "Fine", "broken.tex": "\\stubfail", "empty.tex": "\\nooutput"})
+
+    results = build(tex_root, pdf_root)
+    statuses = {r["rel_path"]: r["status"] for r in results}
+    assert statuses == {"good.tex": "ok", "broken.tex": "failed", "empty.tex": "failed"}
+
+    assert (pdf_root / "good.pdf").exists()
+    assert not (pdf_root / "empty.pdf").exists()
+    manifest = json.loads((pdf_root / ctp.MANIFEST_NAME).read_text())
+    assert set(manifest["documents"]) == {"good.tex"}
+    report = json.loads((pdf_root / (ctp.REPORT_NAME + ".json")).read_text())
+    assert {d["rel_path"]: d["status"] for d in report["documents"]} == statuses
+
+    # Failed documents are retried, the good one stays up to date
+    statuses = {r["rel_path"]: r["status"] for r in build(tex_root, pdf_root)}
+    assert statuses == {"good.tex": "skipped", "broken.tex": "failed", "empty.tex": "failed"}
+
+
+def test_missing_pdflatex_is_reported_before_compiling(tmp_path, monkeypatch, capsys):
+    tex_root, pdf_root = tmp_path / "tex", tmp_path / "pdf"
+    write_tree(tex_root, {"a.tex": "A"})
+    monkeypatch.setenv("PATH", str(tmp_path / "empty-bin"))
+
+    assert build(tex_root, pdf_root) == []
+    assert "'pdflatex' command not found" in capsys.readouterr().out
+
+
+def test_edit_during_build_is_rebuilt_next_run(tmp_path, stub_pdflatex, monkeypatch):
+    tex_root, pdf_root = tmp_path / "tex", tmp_path / "pdf"
+    write_tree(tex_root, {"a.tex": "A", "b.tex": "B"})
+    compile_document = ctp.compile_document
+
+    def compile_then_edit(job, options):
+        result = compile_document(job, options)
+        if job["rel_path"] == "a.tex":
+            (tex_root / "a.tex").write_text(DOCUMENT % "A, saved mid-build")
+        return result
+
+    monkeypatch.setattr(ctp, "compile_document", compile_then_edit)
+    assert {r["status"] for r in build(tex_root, pdf_root)} == {"ok"}
+
+    monkeypatch.setattr(ctp, "compile_document", compile_document)
+    statuses = {r["rel_path"]: r["status"] for r in build(tex_root, pdf_root)}
+    assert statuses == {"a.tex": "ok", "b.tex": "skipped"}
+
+
+def test_interrupted_batch_keeps_finished_documents(tmp_path, stub_pdflatex, monkeypatch):
+    tex_root, pdf_root = tmp_path / "tex", tmp_path / "pdf"
+    write_tree(tex_root, {"a.tex": "A", "b.tex": "B", "c.tex": "C"})
+    record_result = ctp.record_result
+    recorded = []
+
+    def record_then_interrupt(job, result, *args):
+        record_result(job, result, *args)
+        recorded.append(job["rel_path"])
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(ctp, "record_result", record_then_interrupt)
+    with pytest.raises(KeyboardInterrupt):
+        ctp.convert_tex_to_pdf_smart(str(tex_root), str(pdf_root), jobs=1)
+
+    manifest = json.loads((pdf_root / ctp.MANIFEST_NAME).read_text())
+    assert set(manifest["documents"]) == set(recorded)
+
+    monkeypatch.setattr(ctp, "record_result", record_result)
+    statuses = {r["rel_path"]: r["status"] for r in build(tex_root, pdf_root)}
+    assert statuses[recorded[0]] == "skipped"
+    assert sorted(statuses.values()) == ["ok", "ok", "skipped"]
+
+
+def test_failed_rebuild_keeps_the_published_pdf(tmp_path, stub_pdflatex):
+    tex_root, pdf_root, scratch = tmp_path / "tex", tmp_path / "pdf", tmp_path / "scratch"
+    scratch.mkdir()
+    write_tree(tex_root, {"a.tex": "A"})
+    build(tex_root, pdf_root, scratch_dir=str(scratch))
+    published = (pdf_root / "a.pdf").read_bytes()
+
+    (tex_root / "a.tex").write_text(DOCUMENT % "\\stubfail")
+    assert [r["status"] for r in build(tex_root, pdf_root, scratch_dir=str(scratch))] == ["failed"]
+    assert (pdf_root / "a.pdf").read_bytes() == published
+    # Build dirs are gone, from the scratch root and from the output tree
+    assert list(scratch.iterdir()) == []
+    assert sorted(p.name for p in pdf_root.iterdir()) == sorted(
+        ["a.pdf", ctp.MANIFEST_NAME, "build-report.json", "build-report.xml"])
+
+
+# ============================================================================
+# WATCH MODE
+# ============================================================================
+
+def test_watch_resolves_options_once(tmp_path, stub_pdflatex, monkeypatch):
+    tex_root, pdf_root = tmp_path / "tex", tmp_path / "pdf"
+    write_tree(tex_root, {"a.tex": "A"})
+    snapshots = []
+    resolved = []
+    build_options = ctp.build_options
+
+    def counted_build_options(*args):
+        resolved.append(args)
+        return build_options(*args)
+
+    def snapshot_then_stop(root):
+        snapshots.append(root)
+        if len(snapshots) > 1:
+            raise KeyboardInterrupt
+        return {}
+
+    monkeypatch.setattr(ctp, "Observer", None)
+    monkeypatch.setattr(ctp, "WATCH_POLL_SECONDS", 0)
+    monkeypatch.setattr(ctp, "snapshot_tree", snapshot_then_stop)
+    monkeypatch.setattr(ctp, "build_options", counted_build_options)
+    ctp.watch_tree(str(tex_root), str(pdf_root), jobs=1, max_passes=1)
+
+    assert len(resolved) == 1
+    assert json.loads((pdf_root / ctp.MANIFEST_NAME).read_text())["documents"]["a.tex"]["passes"] == 1
+
+
+# ============================================================================
+# SHARDING
+# ============================================================================
+
+def build_shards(tex_root, shard_roots, **kwargs):
+    """Build shard K/N into shard_roots[K - 1] for every K"""
+    for index, root in enumerate(shard_roots, 1):
+        build(tex_root, root, shard=(index, len(shard_roots)), **kwargs)
+
+
+def test_shards_in_separate_trees_agree_on_the_plan(tmp_path, stub_pdflatex):
+    names = [f"doc{i}.tex" for i in range(8)]
+    write_tree(tmp_path / "tex", {name: name for name in names})
+    shard_roots = [str(tmp_path / "shard1"), str(tmp_path / "shard2")]
+
+    # Each shard's own manifest only times its own documents, so without a
+    # shared --shard-costs the second run must not plan from them
+    for run in range(2):
+        build_shards(tmp_path / "tex", shard_roots)
+        merged = ctp.merge_shards(shard_roots, str(tmp_path / "pdf"))
+        assert merged["problems"] == [], f"run {run + 1}"
+        assert merged["documents"] == len(names)
+
+    built = sorted(os.path.relpath(os.path.join(d, n), tmp_path / "pdf")
+                   for d, _, files in os.walk(tmp_path / "pdf") for n in files if n.endswith(".pdf"))
+    assert built == sorted(name[:-4] + ".pdf" for name in names)
+
+    # A shared cost file (here the merged manifest) gives every shard the same plan too
+    (tmp_path / "tex" / "doc0.tex").write_text(DOCUMENT % "edited")
+    build_shards(tmp_path / "tex", shard_roots,
+                 shard_costs=str(tmp_path / "pdf" / ctp.MANIFEST_NAME))
+    assert ctp.merge_shards(shard_roots, str(tmp_path / "pdf"))["problems"] == []
@@ -0,0 +1,107 @@
+"""
+Tests for Visualizations/media_store.py on a small fake media tree.
+"""
+
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "Visualizations"))
+
+import media_store as ms
+
+SCENES = '''
+class Intro(BaseScene):
+    def construct(self):
+        self.play(Write(MathTex(r"\\vec{a} \\cdot \\vec{b}")))
+        self.play(Write(Text("Dot product")))
+'''
+
+TEX = "\\documentclass{standalone}\n\\begin{document}\n\\begin{align*}\n%s\n\\end{align*}\n\\end{document}\n"
+
+PARTIALS = "videos/scenes/720p30/partial_movie_files"
+
+MEDIA = {
+    "Tex/used.tex": TEX % "\\vec{a} \\cdot \\vec{b}",
+    "Tex/used.svg": "<svg/>",
+    "Tex/unused.tex": TEX % "x^2",
+    "Tex/unused.svg": "<svg/>",
+    "Tex/failed.tex": TEX % "\\frac{1}{",  # Compile failed: no .svg
+    "Tex/failed.log": "! Missing } inserted.",
+    "texts/3f2a9c.svg": "<svg>Dot product</svg>",
+    f"{PARTIALS}/Intro/{ms.PARTIAL_LIST_NAME}": "file 'file:/media/a.mp4'\n",
+    f"{PARTIALS}/Intro/a.mp4": "partial a",
+    f"{PARTIALS}/Intro/b.mp4": "partial b, from an older render",
+    f"{PARTIALS}/Removed/{ms.PARTIAL_LIST_NAME}": "file 'file:/media/c.mp4'\n",
+    f"{PARTIALS}/Removed/c.mp4": "partial c",
+    "videos/scenes/720p30/Intro.mp4": "final video",
+    "jupyter/Intro@2024-01-01@10-00-00.mp4": "old render",
+    "jupyter/Intro@2024-01-02@10-00-00.mp4": "new render",
+}
+
+DEAD = sorted([
+    "Tex/failed.tex", "Tex/failed.log",
+    f"{PARTIALS}/Intro/b.mp4",
+    f"{PARTIALS}/Removed/{ms.PARTIAL_LIST_NAME}", f"{PARTIALS}/Removed/c.mp4",
+    "jupyter/Intro@2024-01-01@10-00-00.mp4",
+])
+
+
+@pytest.fixture
+def store(tmp_path):
+    """(media_dir, source_dir) with MEDIA written under media_dir"""
+    media_dir, source_dir = tmp_path / "media", tmp_path / "src"
+    source_dir.mkdir()
+    (source_dir / "scenes.py").write_text(SCENES)
+    for rel_path, body in MEDIA.items():
+        path = media_dir / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(body)
+    return str(media_dir), str(source_dir)
+
+
+def snapshot(media_dir):
+    return sorted(os.path.relpath(os.path.join(d, n), media_dir).replace(os.sep, "/")
+                  for d, _, names in os.walk(media_dir) for n in names)
+
+
+def test_references_decide_live_and_dead(store):
+    media_dir, source_dir = store
+    files = ms.build_index(media_dir, save=False)
+    live, dead = ms.find_live(media_dir, files, source_dir)
+
+    assert sorted(dead) == DEAD
+    assert {"Tex/used.tex", "Tex/used.svg", "texts/3f2a9c.svg", f"{PARTIALS}/Intro/a.mp4",
+            "videos/scenes/720p30/Intro.mp4", "jupyter/Intro@2024-01-02@10-00-00.mp4"} <= live
+    assert "Tex/unused.tex" not in live | dead
+
+
+def test_dry_run_and_stats_leave_the_store_alone(store, capsys):
+    media_dir, source_dir = store
+    before = snapshot(media_dir)
+
+    ms.print_stats(media_dir, source_dir)
+    result = ms.collect_garbage(media_dir, source_dir, dry_run=True)
+    assert sorted(result["deleted"]) == DEAD
+    assert snapshot(media_dir) == before  # No deletions and no .media-index.json
+
+    # Over budget: unreferenced Tex goes before live caches; Text SVGs and videos stay
+    result = ms.collect_garbage(media_dir, source_dir, budget=0, dry_run=True)
+    evicted = result["deleted"][len(DEAD):]
+    assert sorted(evicted[:2]) == ["Tex/unused.svg", "Tex/unused.tex"]
+    assert not any(p.startswith(("texts/", "videos/scenes/720p30/Intro.mp4", "jupyter/")) for p in evicted)
+    assert snapshot(media_dir) == before
+    assert "would delete Tex/failed.tex" in capsys.readouterr().out
+
+
+def test_gc_deletes_dead_media_and_saves_the_index(store):
+    media_dir, source_dir = store
+    result = ms.collect_garbage(media_dir, source_dir)
+
+    assert sorted(result["deleted"]) == DEAD
+    remaining = snapshot(media_dir)
+    assert not set(DEAD) & set(remaining)
+    assert ms.INDEX_NAME in remaining
+    assert not os.path.exists(os.path.join(media_dir, PARTIALS, "Removed"))
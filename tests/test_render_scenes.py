@@ -0,0 +1,150 @@
+"""
+Tests for Visualizations/render_scenes.py. manim is never started.
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "Visualizations"))
+
+import render_scenes as rs
+
+SCENES = '''
+def helper():
+    return 1
+
+
+class Intro(BaseScene):
+    def construct(self):
+        self.wait(1)
+
+
+class Detail(Intro):
+    def construct(self):
+        self.wait(2)
+
+
+class Summary(BaseScene):
+    def construct(self):
+        self.wait(3)
+'''
+
+
+def write_notebook(path, cells):
+    notebook = {"cells": [{"cell_type": cell_type, "source": source.splitlines(keepends=True)}
+                          for cell_type, source in cells],
+                "metadata": {}, "nbformat": 4, "nbformat_minor": 5}
+    path.write_text(json.dumps(notebook), encoding="utf-8")
+
+
+# ============================================================================
+# SCENE EXTRACTION
+# ============================================================================
+
+def test_notebook_scenes_are_extracted_in_order(tmp_path):
+    notebook = tmp_path / "lesson.ipynb"
+    write_notebook(notebook, [
+        ("code", "import os\nos.chdir(r'C:\\\\somewhere')\n"),
+        ("markdown", "class NotCode(BaseScene): pass\n"),
+        ("code", "%%manim -qm Intro\nclass Intro(BaseScene):\n    def construct(self):\n        pass\n"),
+        ("code", "!pip install manim\nclass Other(Intro):\n    pass\n\nclass Plain:\n    pass\n"),
+        ("code", "from assemble_video import assemble_video\nassemble_video('media')\n"),
+    ])
+
+    module_path, source, scenes = rs.extract_scenes(str(notebook), str(tmp_path / "work"))
+    assert scenes == ["Intro", "Other"]
+    assert os.path.basename(module_path) == "lesson_scenes.py"
+    assert source.startswith(rs.MODULE_HEADER)
+    assert "chdir" not in source and "%%manim" not in source and "!pip" not in source
+    assert "assemble_video" not in source
+    compile(source, module_path, "exec")
+
+
+def test_scene_classes_include_subclasses_of_scenes():
+    assert rs.find_scene_classes(SCENES) == ["Intro", "Detail", "Summary"]
+
+
+# ============================================================================
+# FINGERPRINTS
+# ============================================================================
+
+def edit(source, old, new):
+    assert old in source
+    return source.replace(old, new)
+
+
+def changed(before, after):
+    return sorted(name for name in before if before[name] != after[name])
+
+
+def test_fingerprints_follow_scene_edits():
+    scenes = rs.find_scene_classes(SCENES)
+    before = rs.scene_fingerprints(SCENES, scenes, "m")
+
+    # A scene's own edit also reaches the scenes that inherit from it
+    assert changed(before, rs.scene_fingerprints(edit(SCENES, "wait(1)", "wait(4)"), scenes, "m")) == \
+        ["Detail", "Intro"]
+    assert changed(before, rs.scene_fingerprints(edit(SCENES, "wait(3)", "wait(4)"), scenes, "m")) == \
+        ["Summary"]
+    # Shared definitions and render settings change every scene
+    assert changed(before, rs.scene_fingerprints(edit(SCENES, "return 1", "return 2"), scenes, "m")) == \
+        ["Detail", "Intro", "Summary"]
+    assert changed(before, rs.scene_fingerprints(SCENES, scenes, "h")) == ["Detail", "Intro", "Summary"]
+
+
+def test_fingerprints_follow_style_modules(monkeypatch, tmp_path):
+    for name in rs.SHARED_SOURCES:
+        (tmp_path / name).write_text("# style\n")
+    monkeypatch.setattr(rs, "VISUALIZATIONS_DIR", str(tmp_path))
+    scenes = rs.find_scene_classes(SCENES)
+    before = rs.scene_fingerprints(SCENES, scenes, "m")
+
+    (tmp_path / "style_constants.py").write_text("# style, edited\n")
+    assert changed(before, rs.scene_fingerprints(SCENES, scenes, "m")) == ["Detail", "Intro", "Summary"]
+
+
+@pytest.fixture
+def fake_render(monkeypatch):
+    """Replace the manim subprocess with a placeholder video; returns the scenes rendered"""
+    rendered = []
+
+    def render_scene(scene, module_path, sandbox, quality, output_dir, profile_dir=None):
+        rendered.append(scene)
+        with open(os.path.join(output_dir, f"{scene}.mp4"), "wb") as f:
+            f.write(b"video " + scene.encode())
+        return {"scene": scene, "status": "ok", "file": f"{scene}.mp4",
+                "bytes": len(b"video " + scene.encode()), "seconds": 0.0, "log": None}
+
+    monkeypatch.setattr(rs, "render_scene", render_scene)
+    return rendered
+
+
+def test_only_changed_scenes_are_rendered_again(tmp_path, fake_render):
+    source, output_dir = tmp_path / "scenes.py", tmp_path / "videos"
+    source.write_text(SCENES)
+    render = lambda **kwargs: rs.render_scenes(str(source), output_dir=str(output_dir), jobs=1, **kwargs)
+
+    assert [r["status"] for r in render()] == ["ok", "ok", "ok"]
+    assert [r["status"] for r in render()] == ["cached", "cached", "cached"]
+
+    source.write_text(edit(SCENES, "wait(3)", "wait(4)"))
+    fake_render.clear()
+    assert [r["status"] for r in render()] == ["cached", "cached", "ok"]
+    assert fake_render == ["Summary"]
+
+    # A video that went missing is rendered again
+    (output_dir / "Intro.mp4").unlink()
+    fake_render.clear()
+    render()
+    assert fake_render == ["Intro"]
+
+    fake_render.clear()
+    render(force=True)
+    assert sorted(fake_render) == ["Detail", "Intro", "Summary"]
+
+    manifest = json.loads((output_dir / rs.SCENE_MANIFEST_NAME).read_text())
+    assert [r["scene"] for r in manifest["scenes"]] == ["Intro", "Detail", "Summary"]
@@ -0,0 +1,131 @@
+"""
+Tests for Visualizations/style_helpers.py. These need Manim and are skipped
+without it; nothing here starts LaTeX or writes a video.
+"""
+
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "Visualizations"))
+
+pytest.importorskip("manim")
+
+import style_helpers as sh
+from manim.utils import tex_file_writing
+
+
+# ============================================================================
+# TEX PROFILING
+# ============================================================================
+
+def test_latex_runs_count_compiles_not_memo_lookups(monkeypatch):
+    fake_compile = lambda *args, **kwargs: "formula.dvi"
+    monkeypatch.setattr(tex_file_writing, "compile_tex", fake_compile)
+    before = sh.tex_cache_info()
+
+    # MathTex reaches compile_tex only on an on-disk SVG cache miss
+    with sh.count_latex_runs():
+        assert tex_file_writing.compile_tex("formula.tex", "latex", ".dvi") == "formula.dvi"
+        sh._cached_mobject(("test", "memo"), lambda: sh.VMobject())
+        sh._cached_mobject(("test", "memo"), lambda: sh.VMobject())
+    tex_file_writing.compile_tex("formula.tex", "latex", ".dvi")  # Not counted any more
+
+    after = sh.tex_cache_info()
+    assert tex_file_writing.compile_tex is fake_compile
+    assert after["latex_runs"] - before["latex_runs"] == 1
+    assert after["misses"] - before["misses"] == 1
+    assert after["hits"] - before["hits"] == 1
+
+
+def test_importing_does_not_patch_manim():
+    assert tex_file_writing.compile_tex.__module__ == "manim.utils.tex_file_writing"
+
+
+def test_profiler_counts_held_frames():
+    class FileWriter:
+        def write_frame(self, frame, num_frames=1):
+            pass
+
+    class Renderer:
+        file_writer = FileWriter()
+
+    profiler = sh.SceneProfiler(sh.Scene())
+    profiler.instrument(Renderer())
+    Renderer.file_writer.write_frame("frame")
+    Renderer.file_writer.write_frame("frame", num_frames=30)  # A frozen wait
+    Renderer.file_writer.write_frame("frame", 5)
+    assert profiler.counters["frames"] == 36
+
+
+# ============================================================================
+# STATIC WAITS
+# ============================================================================
+
+class PauseScene(sh.BaseScene):
+    """Records every Wait that reaches play(); construct() pauses with one updater"""
+
+    # Called with the scene; returns the updater to attach, or None
+    make_updater = None
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.waits = []
+
+    def play(self, *args, **kwargs):
+        self.waits += [a for a in args if isinstance(a, sh.Wait)]
+        return super().play(*args, **kwargs)
+
+    def construct(self):
+        square = sh.Square()
+        updater = self.make_updater() if self.make_updater else None
+        if updater is not None:
+            square.add_updater(updater)
+        self.add(square)
+        self.wait(1)
+
+
+def render_waits(scene_class, monkeypatch):
+    for name in (sh.DRAFT_ENV, sh.PROFILE_ENV):
+        monkeypatch.delenv(name, raising=False)
+    with sh.tempconfig({"dry_run": True, "progress_bar": "none", "verbosity": "WARNING"}):
+        scene = scene_class()
+        scene.render()
+    return scene.waits
+
+
+def pause_scene(make_updater, **attributes):
+    return type("Scene", (PauseScene,), dict(attributes, make_updater=make_updater))
+
+
+@pytest.mark.parametrize("make_updater, frozen", [
+    (None, True),
+    (lambda scene: sh.static_updater(lambda m: m.move_to(sh.ORIGIN)), True),
+    # Unmarked updaters render every frame, even when they happen not to move anything
+    (lambda scene: (lambda m: m.move_to(sh.ORIGIN)), False),
+    (lambda scene: (lambda m, dt: m.shift(sh.RIGHT * dt)), False),
+    # Marked by mistake: the probe still sees it move
+    (lambda scene: sh.static_updater(lambda m, dt: m.shift(sh.RIGHT * dt)), False),
+])
+def test_wait_holds_a_frame_only_when_nothing_moves(monkeypatch, make_updater, frozen):
+    waits = render_waits(pause_scene(make_updater), monkeypatch)
+    assert len(waits) == 1
+    assert bool(waits[0].is_static_wait) is frozen
+
+
+def test_time_dependent_updater_is_not_frozen(monkeypatch):
+    # Still for the first frames of the wait, moving from half a second on
+    def make_updater(scene):
+        start = scene.time
+        return lambda m: m.move_to(sh.RIGHT * max(0, scene.time - start - 0.5))
+
+    waits = render_waits(pause_scene(make_updater), monkeypatch)
+    assert len(waits) == 1 and not waits[0].is_static_wait
+
+
+def test_static_waits_can_be_turned_off(monkeypatch):
+    make_updater = lambda scene: sh.static_updater(lambda m: m.move_to(sh.ORIGIN))
+    waits = render_waits(pause_scene(make_updater, hold_static_frames=False), monkeypatch)
+    assert len(waits) == 1 and not waits[0].is_static_wait
@@ -0,0 +1,45 @@
+"""
+Import-time budget for Visualizations/style_utils.py: reading constants
+must stay cheap and must not pull in Manim or its heavy dependencies.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+VISUALIZATIONS_DIR = os.path.join(REPO_ROOT, "Visualizations")
+
+# Generous, so a busy CI machine doesn't fail it; a Manim import takes seconds
+BUDGET_MS = 200.0
+REPEAT = 3
+
+# Modules that must not be imported just to read constants
+HEAVY_MODULES = ["manim", "cairo", "moderngl", "numpy", "scipy", "PIL"]
+
+MEASURE_CODE = """
+import json, sys, time
+start = time.perf_counter()
+import style_utils
+style_utils.COLOR_RESULT, style_utils.TITLE_SIZE, style_utils.PAUSE_SHORT
+elapsed = time.perf_counter() - start
+heavy = sorted(m for m in {heavy!r} if m in sys.modules)
+print(json.dumps({{"ms": elapsed * 1000, "heavy": heavy}}))
+"""
+
+
+def measure_import():
+    """Import style_utils in a fresh interpreter; returns {"ms": ..., "heavy": [...]}"""
+    proc = subprocess.run(
+        [sys.executable, "-c", MEASURE_CODE.format(heavy=HEAVY_MODULES)],
+        cwd=VISUALIZATIONS_DIR, capture_output=True, text=True, check=True
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def test_style_utils_import_is_light():
+    runs = [measure_import() for _ in range(REPEAT)]
+    assert sorted({m for run in runs for m in run["heavy"]}) == []
+    best = min(run["ms"] for run in runs)
+    assert best < BUDGET_MS, f"importing style_utils took {best:.1f} ms"
@@ -0,0 +1,51 @@
+"""
+Tests for Visualizations/validate_layout.py on minimal scenes. These need
+Manim and are skipped without it.
+"""
+
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "Visualizations"))
+
+pytest.importorskip("manim")
+
+import validate_layout as vl
+from style_helpers import BaseScene, Circle, FadeIn, Text, UP
+
+
+class CleanScene(BaseScene):
+    def construct(self):
+        self.add_title("Clean")
+        self.play(FadeIn(Circle(radius=1)))
+        self.wait(1)
+
+
+class CrowdedScene(BaseScene):
+    def construct(self):
+        self.add_title("Crowded")
+        self.play(FadeIn(Text("too high").to_edge(UP, buff=0.1)))
+
+
+@pytest.fixture
+def layout_config(tmp_path, monkeypatch):
+    for name in vl.SCENE_ENV_VARS:
+        monkeypatch.delenv(name, raising=False)
+    with vl.tempconfig(dict(vl.VALIDATION_CONFIG, media_dir=str(tmp_path))):
+        yield
+
+
+def test_clean_scene_with_title_is_ok(layout_config):
+    result = vl.validate_scene(CleanScene)
+    assert result["status"] == "ok", result["problems"] or result.get("error")
+    assert result["steps"] >= 3
+
+
+def test_label_in_title_zone_is_reported(layout_config):
+    result = vl.validate_scene(CrowdedScene)
+    assert result["status"] == "problems"
+    assert [(p["kind"], p["object"]) for p in result["problems"]
+            if p["kind"] == "title-zone"] == [("title-zone", "Text('too high')")]